@@ -1,51 +1,66 @@
 # DQ1 Battle Simulator - App
+#
+# With no arguments this starts the GUI. With a subcommand (simulate, sweep, solve) it runs fightsim.cli instead.
+# GUI modules are only imported by the factories below, so the command line never loads tkinter.
 
-import logging
-import logging.config
-from fightsim.views.view import View
-from fightsim.controllers.controller import Controller
-from fightsim.models.game_state import GameState
-from fightsim.models.player import player_factory
-from fightsim.models.enemy import enemy_dummy_factory
+import os
+import sys
 
-from fightsim.controllers.battle_controller import BattleController
-from fightsim.models.combat_engine import CombatEngine
-from fightsim.common.randomizer import Randomizer
-from fightsim.models.game_constants import GameConstants
+LOGGING_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logging.ini')
 
 def create_view():
+    from fightsim.views.view import View
     return View()  
 
 def create_game_state(combat_engine):
-    return GameState(player=player_factory(combat_engine), enemy=enemy_dummy_factory(combat_engine))
+    from fightsim.models.game_state import GameState
+    from fightsim.models.player import player_factory
+    from fightsim.models.enemy import enemy_dummy_factory
+    return GameState(player=player_factory(combat_engine), combat_engine=combat_engine,
+                     enemy=enemy_dummy_factory(combat_engine))
 
-def create_controller(game_state, view):
-    return Controller(game_state, view)
+def create_controller(game_state, view, simulation_pool=None):
+    from fightsim.controllers.controller import Controller
+    return Controller(game_state, view, simulation_pool)
 
 def create_battle_controller(game_state, view):
+    from fightsim.controllers.battle_controller import BattleController
     return BattleController(game_state, view)
 
 def create_combat_engine():
+    from fightsim.models.combat_engine import CombatEngine
+    from fightsim.common.randomizer import Randomizer
+    from fightsim.models.game_constants import GameConstants
     return CombatEngine(Randomizer(), GameConstants())
 
+def create_simulation_pool():
+    from fightsim.sim.background import SimulationPool
+    return SimulationPool().warm_up()
+
 def main(view_factory=create_view,
         game_state_factory=create_game_state,
         controller_factory=create_controller,        
         battle_controller_factory=create_battle_controller,
-        combat_engine_factory=create_combat_engine
+        combat_engine_factory=create_combat_engine,
+        simulation_pool_factory=create_simulation_pool
         ):
         
     """ Entry Point for the Application """
 
-    
-    logging.config.fileConfig('./fightsim/logging.ini')
+    import logging
+    import logging.config
+
+    logging.config.fileConfig(LOGGING_CONFIG)
     main_logger = logging.getLogger('main')
     
+    simulation_pool = None
     try:       
+        # Start the workers before any Tk state exists, so they don't inherit it
+        simulation_pool = simulation_pool_factory()
         combat_engine = combat_engine_factory()
         view = view_factory()        
         game_state = game_state_factory(combat_engine)
-        controller = controller_factory(game_state, view)
+        controller = controller_factory(game_state, view, simulation_pool)
         battle_controller = battle_controller_factory(game_state, view)
         view.set_controllers(controller, battle_controller)
         controller.initial_update()
@@ -54,7 +69,13 @@ def main(view_factory=create_view,
         controller.view.mainloop()
     except Exception as e:
         main_logger.error(f"Failed to start the application: {e}", exc_info=True)
+    finally:
+        if simulation_pool is not None:
+            simulation_pool.shutdown()
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from fightsim.cli import main as cli_main
+        sys.exit(cli_main())
     main()
@@ -0,0 +1,209 @@
+"""
+Exact distributions of how many actions a kill takes: player attacks until the enemy falls, enemy turns until the
+player does.
+
+One action's damage is a mixture of uniform ranges, each a Component of (weight, low, high). For an attack these
+are CombatEngine's player_crit_range and player_damage_range, plus a miss on a dodge. For an enemy turn they are
+resolve_enemy_attack's range and the Hurt and fire ranges in GameConstants, weighted by the enemy's pattern.
+Convolving a damage distribution with randint(low, high) is the difference of two cumulative sums, so one action
+costs O(HP) per component however wide its range. The distribution is only kept below the highest HP in range, and
+whatever has passed an HP is dead at that HP. So each pass answers every starting HP in the enemy's base_hp at
+once, and KillCounts averages over them.
+
+KillCounts also has the fewest and most actions a kill can take, read straight off the ranges. These are the
+instant bounds the setup screen shows.
+
+attack_win_chance() turns the two counts into the exact chance of winning for matchups where nothing but damage
+happens. That means the player only attacks and the enemy only attacks, casts Hurt or breathes fire, and can't
+flee. Sweeps use it to skip cells whose result is a foregone conclusion.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from ..common.messages import EnemyActions
+from ..common.randomizer import Randomizer
+from ..models.combat_engine import CombatEngine
+from ..models.enemy import create_enemy
+from ..models.game_constants import GameConstants
+from . import pmf
+
+MAX_ACTIONS = 1000  # As many as a simulated fight has rounds
+TOLERANCE = 1e-12
+DAMAGE_ONLY_ACTIONS = (EnemyActions.ATTACK,) + pmf.ENEMY_DAMAGE_ACTIONS + pmf.ENEMY_FIRE_ACTIONS
+
+
+@dataclass
+class KillCounts:
+    """
+    cdf[n] is the chance n actions or fewer kill, averaged over the HP range; cdf[0] is 0. fewest and most are the
+    exact extremes, with most None when a run of zero-damage rolls can go on forever and fewest None when no roll
+    does damage
+    """
+    cdf: np.ndarray
+    fewest: Optional[int]
+    most: Optional[int]
+
+    @property
+    def pmf(self):
+        """ pmf[n] is the chance the n-th action is the one that kills """
+        return np.diff(self.cdf, prepend=0.0)
+
+    @property
+    def unresolved(self):
+        """ Chance of still standing after the last action counted """
+        return 1.0 - self.cdf[-1]
+
+    def within(self, actions):
+        """ Chance a kill takes actions or fewer """
+        return float(self.cdf[min(actions, len(self.cdf) - 1)]) if actions > 0 else 0.0
+
+    def mean(self):
+        """ Expected actions to a kill. A lower bound when unresolved isn't 0 """
+        return float(np.sum(1.0 - self.cdf[:-1]))
+
+    def describe(self):
+        """ The range and median as text, e.g. "2 to 5, median 3" """
+        if self.fewest is None:
+            return "never"
+        most = "no limit" if self.most is None else self.most
+        median = self.quantile(0.5)
+        if self.fewest == self.most:
+            return f"{self.fewest}"
+        return f"{self.fewest} to {most}, median {median if median is not None else 'unknown'}"
+
+    def quantile(self, q):
+        """ The fewest actions that kill with chance at least q, or None beyond the actions counted """
+        index = int(np.searchsorted(self.cdf, q - TOLERANCE))
+        return index if index < len(self.cdf) else None
+
+
+def _convolve_uniforms(alive, components):
+    """ Distribution of damage so far plus one action's damage, cut off at len(alive) """
+    size = len(alive)
+    sums = np.concatenate(([0.0], np.cumsum(alive)))  # sums[k] == alive[:k].sum()
+    index = np.arange(size)
+    result = np.zeros(size)
+    for weight, low, high in components:
+        if weight and low < size:
+            # result[d] gains alive[d - high] ... alive[d - low], each 1 / (high - low + 1) likely
+            result += weight / (high - low + 1) * (sums[np.clip(index - low + 1, 0, size)]
+                                                   - sums[np.clip(index - high, 0, size)])
+    return result
+
+
+def action_counts(components, low_hp, high_hp, max_actions=MAX_ACTIONS, tolerance=TOLERANCE):
+    """
+    KillCounts for actions that each deal damage drawn from components, until the total reaches an HP drawn
+    uniformly from low_hp to high_hp
+    """
+    components = [(weight, low, high) for weight, low, high in components if weight]
+    most_damage = max(high for _, _, high in components)
+    least_damage = min(low for _, low, _ in components)
+    fewest = math.ceil(low_hp / most_damage) if most_damage > 0 else None
+    most = math.ceil(high_hp / least_damage) if least_damage > 0 else None
+
+    cdf = [0.0]
+    if fewest is not None:
+        alive = np.zeros(high_hp)
+        alive[0] = 1.0
+        while len(cdf) <= max_actions and cdf[-1] < 1.0 - tolerance:
+            alive = _convolve_uniforms(alive, components)
+            cdf.append(1.0 - float(np.cumsum(alive)[low_hp - 1:].mean()))
+    return KillCounts(np.minimum(np.array(cdf), 1.0), fewest, most)
+
+
+def player_hit_components(player, enemy, constants=None):
+    """ Components of one player attack: an excellent hit, a normal hit, or a dodged swing for 0 """
+    constants = constants or GameConstants()
+    engine = CombatEngine(Randomizer(0), constants)
+    attack = player.strength + player.weapon.modifier
+    crit = 0.0 if enemy.void_critical_hit else 1 / constants.crit_chance
+    dodge = min(max(enemy.dodge, 0), constants.enemy_dodge_limit) / constants.enemy_dodge_limit
+    return [(crit, *engine.player_crit_range(attack)),
+            ((1 - crit) * (1 - dodge), *engine.player_damage_range(attack, enemy.agility)),
+            ((1 - crit) * dodge, 0, 0)]
+
+
+def enemy_turn_components(enemy, player, constants=None):
+    """
+    Components of one enemy turn against an awake, unsealed player, with the enemy above its healing threshold.
+    Actions that deal no damage count as 0
+    """
+    constants = constants or GameConstants()
+    engine = CombatEngine(Randomizer(0), constants)
+    components = []
+    odds = pmf.action_choice_odds(pmf.pattern_key(enemy.pattern), False, False, False)
+    for action, chance in odds.items():
+        if action is EnemyActions.ATTACK:
+            defense = player.defense()
+            damage = (engine.weak_damage_range(enemy.strength) if defense > enemy.strength
+                      else engine.normal_damage_range(enemy.strength, defense))
+        elif action in pmf.ENEMY_DAMAGE_ACTIONS:
+            hurt_high, hurt_low = constants.enemy_hurt_ranges[action]
+            damage = hurt_low if player.armor.reduce_hurt_damage else hurt_high
+        elif action in pmf.ENEMY_FIRE_ACTIONS:
+            fire_high, fire_low = constants.enemy_breathes_fire_ranges[action]
+            damage = fire_low if player.armor.reduce_fire_damage else fire_high
+        else:
+            damage = (0, 0)
+        components.append((float(chance), *damage))
+    return components
+
+
+def hits_to_kill(player, enemy, constants=None, max_actions=MAX_ACTIONS):
+    """ KillCounts of player attacks needed to bring down enemy, over its whole base_hp range """
+    low_hp, high_hp = enemy.base_hp
+    return action_counts(player_hit_components(player, enemy, constants), low_hp, high_hp, max_actions)
+
+
+def turns_to_kill(enemy, player, constants=None, max_actions=MAX_ACTIONS):
+    """ KillCounts of enemy turns needed to bring down player from full HP """
+    return action_counts(enemy_turn_components(enemy, player, constants), player.max_hp, player.max_hp,
+                         max_actions)
+
+
+def race_win_chance(hits, turns, enemy_first=False):
+    """
+    Chance the player's killing hit lands before the enemy's killing turn when the two alternate, the player
+    going first unless enemy_first
+    """
+    hit_odds = hits.pmf
+    # The enemy has had n - 1 turns by the player's n-th attack, or n if it went first
+    offset = 0 if enemy_first else 1
+    turns_cdf = np.array([turns.cdf[min(max(n - offset, 0), len(turns.cdf) - 1)] for n in range(len(hit_odds))])
+    return float(np.sum(hit_odds * (1.0 - turns_cdf)))
+
+
+def damage_only(enemy, player):
+    """ True if nothing but damage can happen in a fight the player fights by attacking """
+    return (all(item["id"] in DAMAGE_ONLY_ACTIONS for item in enemy.pattern)
+            and pmf.enemy_flee_chance(enemy.strength, player.strength) == 0)
+
+
+def matchup_counts(player_config, enemy_key, constants=None, max_actions=MAX_ACTIONS):
+    """ (hits_to_kill, turns_to_kill) for a PlayerConfig against an enemy key """
+    engine = CombatEngine(Randomizer(0), constants)
+    player = player_config.build(engine)
+    enemy = create_enemy(enemy_key, engine)
+    return hits_to_kill(player, enemy, constants, max_actions), turns_to_kill(enemy, player, constants, max_actions)
+
+
+def attack_win_chance(player_config, enemy_key, constants=None):
+    """
+    The exact chance an attacking player beats enemy_key, or None when the fight involves more than damage (see
+    damage_only). Counts a fight still going after MAX_ACTIONS as lost
+    """
+    engine = CombatEngine(Randomizer(0), constants)
+    player = player_config.build(engine)
+    enemy = create_enemy(enemy_key, engine)
+    if not damage_only(enemy, player):
+        return None
+    hits, turns = hits_to_kill(player, enemy, constants), turns_to_kill(enemy, player, constants)
+    surprised = float(pmf.surprise_chance(player.agility, enemy.agility))
+    chance = (surprised * race_win_chance(hits, turns, enemy_first=True)
+              + (1 - surprised) * race_win_chance(hits, turns))
+    return min(max(chance, 0.0), 1.0)  # Rounding can stray just past either end
@@ -0,0 +1,239 @@
+"""
+Best weapon, armor and shield for a level and name against one enemy or a weighted set of enemies.
+
+Only three things about a loadout reach the combat rules. The weapon's modifier adds to strength for the player's
+attack. The armor and shield modifiers, with agility, make defense(). The armor's reduce_hurt_damage and
+reduce_fire_damage flags soften Hurt and fire breath. So rather than solving all 8 x 8 x 4 loadouts per enemy,
+best_loadouts() works in four steps:
+
+1. Drop the loadouts the LoadoutConstraints rule out: excluded items, over budget, or a custom predicate.
+2. Collapse loadouts that roll the same damage ranges both ways against every enemy into one class. A flag only
+   counts against enemies that cast Hurt or breathe fire. The cheapest member represents the class.
+3. Prune every class another class dominates. Against every enemy, the other class's normal and excellent hit
+   ranges are at least as high at both ends, the enemy's attack range is at most as high at both ends, and it has
+   every damage-reducing flag that matters. The ranges come straight from CombatEngine's player_damage_range,
+   player_crit_range, normal_damage_range and weak_damage_range, so a dominated class deals no more and takes no
+   more on any roll, and is not worth solving.
+4. Score the survivors, exactly with analysis.markov or by simulation, and rank them by weighted win chance.
+5. Domination only means no worse on any roll, so a dominated class can still tie the best one, e.g. when every
+   weapon kills a slime in one hit. Pruned classes cheaper than the winner are scored too, dearest first, and ties
+   go to the cheaper loadout. A class scores no more than any class that dominates it, so once a class falls short
+   of the winner, every class it dominates is skipped.
+"""
+
+from dataclasses import dataclass, field
+from itertools import product
+from typing import Callable, Optional
+
+from ..models.combat_engine import CombatEngine
+from ..models.enemy import create_enemy
+from ..models.game_constants import GameConstants
+from ..models.items import ItemType, items
+from ..sim.simulator import ENEMY_FIRE_ACTIONS, ENEMY_HURT_SPELLS, BattleSimulator, PlayerConfig
+from .markov import solve_fight
+
+EDRICKS_GEAR = ("Edrick's Sword", "Edrick's Armor")
+SIMULATED_FIGHTS = 20_000
+TIE_DIGITS = 12  # Scores that agree to this many decimal places are ties
+
+
+@dataclass(frozen=True)
+class Loadout:
+    weapon: str
+    armor: str
+    shield: str
+
+    def items(self):
+        return (items[ItemType.WEAPON.value][self.weapon], items[ItemType.ARMOR.value][self.armor],
+                items[ItemType.SHIELD.value][self.shield])
+
+    @property
+    def price(self):
+        """ Gold to buy all three pieces, or None if any of them isn't sold """
+        prices = [item.price for item in self.items()]
+        return None if None in prices else sum(prices)
+
+    def config(self, name="Rollo", level=1, herbs=0):
+        return PlayerConfig(name=name, level=level, weapon=self.weapon, armor=self.armor, shield=self.shield,
+                            herbs=herbs)
+
+
+@dataclass
+class LoadoutConstraints:
+    """ Which loadouts best_loadouts() may pick. allowed is an optional predicate on a Loadout """
+    exclude: tuple = ()
+    budget: Optional[int] = None
+    allowed: Optional[Callable] = None
+
+    def permits(self, loadout):
+        if any(name in self.exclude for name in (loadout.weapon, loadout.armor, loadout.shield)):
+            return False
+        if self.budget is not None and (loadout.price is None or loadout.price > self.budget):
+            return False
+        return self.allowed is None or self.allowed(loadout)
+
+
+@dataclass(frozen=True)
+class LoadoutEffect:
+    """
+    What a loadout changes about a fight against one enemy: the player's normal and excellent hit ranges (crit is
+    None against enemies that block them), the enemy's attack range, and the armor flags (None where the enemy
+    never casts Hurt or breathes fire)
+    """
+    attack: tuple
+    crit: Optional[tuple]
+    enemy_attack: tuple
+    reduce_hurt: Optional[bool]
+    reduce_fire: Optional[bool]
+
+    def dominates(self, other):
+        """ True if this effect is at least as good as other on every roll """
+        return (_at_least(self.attack, other.attack) and (self.crit is None or _at_least(self.crit, other.crit))
+                and _at_least(other.enemy_attack, self.enemy_attack)
+                and (self.reduce_hurt is None or self.reduce_hurt >= other.reduce_hurt)
+                and (self.reduce_fire is None or self.reduce_fire >= other.reduce_fire))
+
+
+def _at_least(high, low):
+    return high[0] >= low[0] and high[1] >= low[1]
+
+
+@dataclass
+class LoadoutClass:
+    """ Loadouts with the same effects against every enemy, cheapest first """
+    effects: tuple
+    loadouts: list = field(default_factory=list)
+
+    @property
+    def representative(self):
+        return self.loadouts[0]
+
+
+@dataclass
+class RankedLoadout:
+    loadout: Loadout
+    score: float  # Win chance weighted over the enemies
+    wins: dict  # Enemy key to win chance
+    equivalent: list  # Other permitted loadouts with the same effects
+
+
+@dataclass
+class LoadoutSearch:
+    """ best_loadouts()'s ranking, with how many loadouts each step left """
+    permitted: int
+    classes: int
+    solved: int
+    ranking: list
+
+    @property
+    def best(self):
+        return self.ranking[0] if self.ranking else None
+
+
+def candidate_loadouts(constraints=None):
+    """ Every weapon, armor and shield combination the constraints permit """
+    constraints = constraints or LoadoutConstraints()
+    return [loadout for loadout in (Loadout(*names) for names in product(
+        items[ItemType.WEAPON.value], items[ItemType.ARMOR.value], items[ItemType.SHIELD.value]))
+            if constraints.permits(loadout)]
+
+
+def loadout_effect(player, enemy, loadout, engine):
+    """ The LoadoutEffect of equipping loadout on player against enemy """
+    weapon, armor, shield = loadout.items()
+    attack = player.strength + weapon.modifier
+    defense = (player.agility + armor.modifier + shield.modifier) // 2
+    if defense > enemy.strength:
+        enemy_attack = engine.weak_damage_range(enemy.strength)
+    else:
+        enemy_attack = engine.normal_damage_range(enemy.strength, defense)
+    actions = {item["id"] for item in enemy.pattern}
+    return LoadoutEffect(
+        attack=engine.player_damage_range(attack, enemy.agility),
+        crit=None if enemy.void_critical_hit else engine.player_crit_range(attack),
+        enemy_attack=enemy_attack,
+        reduce_hurt=armor.reduce_hurt_damage if actions & set(ENEMY_HURT_SPELLS) else None,
+        reduce_fire=armor.reduce_fire_damage if actions & set(ENEMY_FIRE_ACTIONS) else None,
+    )
+
+
+def collapse(loadouts, level, enemy_keys, name="Rollo", constants=None):
+    """ Groups loadouts into LoadoutClasses by their effects against each of enemy_keys """
+    engine = CombatEngine(None, constants or GameConstants())
+    player = PlayerConfig(name=name, level=level).build(engine)
+    enemies = [create_enemy(enemy_key, engine) for enemy_key in enemy_keys]
+    classes = {}
+    for loadout in sorted(loadouts, key=_price_order):
+        effects = tuple(loadout_effect(player, enemy, loadout, engine) for enemy in enemies)
+        classes.setdefault(effects, LoadoutClass(effects)).loadouts.append(loadout)
+    return list(classes.values())
+
+
+def _price_order(loadout):
+    return loadout.price is None, loadout.price or 0
+
+
+def class_dominates(first, second):
+    """ True if LoadoutClass first is at least as good as second against every enemy """
+    return all(mine.dominates(theirs) for mine, theirs in zip(first.effects, second.effects))
+
+
+def prune_dominated(classes):
+    """ The classes no other class dominates against every enemy """
+    return [candidate for candidate in classes
+            if not any(other is not candidate and class_dominates(other, candidate) for other in classes)]
+
+
+def _tie_key(ranked):
+    return -round(ranked.score, TIE_DIGITS), _price_order(ranked.loadout)
+
+
+def best_loadouts(level, enemies, name="Rollo", herbs=0, policy=None, constraints=None, constants=None,
+                  method="exact", fights=SIMULATED_FIGHTS, seed=0):
+    """
+    Ranks the loadouts for a player against enemies, an enemy key or a dict of enemy keys to weights. method is
+    "exact" for analysis.markov or "simulate" for a seeded BattleSimulator run of the given number of fights.
+    Returns a LoadoutSearch, best loadout first; ties go to the cheaper one.
+    """
+    if method not in ("exact", "simulate"):
+        raise ValueError(f"Unknown method: {method}")
+    weights = {enemies: 1} if isinstance(enemies, str) else dict(enemies)
+    if not weights or sum(weights.values()) <= 0:
+        raise ValueError("Give at least one enemy with a positive weight")
+    loadouts = candidate_loadouts(constraints)
+    classes = collapse(loadouts, level, list(weights), name, constants)
+    survivors = prune_dominated(classes)
+
+    def score(loadout_class):
+        loadout = loadout_class.representative
+        config = loadout.config(name, level, herbs)
+        wins = {}
+        for enemy_key in weights:
+            if method == "exact":
+                wins[enemy_key] = solve_fight(config, enemy_key, policy, constants).win
+            else:
+                simulator = BattleSimulator(config, enemy_key, policy, constants, seed=seed)
+                wins[enemy_key] = simulator.run(fights).win_rate
+        total = sum(weights[enemy_key] * win for enemy_key, win in wins.items()) / sum(weights.values())
+        return RankedLoadout(loadout, total, wins, loadout_class.loadouts[1:])
+
+    ranked_survivors = [(loadout_class, score(loadout_class)) for loadout_class in survivors]
+    ranking = sorted((ranked for _, ranked in ranked_survivors), key=_tie_key)
+    solved = len(survivors)
+    if ranking:
+        best = ranking[0]
+        short = [loadout_class for loadout_class, ranked in ranked_survivors if _tie_key(ranked)[0] > _tie_key(best)[0]]
+        cheaper = [loadout_class for loadout_class in classes if loadout_class not in survivors
+                   and _price_order(loadout_class.representative) < _price_order(best.loadout)]
+        for loadout_class in sorted(cheaper, key=lambda candidate: _price_order(candidate.representative),
+                                    reverse=True):
+            if any(class_dominates(other, loadout_class) for other in short):
+                continue
+            ranked = score(loadout_class)
+            solved += 1
+            if _tie_key(ranked)[0] == _tie_key(best)[0]:
+                ranking.append(ranked)
+            else:
+                short.append(loadout_class)
+        ranking.sort(key=_tie_key)
+    return LoadoutSearch(permitted=len(loadouts), classes=len(classes), solved=solved, ranking=ranking)
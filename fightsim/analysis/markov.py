@@ -0,0 +1,420 @@
+"""
+Exact fight outcomes for a fixed player policy.
+
+A fight is a Markov chain over small integer states. This module builds every state reachable from the start of a
+fight, using the exact distributions in analysis.pmf, and solves the chain with sparse linear algebra. The answer is
+the exact chance of winning, losing, fleeing or seeing the enemy flee, plus the expected number of rounds.
+
+The chain has two kinds of transient node. Player nodes are the start of the player's turn, before the sleep check.
+Enemy nodes are the start of the enemy's turn. Keeping them apart means each node only fans out over one action's
+damage range, rather than over the product of the player's and the enemy's.
+
+Nodes are packed into one integer with a mixed-radix StateCodec. Its digit order follows the way fights progress:
+herbs and MP only go down, Stopspell never wears off, and HP mostly falls. Sorting nodes by key therefore gives an
+almost triangular system. A sparse LU in natural order solves it with very little fill-in, even with hundreds of
+thousands of states. Edges are kept in typed arrays rather than lists, and a chain that grows past max_states raises
+ValueError instead of exhausting memory.
+"""
+
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+from scipy.sparse import coo_matrix, identity
+from scipy.sparse.linalg import splu
+
+from ..common.messages import EnemyActions, FightOutcome, PlayerActions
+from ..models.combat_engine import CombatEngine
+from ..models.enemy import create_enemy
+from ..models.game_constants import GameConstants
+from ..models.player import SLEEP_COUNT
+from ..models.spells import SpellType
+from ..sim.policies import AttackPolicy
+from . import pmf
+
+PLAYER_NODE = 0
+ENEMY_NODE = 1
+
+WIN, LOSS, PLAYER_FLED, ENEMY_FLED = range(4)
+
+MAX_STATES = 1_000_000  # About 2 GB for the LU factors
+
+HEAL_SPELLS = (SpellType.HEAL, SpellType.HEALMORE)
+HURT_SPELLS = (SpellType.HURT, SpellType.HURTMORE)
+
+
+@dataclass
+class FightSolution:
+    win: float
+    loss: float
+    player_fled: float
+    enemy_fled: float
+    expected_rounds: float
+    states: int
+
+    def probability(self, outcome):
+        return {
+            FightOutcome.PLAYER_WINS: self.win,
+            FightOutcome.PLAYER_LOSES: self.loss,
+            FightOutcome.PLAYER_FLED: self.player_fled,
+            FightOutcome.ENEMY_FLED: self.enemy_fled,
+        }.get(outcome, 0.0)
+
+
+@dataclass(frozen=True)
+class TransitionTable:
+    """ A damage or healing distribution with float odds and tail sums for quick absorption checks """
+    values: tuple
+    probs: tuple
+    tails: tuple  # tails[k] == sum(probs[k:])
+
+    def split(self, limit):
+        """ Index of the first value >= limit and the odds of reaching it """
+        cut = bisect_left(self.values, limit)
+        return cut, self.tails[cut]
+
+
+@lru_cache(maxsize=None)
+def transition_table(distribution):
+    """ Memoized float TransitionTable for a Pmf """
+    probs = tuple(float(p) for _, p in distribution.items())
+    tails = [0.0] * (len(probs) + 1)
+    for k in range(len(probs) - 1, -1, -1):
+        tails[k] = tails[k + 1] + probs[k]
+    return TransitionTable(values=tuple(distribution), probs=probs, tails=tuple(tails))
+
+
+class StateCodec:
+    """
+    Packs a chain node into a single integer. Digits run from most to least significant:
+    enemy max HP, herbs used, MP spent, player stopped, enemy stopped, player HP lost, enemy HP lost, node kind,
+    player sleep turns done, enemy sleep turns done.
+    """
+
+    def __init__(self, max_hp, max_mp, herbs, enemy_max_hp, enemy_sleep_rounds):
+        self.max_hp, self.max_mp, self.herbs = max_hp, max_mp, herbs
+        self.enemy_max_hp, self.enemy_sleep_rounds = enemy_max_hp, enemy_sleep_rounds
+        radices = (enemy_max_hp + 1, herbs + 1, max_mp + 1, 2, 2, max_hp + 1, enemy_max_hp + 1, 2,
+                   SLEEP_COUNT + 1, enemy_sleep_rounds + 1)
+        strides = []
+        stride = 1
+        for radix in reversed(radices):
+            strides.append(stride)
+            stride *= radix
+        if stride >= 2 ** 63:
+            raise ValueError("Fight state space too large to encode")
+        self.radices = radices
+        (self.emax_stride, self.herb_stride, self.mp_stride, self.pstop_stride, self.estop_stride, self.php_stride,
+         self.ehp_stride, self.kind_stride, self.psleep_stride, self.esleep_stride) = reversed(strides)
+
+    def encode(self, kind, php, pmp, herbs, psleep, pstop, ehp, esleep, estop, emax):
+        digits = (emax, self.herbs - herbs, self.max_mp - pmp, int(pstop), int(estop), self.max_hp - php,
+                  self.enemy_max_hp - ehp, kind, SLEEP_COUNT - psleep, self.enemy_sleep_rounds - esleep)
+        key = 0
+        for digit, radix in zip(digits, self.radices):
+            key = key * radix + digit
+        return key
+
+    def decode(self, key):
+        key, esleep = divmod(key, self.radices[9])
+        key, psleep = divmod(key, self.radices[8])
+        key, kind = divmod(key, 2)
+        key, ehp = divmod(key, self.radices[6])
+        key, php = divmod(key, self.radices[5])
+        key, estop = divmod(key, 2)
+        emax_herbs_mp, pstop = divmod(key, 2)
+        emax_herbs, pmp = divmod(emax_herbs_mp, self.radices[2])
+        emax, herbs = divmod(emax_herbs, self.radices[1])
+        return (kind, self.max_hp - php, self.max_mp - pmp, self.herbs - herbs, SLEEP_COUNT - psleep, bool(pstop),
+                self.enemy_max_hp - ehp, self.enemy_sleep_rounds - esleep, bool(estop), emax)
+
+    def is_player_node(self, keys):
+        """ Vectorized kind check over an array of keys """
+        return (keys // self.kind_stride) % 2 == PLAYER_NODE
+
+
+class FightChain:
+    """
+    Builds and solves the chain for one player configuration, enemy and policy.
+
+    The policy is asked once per reachable player node. Its player and enemy arguments are the chain's own Player and
+    Enemy, with their HP, MP, herbs and status set to the node being expanded, so any PlayerPolicy works unchanged.
+    """
+
+    def __init__(self, player_config, enemy_key, policy=None, constants=None, max_states=MAX_STATES):
+        self.player_config = player_config
+        self.enemy_key = enemy_key
+        self.policy = policy or AttackPolicy()
+        self.constants = constants or GameConstants()
+        combat_engine = CombatEngine(None, self.constants)
+        self.player = player_config.build(combat_engine)
+        self.enemy = create_enemy(enemy_key, combat_engine)
+        self.codec = StateCodec(self.player.max_hp, self.player.max_mp, player_config.herbs, self.enemy.base_hp[1],
+                                self.constants.enemy_sleep_rounds)
+
+        self.max_states = max_states
+        self.rows, self.cols, self.vals = array("q"), array("q"), array("d")
+        self.absorbing = [array("q") for _ in range(4)]  # source keys per outcome
+        self.absorbing_vals = [array("d") for _ in range(4)]
+        self._prepare_tables()
+
+    def _prepare_tables(self):
+        """ Everything about the fight that doesn't depend on the node """
+        player, enemy, constants = self.player, self.enemy, self.constants
+        self.attack = transition_table(pmf.player_attack_pmf(player, enemy, constants))
+        self.enemy_attack = transition_table(pmf.enemy_attack_pmf(enemy.strength, player.defense()))
+        self.flee_chance = float(pmf.player_flee_chance(player.agility, enemy.agility, enemy.run))
+        self.enemy_flee_chance = float(pmf.enemy_flee_chance(enemy.strength, player.strength, constants))
+        self.enemy_wake_chance = float(pmf.enemy_wake_chance(constants))
+        self.stopspell_chance = float(pmf.enemy_stopspell_chance(constants))
+        self.surprise_chance = float(pmf.surprise_chance(player.agility, enemy.agility))
+        self.sleep_resisted = float(pmf.resist_chance(enemy.sleep_resist, constants))
+        self.stopspell_resisted = float(pmf.resist_chance(enemy.stopspell_resist, constants))
+        self.pattern = pmf.pattern_key(enemy.pattern)
+        self.enemy_spell_damage = {}
+        enemy.enemy_spell_stopped = False
+        for action in pmf.ENEMY_DAMAGE_ACTIONS + pmf.ENEMY_FIRE_ACTIONS:
+            self.enemy_spell_damage[action] = transition_table(
+                pmf.enemy_action_damage_pmf(enemy, action, player, constants))
+        self.hurt_tables = {spell: transition_table(pmf.player_hurt_pmf(spell, enemy.hurt_resist, constants))
+                            for spell in HURT_SPELLS}
+        self.player_wake_chances = [float(pmf.player_wake_chance(count)) for count in range(SLEEP_COUNT + 1)]
+        self.choice_odds = {}
+        self.healing_tables = {}
+
+    def enemy_choices(self, heal_triggered, player_asleep, player_stopped):
+        """ Float odds of each enemy action, memoized per fight """
+        key = (heal_triggered, player_asleep, player_stopped)
+        if key not in self.choice_odds:
+            odds = pmf.action_choice_odds(self.pattern, *key)
+            self.choice_odds[key] = [(action, float(chance)) for action, chance in odds.items()]
+        return self.choice_odds[key]
+
+    def healing_table(self, source, room):
+        """ TransitionTable for a herb, player heal spell or enemy heal spell with room HP left to restore """
+        key = (source, room)
+        table = self.healing_tables.get(key)
+        if table is None:
+            if source is PlayerActions.HERB:
+                distribution = pmf.herb_pmf(self.player.max_hp - room, self.player.max_hp, self.constants)
+            elif source in HEAL_SPELLS:
+                distribution = pmf.heal_pmf(source, room, self.constants)
+            else:
+                distribution = pmf.enemy_heal_pmf(source, room, constants=self.constants)
+            table = self.healing_tables[key] = transition_table(distribution)
+        return table
+
+    # Graph construction
+
+    def fan_out(self, source, base, stride, table, weight, limit=None, outcome=None):
+        """
+        Adds an edge from source to base + value * stride for every value in table. Values at or above limit end
+        the fight with the given outcome instead.
+        """
+        values, probs = table.values, table.probs
+        if limit is None:
+            cut = len(values)
+        else:
+            cut, tail = table.split(limit)
+            if tail:
+                self.absorbing[outcome].append(source)
+                self.absorbing_vals[outcome].append(weight * tail)
+        if cut:
+            self.rows.extend([source] * cut)
+            self.cols.extend([base + value * stride for value in values[:cut]])
+            self.vals.extend([weight * p for p in probs[:cut]])
+
+    def edge(self, source, target, probability):
+        if probability:
+            self.rows.append(source)
+            self.cols.append(target)
+            self.vals.append(probability)
+
+    def absorb(self, source, outcome, probability):
+        if probability:
+            self.absorbing[outcome].append(source)
+            self.absorbing_vals[outcome].append(probability)
+
+    def start_state(self, enemy_max_hp):
+        """ Node fields at the start of a fight against an enemy rolled with enemy_max_hp """
+        player = self.player
+        return (player.max_hp, player.max_mp, self.player_config.herbs, 0, False, enemy_max_hp, 0, False,
+                enemy_max_hp)
+
+    def build(self):
+        """ Expands every node reachable from the possible starting states, one BFS wave at a time """
+        encode = self.codec.encode
+        low, high = self.enemy.base_hp
+        starts = []
+        for enemy_max_hp in range(low, high + 1):
+            start = self.start_state(enemy_max_hp)
+            starts.append((encode(PLAYER_NODE, *start), encode(ENEMY_NODE, *start)))
+
+        seen = {key for pair in starts for key in pair}
+        frontier = seen
+        while frontier:
+            wave_start = len(self.cols)
+            for key in frontier:
+                state = self.codec.decode(key)
+                if state[0] == PLAYER_NODE:
+                    self.expand_player_node(key, state[1:])
+                else:
+                    self.expand_enemy_node(key, state[1:])
+            frontier = set(self.cols[wave_start:])
+            frontier.difference_update(seen)
+            seen.update(frontier)
+            if len(seen) > self.max_states:
+                raise ValueError(f"Fight against {self.enemy_key} needs more than {self.max_states} states")
+        self.keys = np.fromiter(sorted(seen), dtype=np.int64, count=len(seen))
+        return starts
+
+    def expand_player_node(self, source, state):
+        php, pmp, herbs, psleep, pstop, ehp, esleep, estop, emax = state
+        if psleep:
+            wake_chance = self.player_wake_chances[psleep]
+            self.edge(source, self.codec.encode(ENEMY_NODE, php, pmp, herbs, psleep - 1, pstop, ehp, esleep, estop,
+                                                emax), 1.0 - wake_chance)
+            self.player_action(source, wake_chance, (php, pmp, herbs, 0, pstop, ehp, esleep, estop, emax))
+        else:
+            self.player_action(source, 1.0, state)
+
+    def choose_action(self, state):
+        php, pmp, herbs, _, pstop, ehp, esleep, estop, emax = state
+        player, enemy = self.player, self.enemy
+        player.current_hp, player.current_mp, player.herb_count = php, pmp, herbs
+        player.is_asleep, player.sleep_count, player.is_spellstopped = False, SLEEP_COUNT, pstop
+        enemy.current_hp, enemy.max_hp, enemy.enemy_sleep_count, enemy.enemy_spell_stopped = ehp, emax, esleep, estop
+        action = self.policy.choose_action(player, enemy)
+        if action is PlayerActions.HERB and herbs < 1:
+            action = PlayerActions.ATTACK
+        return action
+
+    def player_action(self, source, weight, state):
+        self.resolve_action(source, weight, self.choose_action(state), state)
+
+    def resolve_action(self, source, weight, action, state):
+        php, pmp, herbs, psleep, pstop, ehp, esleep, estop, emax = state
+        codec = self.codec
+        unchanged = codec.encode(ENEMY_NODE, *state)
+
+        if action is PlayerActions.ATTACK:
+            self.fan_out(source, unchanged, codec.ehp_stride, self.attack, weight, ehp, WIN)
+        elif action is PlayerActions.HERB:
+            if php >= self.player.max_hp:
+                self.edge(source, unchanged, weight)  # Wasted turn, the herb isn't eaten
+            else:
+                table = self.healing_table(PlayerActions.HERB, self.player.max_hp - php)
+                self.fan_out(source, unchanged + codec.herb_stride, -codec.php_stride, table, weight)
+        elif action is PlayerActions.FLEE:
+            self.absorb(source, PLAYER_FLED, weight * self.flee_chance)
+            self.edge(source, unchanged, weight * (1.0 - self.flee_chance))
+        else:
+            self.cast_spell(source, weight, action, state, unchanged)
+
+    def cast_spell(self, source, weight, spell, state, unchanged):
+        php, pmp, herbs, psleep, pstop, ehp, esleep, estop, emax = state
+        codec = self.codec
+        cost = spell.value.mp_cost
+        if pmp < cost:
+            self.edge(source, unchanged, weight)
+            return
+        spent = unchanged + cost * codec.mp_stride
+        if pstop:
+            self.edge(source, spent, weight)
+            return
+
+        if spell in HEAL_SPELLS:
+            table = self.healing_table(spell, self.player.max_hp - php)
+            self.fan_out(source, spent, -codec.php_stride, table, weight)
+        elif spell in HURT_SPELLS:
+            self.fan_out(source, spent, codec.ehp_stride, self.hurt_tables[spell], weight, ehp, WIN)
+        elif spell is SpellType.SLEEP and esleep == 0:
+            self.edge(source, spent, weight * self.sleep_resisted)
+            asleep = spent - self.constants.enemy_sleep_rounds * codec.esleep_stride
+            self.edge(source, asleep, weight * (1.0 - self.sleep_resisted))
+        elif spell is SpellType.STOPSPELL and not estop:
+            self.edge(source, spent, weight * self.stopspell_resisted)
+            self.edge(source, spent + codec.estop_stride, weight * (1.0 - self.stopspell_resisted))
+        else:
+            self.edge(source, spent, weight)
+
+    def expand_enemy_node(self, source, state):
+        php, pmp, herbs, psleep, pstop, ehp, esleep, estop, emax = state
+        if esleep > 0:
+            if esleep == 2:
+                self.edge(source, self.codec.encode(PLAYER_NODE, php, pmp, herbs, psleep, pstop, ehp, 1, estop, emax),
+                          1.0)
+                return
+            self.edge(source, self.codec.encode(PLAYER_NODE, *state), 1.0 - self.enemy_wake_chance)
+            self.enemy_action(source, self.enemy_wake_chance, (php, pmp, herbs, psleep, pstop, ehp, 0, estop, emax))
+        else:
+            self.enemy_action(source, 1.0, state)
+
+    def enemy_action(self, source, weight, state):
+        php, pmp, herbs, psleep, pstop, ehp, esleep, estop, emax = state
+        codec = self.codec
+        self.absorb(source, ENEMY_FLED, weight * self.enemy_flee_chance)
+        weight *= 1.0 - self.enemy_flee_chance
+        if not weight:
+            return
+
+        unchanged = codec.encode(PLAYER_NODE, *state)
+        for action, chance in self.enemy_choices(ehp / emax < 0.25, psleep > 0, pstop):
+            chance *= weight
+            if action is EnemyActions.ATTACK:
+                self.fan_out(source, unchanged, codec.php_stride, self.enemy_attack, chance, php, LOSS)
+            elif action in pmf.ENEMY_FIRE_ACTIONS:
+                self.fan_out(source, unchanged, codec.php_stride, self.enemy_spell_damage[action], chance, php, LOSS)
+            elif estop:
+                self.edge(source, unchanged, chance)  # Every other action is a spell, and the enemy's magic is sealed
+            elif action in pmf.ENEMY_DAMAGE_ACTIONS:
+                self.fan_out(source, unchanged, codec.php_stride, self.enemy_spell_damage[action], chance, php, LOSS)
+            elif action in pmf.ENEMY_HEAL_ACTIONS:
+                table = self.healing_table(action, emax - ehp)
+                self.fan_out(source, unchanged, -codec.ehp_stride, table, chance)
+            elif action is EnemyActions.SLEEP:
+                self.edge(source, unchanged - SLEEP_COUNT * codec.psleep_stride, chance)
+            elif action is EnemyActions.STOPSPELL:
+                self.edge(source, unchanged + codec.pstop_stride, chance * self.stopspell_chance)
+                self.edge(source, unchanged, chance * (1.0 - self.stopspell_chance))
+
+    # Solving
+
+    def start_distribution(self, starts):
+        """ Chance of each node being the first of the fight. Enemy max HP is uniform, and surprise skips a turn """
+        initial = np.zeros(len(self.keys))
+        start_weight = 1.0 / len(starts)
+        for player_first, enemy_first in starts:
+            initial[np.searchsorted(self.keys, player_first)] += start_weight * (1.0 - self.surprise_chance)
+            initial[np.searchsorted(self.keys, enemy_first)] += start_weight * self.surprise_chance
+        return initial
+
+    def solve(self):
+        """ Builds the chain and returns the exact FightSolution """
+        starts = self.build()
+        keys = self.keys
+        size = len(keys)
+        rows = np.searchsorted(keys, np.frombuffer(self.rows, dtype=np.int64))
+        cols = np.searchsorted(keys, np.frombuffer(self.cols, dtype=np.int64))
+        transient = coo_matrix((np.frombuffer(self.vals), (cols, rows)), shape=(size, size)).tocsc()
+
+        initial = self.start_distribution(starts)
+        # Expected visits to each node: (I - Q)^T x = initial distribution. Keys are sorted in fight order, so the
+        # natural ordering keeps the factors close to triangular.
+        system = (identity(size, format="csc") - transient).tocsc()
+        visits = splu(system, permc_spec="NATURAL", diag_pivot_thresh=0.0).solve(initial)
+
+        outcomes = []
+        for sources, vals in zip(self.absorbing, self.absorbing_vals):
+            indices = np.searchsorted(keys, np.frombuffer(sources, dtype=np.int64))
+            outcomes.append(float(np.dot(visits[indices], np.frombuffer(vals))) if len(sources) else 0.0)
+        rounds = visits[self.codec.is_player_node(keys)].sum() + self.surprise_chance
+        return FightSolution(win=outcomes[WIN], loss=outcomes[LOSS], player_fled=outcomes[PLAYER_FLED],
+                             enemy_fled=outcomes[ENEMY_FLED], expected_rounds=float(rounds), states=size)
+
+
+def solve_fight(player_config, enemy_key, policy=None, constants=None, max_states=MAX_STATES):
+    """ Exact outcome probabilities and expected rounds for one matchup under a fixed policy """
+    return FightChain(player_config, enemy_key, policy, constants, max_states).solve()
@@ -0,0 +1,117 @@
+"""
+Best-name search over every four-letter name prefix.
+
+Player stats only depend on the sum of the letter values of the first four letters of the name. The 52 letters of
+the cluster alphabet give 52**4 (about 7.3 million) prefixes but only 61 distinct sums. prefix_sums() computes the
+sum of every prefix in one broadcast. Objectives are then scored once per sum, using a representative name, and
+spread back over all prefixes by indexing.
+
+Objectives take a list of representative names and return one score per name, higher being better.
+stat_objective() scores a stat at one level. win_rate_objective() scores the chance of beating an enemy, either
+exactly with analysis.markov or by simulation. Names with identical stats are only solved once.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from ..models.player_leveling import LETTER_CLUSTERS, LETTER_VALUES, NAME_LETTERS, _Levelling
+from ..sim.simulator import BattleSimulator, PlayerConfig
+from .markov import solve_fight
+
+LETTERS = "".join(LETTER_CLUSTERS)
+STATS = ("strength", "agility", "max_hp", "max_mp")
+SIMULATED_FIGHTS = 20_000
+
+
+@dataclass
+class RankedName:
+    name: str
+    name_sum: int
+    score: float
+
+
+def prefix_sums():
+    """ Name sum of every prefix, indexed like prefix_name(). An int8 array of len(LETTERS) ** 4 entries """
+    values = np.array([LETTER_VALUES[letter] for letter in LETTERS], dtype=np.int8)
+    total = np.zeros((1,) * NAME_LETTERS, dtype=np.int8)
+    for axis in range(NAME_LETTERS):
+        shape = [1] * NAME_LETTERS
+        shape[axis] = len(LETTERS)
+        total = total + values.reshape(shape)
+    return total.ravel()
+
+
+def prefix_name(index):
+    """ The prefix at index in prefix_sums() """
+    letters = []
+    for _ in range(NAME_LETTERS):
+        index, digit = divmod(int(index), len(LETTERS))
+        letters.append(LETTERS[digit])
+    return "".join(reversed(letters))
+
+
+def representatives(sums):
+    """ The first prefix with each name sum, as a dict of name sum to name """
+    present, first = np.unique(sums, return_index=True)
+    return {int(total): prefix_name(index) for total, index in zip(present, first)}
+
+
+def stat_objective(stat, level):
+    """ Scores names by one of STATS at the given level """
+    column = STATS.index(stat)
+
+    def score(names):
+        return _Levelling().stat_grid([level], names)[0, :, column].astype(float)
+    return score
+
+
+def win_rate_objective(enemy_key, level, weapon="Unarmed", armor="Naked", shield="No Shield", herbs=0,
+                       policy=None, method="exact", fights=SIMULATED_FIGHTS, seed=0):
+    """
+    Scores names by the chance of beating enemy_key at the given level and equipment. method is "exact" for
+    analysis.markov or "simulate" for a seeded BattleSimulator run of the given number of fights.
+    """
+    if method not in ("exact", "simulate"):
+        raise ValueError(f"Unknown method: {method}")
+
+    def win_rate(name):
+        config = PlayerConfig(name=name, level=level, weapon=weapon, armor=armor, shield=shield, herbs=herbs)
+        if method == "exact":
+            return solve_fight(config, enemy_key, policy).win
+        return BattleSimulator(config, enemy_key, policy, seed=seed).run(fights).win_rate
+
+    def score(names):
+        stats = _Levelling().stat_grid([level], names)[0]
+        solved = {}
+        scores = np.empty(len(names))
+        for row, name in enumerate(names):
+            key = tuple(stats[row].tolist())
+            if key not in solved:
+                solved[key] = win_rate(name)
+            scores[row] = solved[key]
+        return scores
+    return score
+
+
+def score_prefixes(objective, sums=None):
+    """ Score of every prefix under objective, as a float array indexed like prefix_sums() """
+    sums = prefix_sums() if sums is None else sums
+    names = representatives(sums)
+    class_scores = np.full(int(sums.max()) + 1, np.nan)
+    class_scores[list(names)] = objective(list(names.values()))
+    return class_scores[sums]
+
+
+def rank_names(objective, top=10):
+    """ The top prefixes under objective, best first. Ties keep prefix order """
+    sums = prefix_sums()
+    names = representatives(sums)
+    class_scores = dict(zip(names, objective(list(names.values()))))
+    ranked = []
+    for total in sorted(class_scores, key=lambda total: -class_scores[total]):
+        for index in np.flatnonzero(sums == total)[:top - len(ranked)]:
+            ranked.append(RankedName(name=prefix_name(index), name_sum=total, score=float(class_scores[total])))
+        if len(ranked) >= top:
+            break
+    return ranked
@@ -0,0 +1,348 @@
+"""
+Exact outcome distributions for every combat action.
+
+Every roll in CombatEngine is a uniform randint over a known range, gated by fixed odds (crits 1/crit_chance, dodges
+dodge/64, resists n/16, enemy stopspell 1/2). This module turns those rules into exact probability mass functions with
+Fraction probabilities, so expected damage, variance and kill chances can be read off without sampling.
+
+The public helpers accept the same objects the engine works with (Player, Enemy, SpellType, EnemyActions). They reduce
+them to plain integers and call memoized builders, so repeated queries for the same numbers are free.
+"""
+
+from fractions import Fraction
+from functools import lru_cache
+
+from ..common.messages import EnemyActions
+from ..models.game_constants import GameConstants
+
+_DEFAULT_CONSTANTS = GameConstants()
+ZERO = Fraction(0)
+ONE = Fraction(1)
+
+ENEMY_DAMAGE_ACTIONS = (EnemyActions.HURT, EnemyActions.HURTMORE)
+ENEMY_FIRE_ACTIONS = (EnemyActions.FIRE, EnemyActions.STRONGFIRE)
+ENEMY_HEAL_ACTIONS = (EnemyActions.HEAL, EnemyActions.HEALMORE)
+ENEMY_RUN_MODIFIERS = (Fraction(1, 4), Fraction(3, 8), Fraction(3, 4), Fraction(1))
+
+
+class Pmf:
+    """
+    Exact probability mass function over integers. Values with zero probability are dropped. Instances are treated
+    as immutable and shared by the caches, so never change _probs after construction.
+    """
+    __slots__ = ("_probs",)
+
+    def __init__(self, probs):
+        self._probs = {value: Fraction(p) for value, p in sorted(probs.items()) if p}
+
+    @classmethod
+    def point(cls, value):
+        return cls({value: ONE})
+
+    @classmethod
+    def uniform(cls, low, high):
+        """ Distribution of randint(low, high) """
+        if high < low:
+            raise ValueError(f"Empty range ({low}, {high})")
+        p = Fraction(1, high - low + 1)
+        return cls({value: p for value in range(low, high + 1)})
+
+    @classmethod
+    def mixture(cls, weighted):
+        """ Combines (weight, Pmf) pairs into one distribution """
+        probs = {}
+        for weight, pmf in weighted:
+            if not weight:
+                continue
+            for value, p in pmf.items():
+                probs[value] = probs.get(value, ZERO) + weight * p
+        return cls(probs)
+
+    def __getitem__(self, value):
+        return self._probs.get(value, ZERO)
+
+    def __len__(self):
+        return len(self._probs)
+
+    def __iter__(self):
+        return iter(self._probs)
+
+    def __eq__(self, other):
+        return isinstance(other, Pmf) and self._probs == other._probs
+
+    def __hash__(self):
+        return hash(tuple(self._probs.items()))
+
+    def __repr__(self):
+        return f"Pmf({ {value: str(p) for value, p in self._probs.items()} })"
+
+    def items(self):
+        return self._probs.items()
+
+    def support(self):
+        return list(self._probs)
+
+    def total(self):
+        return sum(self._probs.values(), ZERO)
+
+    def mean(self):
+        return sum((value * p for value, p in self._probs.items()), ZERO)
+
+    def variance(self):
+        mean = self.mean()
+        return sum(((value - mean) ** 2 * p for value, p in self._probs.items()), ZERO)
+
+    def prob_at_least(self, threshold):
+        """ P(X >= threshold), e.g. the chance one hit deals at least the enemy's remaining HP """
+        return sum((p for value, p in self._probs.items() if value >= threshold), ZERO)
+
+    def prob_at_most(self, threshold):
+        return sum((p for value, p in self._probs.items() if value <= threshold), ZERO)
+
+    def map(self, function):
+        """ Distribution of function(X) """
+        probs = {}
+        for value, p in self._probs.items():
+            new_value = function(value)
+            probs[new_value] = probs.get(new_value, ZERO) + p
+        return Pmf(probs)
+
+    def convolve(self, other):
+        """ Distribution of X + Y for independent X (self) and Y (other) """
+        probs = {}
+        for value, p in self._probs.items():
+            for other_value, q in other.items():
+                total = value + other_value
+                probs[total] = probs.get(total, ZERO) + p * q
+        return Pmf(probs)
+
+
+def _constants(constants):
+    return constants or _DEFAULT_CONSTANTS
+
+
+def _at_most_chance(chance, limit):
+    """ P(randint(1, limit) <= chance) """
+    return Fraction(min(max(chance, 0), limit), limit)
+
+
+# Player attacks
+
+@lru_cache(maxsize=None)
+def _player_attack_parts(player_attack, enemy_agility, dodge_chance, blocks_crits, crit_chance, dodge_limit):
+    base = player_attack - enemy_agility // 2
+    normal = Pmf.uniform(max(base // 4, 0), max(base // 2, 1))
+    critical = Pmf.uniform(max(player_attack // 2, 0), max(player_attack, 1))
+    crit = ZERO if blocks_crits else Fraction(1, crit_chance)
+    dodge = _at_most_chance(dodge_chance, dodge_limit)
+    return crit, dodge, normal, critical
+
+
+@lru_cache(maxsize=None)
+def _player_attack_pmf(player_attack, enemy_agility, dodge_chance, blocks_crits, crit_chance, dodge_limit):
+    crit, dodge, normal, critical = _player_attack_parts(player_attack, enemy_agility, dodge_chance, blocks_crits,
+                                                         crit_chance, dodge_limit)
+    # A crit lands even through a dodge. A dodged normal attack deals nothing.
+    return Pmf.mixture([
+        (crit, critical),
+        ((1 - crit) * (1 - dodge), normal),
+        ((1 - crit) * dodge, Pmf.point(0)),
+    ])
+
+
+def player_attack_breakdown(player, enemy, constants=None):
+    """
+    Returns (crit_chance, miss_chance, normal_damage, crit_damage): the odds of an excellent hit, the odds the enemy
+    dodges a normal hit, and the damage Pmfs of the two ranges.
+    """
+    constants = _constants(constants)
+    crit, dodge, normal, critical = _player_attack_parts(
+        player.strength + player.weapon.modifier, enemy.agility, enemy.dodge, bool(enemy.void_critical_hit),
+        constants.crit_chance, constants.enemy_dodge_limit)
+    return crit, (1 - crit) * dodge, normal, critical
+
+
+def player_attack_pmf(player, enemy, constants=None):
+    """ Damage dealt by one player attack, with dodged attacks counted as 0 """
+    constants = _constants(constants)
+    return _player_attack_pmf(player.strength + player.weapon.modifier, enemy.agility, enemy.dodge,
+                              bool(enemy.void_critical_hit), constants.crit_chance, constants.enemy_dodge_limit)
+
+
+# Player magic and herbs
+
+@lru_cache(maxsize=None)
+def _capped_uniform(low, high, cap):
+    """ Distribution of min(cap, randint(low, high)) """
+    return Pmf.uniform(low, high).map(lambda value: min(value, cap))
+
+
+@lru_cache(maxsize=None)
+def _resisted_uniform(low, high, resist, resist_limit):
+    """ randint(low, high), or 0 when the target resists """
+    resisted = _at_most_chance(resist, resist_limit)
+    return Pmf.mixture([(1 - resisted, Pmf.uniform(low, high)), (resisted, Pmf.point(0))])
+
+
+def heal_pmf(spell, heal_max, constants=None):
+    """ HP restored by Heal or Healmore when the player is heal_max below their maximum """
+    low, high = _constants(constants).heal_ranges[spell]
+    return _capped_uniform(low, high, heal_max)
+
+
+def player_hurt_pmf(spell, enemy_hurt_resist, constants=None):
+    """ Damage dealt by Hurt or Hurtmore, with resisted casts counted as 0 """
+    constants = _constants(constants)
+    low, high = constants.hurt_ranges[spell]
+    return _resisted_uniform(low, high, enemy_hurt_resist, constants.enemy_resist_limit)
+
+
+def resist_chance(resist, constants=None):
+    """ Chance an enemy with this resist value shrugs off Hurt, Sleep or Stopspell """
+    return _at_most_chance(resist, _constants(constants).enemy_resist_limit)
+
+
+def herb_pmf(current_hp, max_hp, constants=None):
+    """ HP restored by eating a herb """
+    if current_hp >= max_hp:
+        return Pmf.point(0)
+    low, high = _constants(constants).herb_range
+    return _capped_uniform(low, high, max_hp - current_hp)
+
+
+# Enemy actions
+
+@lru_cache(maxsize=None)
+def _enemy_attack_pmf(enemy_strength, player_defense):
+    if player_defense > enemy_strength:
+        return Pmf.uniform(0, (enemy_strength + 4) // 6)
+    base = enemy_strength - player_defense // 2
+    return Pmf.uniform(base // 4, base // 2)
+
+
+@lru_cache(maxsize=None)
+def _range_pmf(low, high):
+    return Pmf.uniform(low, high)
+
+
+def enemy_attack_pmf(enemy_strength, player_defense):
+    """ Damage of a basic enemy attack, using the weak range when the player's defense beats the enemy's strength """
+    return _enemy_attack_pmf(enemy_strength, player_defense)
+
+
+def enemy_action_damage_pmf(enemy, action, player, constants=None):
+    """
+    Damage the player takes from one enemy action. Spells fizzle to 0 when the enemy is spellstopped; fire breath
+    ignores Stopspell. Actions that don't deal damage return a point mass at 0.
+    """
+    constants = _constants(constants)
+    if action is EnemyActions.ATTACK:
+        return _enemy_attack_pmf(enemy.strength, player.defense())
+    if action in ENEMY_DAMAGE_ACTIONS:
+        if enemy.enemy_spell_stopped:
+            return Pmf.point(0)
+        hurt_high, hurt_low = constants.enemy_hurt_ranges[action]
+        return _range_pmf(*(hurt_low if player.armor.reduce_hurt_damage else hurt_high))
+    if action in ENEMY_FIRE_ACTIONS:
+        fire_high, fire_low = constants.enemy_breathes_fire_ranges[action]
+        return _range_pmf(*(fire_low if player.armor.reduce_fire_damage else fire_high))
+    return Pmf.point(0)
+
+
+def enemy_heal_pmf(action, heal_max, is_stopped=False, constants=None):
+    """ HP an enemy restores with Heal or Healmore when heal_max below its maximum """
+    if is_stopped:
+        return Pmf.point(0)
+    low, high = _constants(constants).enemy_heal_ranges[action]
+    return _capped_uniform(low, high, heal_max)
+
+
+@lru_cache(maxsize=None)
+def action_choice_odds(pattern, heal_triggered, player_asleep, player_stopped):
+    choices = {}
+    remaining = ONE  # probability no earlier pattern entry was chosen
+    for action, weight in pattern:
+        picked = remaining * Fraction(min(max(weight, 0), 100), 100)
+        allowed = (
+            action in (EnemyActions.ATTACK, EnemyActions.HURT, EnemyActions.FIRE, EnemyActions.HURTMORE,
+                       EnemyActions.STRONGFIRE)
+            or (action in ENEMY_HEAL_ACTIONS and heal_triggered)
+            or (action is EnemyActions.SLEEP and not player_asleep)
+            or (action is EnemyActions.STOPSPELL and not player_stopped)
+        )
+        if allowed:
+            choices[action] = choices.get(action, ZERO) + picked
+            remaining -= picked
+    if remaining:
+        choices[EnemyActions.ATTACK] = choices.get(EnemyActions.ATTACK, ZERO) + remaining
+    return choices
+
+
+def pattern_key(pattern):
+    """ Hashable form of an enemy's pattern list """
+    return tuple((item["id"], item["weight"]) for item in pattern)
+
+
+def enemy_action_choice_pmf(enemy, player):
+    """
+    Odds of each action Enemy.choose_enemy_action picks in the current state, as a dict of EnemyActions to Fraction.
+    A pattern entry that rolls its weight but isn't allowed (healing above 25% HP, Sleep on a sleeping player, Stopspell
+    on a stopped player) falls through to the next entry, and ATTACK is the fallback.
+    """
+    heal_triggered = enemy.current_hp / enemy.max_hp < 0.25
+    return dict(action_choice_odds(pattern_key(enemy.pattern), heal_triggered, bool(player.is_asleep),
+                                     bool(player.is_spellstopped)))
+
+
+# Rolls that decide turn order and status changes
+
+@lru_cache(maxsize=None)
+def _agility_contest(player_agility, enemy_agility, factor_numerator, factor_denominator, low, high):
+    """ P(player_agility * randint(low, high) > enemy_agility * randint(low, high) * factor) """
+    rolls = high - low + 1
+    enemy_scale = enemy_agility * factor_numerator
+    wins = 0
+    for player_roll in range(low, high + 1):
+        player_value = player_agility * player_roll * factor_denominator
+        if enemy_scale == 0:
+            wins += rolls if player_value > 0 else 0
+            continue
+        # Enemy rolls strictly below player_value / enemy_scale lose the contest
+        highest_losing_roll = -(-player_value // enemy_scale) - 1
+        wins += min(max(highest_losing_roll - low + 1, 0), rolls)
+    return Fraction(wins, rolls * rolls)
+
+
+def player_flee_chance(player_agility, enemy_agility, run):
+    """ Chance Player.is_flee_successful succeeds """
+    modifier = ENEMY_RUN_MODIFIERS[run]
+    return _agility_contest(player_agility, enemy_agility, modifier.numerator, modifier.denominator, 0, 254)
+
+
+def surprise_chance(player_agility, enemy_agility):
+    """ Chance the enemy acts first: player_agility * randint(1, 255) < enemy_agility * randint(1, 255) / 4 """
+    return _agility_contest(enemy_agility, 4 * player_agility, 1, 1, 1, 255)
+
+
+def enemy_flee_chance(enemy_strength, player_strength, constants=None):
+    """ Chance the enemy runs at the start of its turn """
+    if player_strength > enemy_strength * 2:
+        return Fraction(1, _constants(constants).enemy_flee_limit)
+    return ZERO
+
+
+def enemy_wake_chance(constants=None):
+    """ Chance a sleeping enemy wakes up on one of its later sleeping turns """
+    return Fraction(1, _constants(constants).enemy_wakeup_limit)
+
+
+def enemy_stopspell_chance(constants=None):
+    """ Chance an enemy's Stopspell seals the player's magic """
+    return Fraction(1, _constants(constants).enemy_spellstop_limit)
+
+
+def player_wake_chance(sleep_count):
+    """ Chance a sleeping player wakes on a turn that starts with sleep_count turns left before the forced wake up """
+    if sleep_count - 1 <= 0:
+        return ONE
+    return Fraction(1, 2)
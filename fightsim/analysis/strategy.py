@@ -0,0 +1,255 @@
+"""
+Win-maximizing player strategy for one matchup.
+
+StrategyChain walks the same states as markov.FightChain, but every player turn offers every useful action rather
+than the one a scripted policy picks. That makes the fight a Markov decision process. Policy iteration solves it:
+evaluate the current policy exactly with the sparse LU from markov, switch each state to its best action, and repeat
+until nothing changes.
+
+The result is a StrategyTable. It holds the sorted StateCodec keys of every decision state and the best action for
+each as a uint8 code into ACTIONS. Tables are cached on disk as .npz files, keyed by player config, enemy and
+constants, so each matchup is only solved once.
+"""
+
+import hashlib
+import os
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.sparse import csr_matrix, identity
+from scipy.sparse.linalg import splu
+
+from ..common.messages import PlayerActions
+from ..models.game_constants import GameConstants
+from ..models.spells import SpellType
+from ..sim.fight_log import code_version
+from ..sim.policies import AttackPolicy, PlayerPolicy
+from . import pmf
+from .markov import FightChain, StateCodec, ENEMY_NODE, PLAYER_NODE, WIN, HEAL_SPELLS
+
+ACTIONS = (PlayerActions.ATTACK, PlayerActions.HERB, PlayerActions.FLEE) + tuple(SpellType)
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+NO_ACTION = 255  # Sleep checks and enemy turns, where the player has no choice
+
+STRATEGY_FORMAT = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "fightsim", "strategies")
+MAX_STATES = 3_000_000
+MAX_POLICY_ITERATIONS = 100
+TOLERANCE = 1e-12
+
+
+class StrategyChain(FightChain):
+    """ A FightChain whose player turns branch on every useful action instead of asking a policy """
+
+    def __init__(self, player_config, enemy_key, constants=None, actions=ACTIONS, max_states=MAX_STATES):
+        super().__init__(player_config, enemy_key, AttackPolicy(), constants, max_states)
+        self.allowed = set(actions) | {PlayerActions.ATTACK}
+        self.spells = [spell for spell in self.player.player_magic
+                       if isinstance(spell, SpellType) and spell in self.allowed]
+        # Max HP only steers enemy healing. For enemies that never heal, every roll shares one set of states.
+        self.enemy_heals = any(action in pmf.ENEMY_HEAL_ACTIONS for action, _ in self.pattern)
+        self.pair_nodes = []  # Each row of the graph is a (node, action) pair
+        self.pair_actions = []
+
+    def add_pair(self, key, action_code):
+        if len(self.pair_nodes) >= self.max_states:
+            raise ValueError(f"Strategy for {self.enemy_key} needs more than {self.max_states} states; narrow the "
+                             f"action menu with actions=... (solve --actions on the command line)")
+        self.pair_nodes.append(key)
+        self.pair_actions.append(action_code)
+        return len(self.pair_nodes) - 1
+
+    def start_state(self, enemy_max_hp):
+        state = super().start_state(enemy_max_hp)
+        return state if self.enemy_heals else state[:-1] + (self.codec.enemy_max_hp,)
+
+    def useful_actions(self, state):
+        """
+        Actions worth considering. Spells and herbs that can only be wasted, like healing at full HP or casting
+        while spellstopped, are left out, as they are never better than keeping the MP or herb.
+        """
+        php, pmp, herbs, psleep, pstop, ehp, esleep, estop, emax = state
+        actions = [PlayerActions.ATTACK]
+        if PlayerActions.FLEE in self.allowed:
+            actions.append(PlayerActions.FLEE)
+        at_max_hp = php >= self.player.max_hp
+        if herbs and not at_max_hp and PlayerActions.HERB in self.allowed:
+            actions.append(PlayerActions.HERB)
+        if pstop:
+            return actions
+        for spell in self.spells:
+            if pmp < spell.value.mp_cost:
+                continue
+            if spell in HEAL_SPELLS and at_max_hp:
+                continue
+            if (spell is SpellType.SLEEP and esleep) or (spell is SpellType.STOPSPELL and estop):
+                continue
+            actions.append(spell)
+        return actions
+
+    def expand_player_node(self, source, state):
+        php, pmp, herbs, psleep, pstop, ehp, esleep, estop, emax = state
+        if psleep:
+            pair = self.add_pair(source, NO_ACTION)
+            wake_chance = self.player_wake_chances[psleep]
+            self.edge(pair, self.codec.encode(ENEMY_NODE, php, pmp, herbs, psleep - 1, pstop, ehp, esleep, estop,
+                                              emax), 1.0 - wake_chance)
+            self.edge(pair, self.codec.encode(PLAYER_NODE, php, pmp, herbs, 0, pstop, ehp, esleep, estop, emax),
+                      wake_chance)
+            return
+        for action in self.useful_actions(state):
+            self.resolve_action(self.add_pair(source, ACTION_CODES[action]), 1.0, action, state)
+
+    def expand_enemy_node(self, source, state):
+        super().expand_enemy_node(self.add_pair(source, NO_ACTION), state)
+
+    def solve(self):
+        """ Builds the decision graph and returns the optimal StrategyTable """
+        starts = self.build()
+        keys = self.keys
+        size, pair_count = len(keys), len(self.pair_nodes)
+
+        # Sort rows by node, so each node's actions form one contiguous segment
+        pair_nodes = np.searchsorted(keys, np.array(self.pair_nodes, dtype=np.int64))
+        order = np.argsort(pair_nodes, kind="stable")
+        row_of_pair = np.empty(pair_count, dtype=np.int64)
+        row_of_pair[order] = np.arange(pair_count)
+        rows = row_of_pair[np.frombuffer(self.rows, dtype=np.int64)]
+        cols = np.searchsorted(keys, np.frombuffer(self.cols, dtype=np.int64))
+        transitions = csr_matrix((np.frombuffer(self.vals), (rows, cols)), shape=(pair_count, size))
+        win_sources = np.frombuffer(self.absorbing[WIN], dtype=np.int64)
+        rewards = np.bincount(row_of_pair[win_sources], weights=np.frombuffer(self.absorbing_vals[WIN]),
+                              minlength=pair_count)
+        actions = np.array(self.pair_actions, dtype=np.uint8)[order]
+        segments = np.flatnonzero(np.r_[True, np.diff(pair_nodes[order]) != 0])
+        segment_lengths = np.diff(np.r_[segments, pair_count])
+
+        choice = segments.copy()  # Attack is always listed first
+        for _ in range(MAX_POLICY_ITERATIONS):
+            system = (identity(size, format="csr") - transitions[choice]).tocsc()
+            values = splu(system, permc_spec="NATURAL", diag_pivot_thresh=0.0).solve(rewards[choice])
+            action_values = rewards + transitions @ values
+            best = np.maximum.reduceat(action_values, segments)
+            keep = action_values[choice] >= best - TOLERANCE
+            if keep.all():
+                break
+            candidates = np.flatnonzero(action_values >= np.repeat(best, segment_lengths) - TOLERANCE)
+            choice = np.where(keep, choice, candidates[np.searchsorted(candidates, segments)])
+
+        chosen = actions[choice]
+        decisions = chosen != NO_ACTION
+        return StrategyTable(
+            codec_args=(self.codec.max_hp, self.codec.max_mp, self.codec.herbs, self.codec.enemy_max_hp,
+                        self.codec.enemy_sleep_rounds),
+            enemy_heals=self.enemy_heals, keys=keys[decisions], actions=chosen[decisions], values=values[decisions],
+            win=float(self.start_distribution(starts) @ values))
+
+
+@dataclass
+class StrategyTable:
+    """
+    Best action for every decision state of a matchup. values holds the win chance from each state when playing
+    optimally, and win the chance from the start of the fight.
+    """
+    codec_args: tuple
+    enemy_heals: bool
+    keys: np.ndarray
+    actions: np.ndarray
+    values: np.ndarray
+    win: float
+
+    def __post_init__(self):
+        self.codec = StateCodec(*self.codec_args)
+
+    def lookup(self, player, enemy):
+        """ Index of the state player and enemy are in, or None if the table doesn't cover it """
+        state = (PLAYER_NODE, player.current_hp, player.current_mp, player.herb_count, 0,
+                 bool(player.is_spellstopped), enemy.current_hp, enemy.enemy_sleep_count,
+                 bool(enemy.enemy_spell_stopped), enemy.max_hp if self.enemy_heals else self.codec.enemy_max_hp)
+        key = self.codec.encode(*state)
+        index = int(np.searchsorted(self.keys, key))
+        if index < len(self.keys) and self.keys[index] == key and self.codec.decode(key) == state:
+            return index
+        return None
+
+    def best_action(self, player, enemy):
+        index = self.lookup(player, enemy)
+        return None if index is None else ACTIONS[self.actions[index]]
+
+    def win_chance(self, player, enemy):
+        index = self.lookup(player, enemy)
+        return None if index is None else float(self.values[index])
+
+    def save(self, path):
+        np.savez_compressed(path, format=STRATEGY_FORMAT, codec_args=np.array(self.codec_args),
+                            enemy_heals=self.enemy_heals, keys=self.keys,
+                            actions=self.actions, values=self.values, win=self.win)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data["format"]) != STRATEGY_FORMAT:
+                raise ValueError(f"Unsupported strategy table format in {path}")
+            return cls(codec_args=tuple(int(arg) for arg in data["codec_args"]),
+                       enemy_heals=bool(data["enemy_heals"]), keys=data["keys"],
+                       actions=data["actions"], values=data["values"], win=float(data["win"]))
+
+
+class StrategyPolicy(PlayerPolicy):
+    """ Plays a solved StrategyTable, falling back to another policy in states the table doesn't cover """
+
+    def __init__(self, table, fallback=None):
+        self.table = table
+        self.fallback = fallback or AttackPolicy()
+
+    def choose_action(self, player, enemy):
+        action = self.table.best_action(player, enemy)
+        return action if action is not None else self.fallback.choose_action(player, enemy)
+
+    def __repr__(self):
+        return f"StrategyPolicy(win={self.table.win:.4f}, fallback={self.fallback!r})"
+
+
+def parse_actions(text):
+    """ The actions in a comma-separated list of names such as "attack,herb,heal". Attack is always included """
+    by_name = {action.name.lower(): action for action in ACTIONS}
+    actions = [PlayerActions.ATTACK]
+    for name in filter(None, (name.strip().lower() for name in text.split(","))):
+        if name not in by_name:
+            raise ValueError(f"Unknown action: {name}. Choose from {', '.join(by_name)}")
+        if by_name[name] not in actions:
+            actions.append(by_name[name])
+    return tuple(actions)
+
+
+def strategy_cache_path(player_config, enemy_key, constants=None, actions=ACTIONS, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Cache file for a matchup. The name hashes everything that changes the answer, the code version of the rules
+    included, so tables solved before a rules change are never served again
+    """
+    menu = sorted(ACTION_CODES[action] for action in actions)
+    identity_text = (f"{STRATEGY_FORMAT}|{code_version()}|{player_config!r}|{enemy_key}|"
+                     f"{constants or GameConstants()!r}|{menu}")
+    digest = hashlib.sha256(identity_text.encode("utf-8")).hexdigest()[:20]
+    return os.path.join(cache_dir, f"{enemy_key}-{digest}.npz")
+
+
+def optimal_strategy(player_config, enemy_key, constants=None, actions=ACTIONS, cache_dir=DEFAULT_CACHE_DIR,
+                     max_states=MAX_STATES):
+    """
+    Loads the matchup's StrategyTable from cache_dir, solving and saving it first if needed. actions limits the menu
+    the solver may pick from; every MP-spending option multiplies the state space, so big matchups may need it.
+    Pass cache_dir=None to skip the disk cache.
+    """
+    if cache_dir is not None:
+        path = strategy_cache_path(player_config, enemy_key, constants, actions, cache_dir)
+        if os.path.exists(path):
+            return StrategyTable.load(path)
+    table = StrategyChain(player_config, enemy_key, constants, actions, max_states).solve()
+    if cache_dir is None:
+        return table
+    os.makedirs(cache_dir, exist_ok=True)
+    partial = f"{path}.{os.getpid()}.npz"  # Write then rename, so parallel solvers never see half a file
+    table.save(partial)
+    os.replace(partial, path)
+    return table
@@ -0,0 +1,59 @@
+"""
+Cold start time of the command line, against a bare interpreter and the budget it must stay within.
+
+A batch job may run thousands of one-matchup CLI calls, so the time spent before the first fight counts. Each
+command runs in a fresh interpreter; the overhead is its median wall time minus that of `python -c pass`. The
+modules the CLI must never load, like tkinter, are checked as well.
+
+Run with: python -m fightsim.benchmarks.startup_bench
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RUNS = 15
+STARTUP_BUDGET = 0.25  # Seconds over a bare interpreter for a one-fight simulate
+COMMAND = ("simulate", "--enemy", "slime", "-n", "1", "--json")
+FORBIDDEN_MODULES = ("tkinter", "fightsim.views", "fightsim.controllers", "numpy", "scipy")
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def median_seconds(arguments, runs=RUNS):
+    """ Median wall time of running the interpreter with arguments in a fresh process """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *arguments], cwd=PACKAGE_ROOT, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def loaded_forbidden_modules(command=COMMAND):
+    """ Which FORBIDDEN_MODULES the CLI imports while running command """
+    script = ("import sys; from fightsim.cli import main; main(sys.argv[1:]); "
+              f"print(' '.join(name for name in {FORBIDDEN_MODULES!r} if name in sys.modules), file=sys.stderr)")
+    finished = subprocess.run([sys.executable, "-c", script, *command], cwd=PACKAGE_ROOT, check=True,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return finished.stderr.split()
+
+
+def startup_overhead(command=COMMAND, runs=RUNS):
+    """ Seconds python -m fightsim command takes beyond starting the interpreter """
+    return median_seconds(["-m", "fightsim", *command], runs) - median_seconds(["-c", "pass"], runs)
+
+
+def main():
+    overhead = startup_overhead()
+    forbidden = loaded_forbidden_modules()
+    print(f"python -m fightsim {' '.join(COMMAND)}")
+    print(f"  startup overhead: {overhead * 1000:.0f} ms (budget {STARTUP_BUDGET * 1000:.0f} ms)")
+    print(f"  forbidden modules loaded: {', '.join(forbidden) or 'none'}")
+    if overhead > STARTUP_BUDGET or forbidden:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+"""
+Benchmark suite for engine, fight and sweep throughput, with stored baselines.
+
+Three groups of benchmarks, all seeded so every run does the same work:
+
+- micro: calls per second for each CombatEngine and PackedCombatEngine method, Enemy.choose_enemy_action for a few
+  attack patterns and _Levelling.adjust_stats.
+- fights: whole fights per second for a fixed loadout against each of FIGHT_MATCHUPS.
+- sweep: fights per second for a small Sweep at each worker count.
+
+Each result also records the peak RSS of the process (and of its workers, for sweeps) once it has run. --save writes
+the results to a JSON baseline; --compare runs the suite again and flags every benchmark that got slower, or whose
+peak RSS grew, by more than the threshold. The exit status is 1 if anything regressed.
+
+Run with: python -m fightsim.benchmarks.suite [--save baseline.json | --compare baseline.json] [--threshold 0.1]
+                                              [--groups micro,fights,sweep] [--quick]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from ..common.messages import EnemyActions
+from ..common.randomizer import Randomizer
+from ..models.combat_engine import CombatEngine, PackedCombatEngine
+from ..models.enemy import create_enemy
+from ..models.player_leveling import _Levelling
+from ..models.spells import SpellType
+from ..sim.simulator import BattleSimulator, PlayerConfig
+from ..sim.sweep import Sweep, SweepGrid
+
+BASELINE_FORMAT = 1
+GROUPS = ("micro", "fights", "sweep")
+MIN_SECONDS = 0.2  # Each micro benchmark runs for at least this long
+REPEATS = 3  # Micro benchmarks keep the best of this many runs
+THRESHOLD = 0.10
+FIGHTS = 20_000
+SWEEP_FIGHTS = 200  # Per cell
+WORKER_COUNTS = (1, 2, 4)
+ACTION_ENEMIES = ("golem", "magiwyvern", "starwyvern", "dragonlord_second")
+LEVELLING_NAMES = ("Rollo", "Erdrick", "Loto", "Gwaelin", "Dragonlord", "Ab", "Zzzz")
+FIGHT_MATCHUPS = (
+    (PlayerConfig(level=3, weapon="Club", armor="Clothes"), "slime"),
+    (PlayerConfig(level=10, weapon="Copper Sword", armor="Leather Armor"), "skeleton"),
+    (PlayerConfig(level=15, weapon="Broad Sword", armor="Chain Mail", shield="Small Shield"), "golem"),
+    (PlayerConfig(level=20, weapon="Flame Sword", armor="Full Plate", shield="Large Shield", herbs=6), "wizard"),
+    (PlayerConfig(level=20, weapon="Flame Sword", armor="Magic Armor", shield="Large Shield", herbs=6), "axe_knight"),
+)
+SWEEP_GRID = SweepGrid(levels=(5, 10, 15, 20), weapons=("Club", "Broad Sword"), armors=("Clothes", "Chain Mail"),
+                       shields=("No Shield",), enemies=("skeleton", "golem", "wizard"))
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    group: str
+    unit: str  # "calls/s" or "fights/s"
+    rate: float
+    peak_rss_kib: Optional[int] = None
+
+
+@dataclass
+class Regression:
+    name: str
+    measure: str  # "rate" or "peak_rss_kib"
+    baseline: float
+    current: float
+
+    @property
+    def change(self):
+        return self.current / self.baseline - 1
+
+
+def peak_rss_kib(include_children=False):
+    """ Peak resident set size in KiB so far, or None where the resource module is missing (Windows) """
+    try:
+        import resource
+    except ImportError:
+        return None
+    scale = 1024 if sys.platform == "darwin" else 1  # macOS reports bytes, Linux KiB
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale
+    if include_children:
+        peak = max(peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale)
+    return peak
+
+
+def calls_per_second(call, min_seconds=MIN_SECONDS, repeats=REPEATS):
+    """ Best rate of call() over repeats runs, each doubling its batch size until it lasts min_seconds """
+    best = 0.0
+    for _ in range(repeats):
+        calls, batch = 0, 64
+        start = time.perf_counter()
+        while True:
+            for _ in range(batch):
+                call()
+            calls += batch
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_seconds:
+                break
+            batch *= 2
+        best = max(best, calls / elapsed)
+    return best
+
+
+def engine_calls(engine, player):
+    """ One representative call per CombatEngine method, by method name """
+    heal, hurt = SpellType.HEALMORE, SpellType.HURTMORE
+    return {
+        "player_damage_range": lambda: engine.player_damage_range(60, 40),
+        "player_crit_range": lambda: engine.player_crit_range(60),
+        "player_did_crit": lambda: engine.player_did_crit(),
+        "enemy_did_dodge": lambda: engine.enemy_did_dodge(2),
+        "calculate_player_attack_damage": lambda: engine.calculate_player_attack_damage(False, 40, 45, 15),
+        "resolve_player_attack": lambda: engine.resolve_player_attack(45, 15, 40, 2, False),
+        "resolve_player_magic": lambda: engine.resolve_player_magic(heal, 50, False),
+        "player_casts_heal": lambda: engine.player_casts_heal(heal, 80),
+        "player_casts_hurt": lambda: engine.player_casts_hurt(hurt, 3),
+        "player_casts_sleep": lambda: engine.player_casts_sleep(SpellType.SLEEP, 0, 3),
+        "player_casts_stopspell": lambda: engine.player_casts_stopspell(SpellType.STOPSPELL, False, 3),
+        "resolve_herb_healing": lambda: engine.resolve_herb_healing(20, 80),
+        "enemy_flees": lambda: engine.enemy_flees(20, 60),
+        "enemy_wakes_up": lambda: engine.enemy_wakes_up(),
+        "resolve_enemy_attack": lambda: engine.resolve_enemy_attack(80, 60),
+        "weak_damage_range": lambda: engine.weak_damage_range(80),
+        "normal_damage_range": lambda: engine.normal_damage_range(80, 60),
+        "enemy_casts_hurt": lambda: engine.enemy_casts_hurt(EnemyActions.HURTMORE, False, False),
+        "enemy_breathes_fire": lambda: engine.enemy_breathes_fire(EnemyActions.STRONGFIRE, False),
+        "enemy_casts_heal": lambda: engine.enemy_casts_heal(EnemyActions.HEALMORE, False, 50),
+        "enemy_casts_sleep": lambda: engine.enemy_casts_sleep(EnemyActions.SLEEP, player, False),
+        "enemy_casts_stopspell": lambda: engine.enemy_casts_stopspell(EnemyActions.STOPSPELL, player, False),
+    }
+
+
+def micro_benchmarks(min_seconds=MIN_SECONDS):
+    results = []
+
+    def record(name, call):
+        rate = calls_per_second(call, min_seconds)
+        results.append(BenchmarkResult(name, "micro", "calls/s", rate, peak_rss_kib()))
+
+    for engine_class in (CombatEngine, PackedCombatEngine):
+        engine = engine_class(Randomizer(seed=0))
+        player = PlayerConfig(level=15).build(engine)
+        for method, call in engine_calls(engine, player).items():
+            record(f"{engine_class.__name__}.{method}", call)
+
+    engine = CombatEngine(Randomizer(seed=0))
+    player = PlayerConfig(level=15).build(engine)
+    for enemy_key in ACTION_ENEMIES:
+        enemy = create_enemy(enemy_key, engine)
+        enemy.current_hp = enemy.max_hp // 5  # Low enough for healers to consider healing
+        record(f"Enemy.choose_enemy_action[{enemy_key}]", lambda enemy=enemy: enemy.choose_enemy_action(player))
+
+    leveller = _Levelling()
+    pairs = itertools.cycle([(level, name) for level in range(1, 31) for name in LEVELLING_NAMES])
+    record("_Levelling.adjust_stats", lambda: leveller.adjust_stats(*next(pairs)))
+    return results
+
+
+def fight_benchmarks(fights=FIGHTS):
+    results = []
+    for config, enemy_key in FIGHT_MATCHUPS:
+        simulator = BattleSimulator(config, enemy_key, seed=0)
+        start = time.perf_counter()
+        simulator.run(fights)
+        rate = fights / (time.perf_counter() - start)
+        results.append(BenchmarkResult(f"fights[{enemy_key}]", "fights", "fights/s", rate, peak_rss_kib()))
+    return results
+
+
+def sweep_benchmarks(worker_counts=WORKER_COUNTS, fights=SWEEP_FIGHTS):
+    results = []
+    for workers in worker_counts:
+        with tempfile.TemporaryDirectory() as directory:
+            sweep = Sweep(SWEEP_GRID, directory, fights=fights, unit_size=4)
+            start = time.perf_counter()
+            sweep.run(workers=workers)
+            elapsed = time.perf_counter() - start
+            played = sum(row.tally.fights for row in sweep.rows())
+        results.append(BenchmarkResult(f"sweep[workers={workers}]", "sweep", "fights/s", played / elapsed,
+                                       peak_rss_kib(include_children=True)))
+    return results
+
+
+def run_suite(groups=GROUPS, quick=False):
+    """ Runs the chosen benchmark groups and returns a baseline report """
+    results = []
+    if "micro" in groups:
+        results += micro_benchmarks(MIN_SECONDS / 10 if quick else MIN_SECONDS)
+    if "fights" in groups:
+        results += fight_benchmarks(FIGHTS // 10 if quick else FIGHTS)
+    if "sweep" in groups:
+        results += sweep_benchmarks(WORKER_COUNTS[:2] if quick else WORKER_COUNTS,
+                                    SWEEP_FIGHTS // 4 if quick else SWEEP_FIGHTS)
+    return {
+        "format": BASELINE_FORMAT,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": {result.name: asdict(result) for result in results},
+    }
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """
+    Regressions in current against baseline: benchmarks in both whose rate fell, or whose peak RSS grew, by more
+    than threshold (a fraction, so 0.1 is 10%)
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        if result["rate"] < before["rate"] * (1 - threshold):
+            regressions.append(Regression(name, "rate", before["rate"], result["rate"]))
+        if before["peak_rss_kib"] and result["peak_rss_kib"] and \
+                result["peak_rss_kib"] > before["peak_rss_kib"] * (1 + threshold):
+            regressions.append(Regression(name, "peak_rss_kib", before["peak_rss_kib"], result["peak_rss_kib"]))
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline.get("format") != BASELINE_FORMAT:
+        raise SystemExit(f"Unsupported baseline format in {path}")
+    return baseline
+
+
+def print_report(report, baseline=None):
+    for name, result in report["results"].items():
+        line = f"{name:>48}: {result['rate']:>14,.0f} {result['unit']:<9}"
+        before = baseline["results"].get(name) if baseline else None
+        if before:
+            line += f" {result['rate'] / before['rate'] - 1:>+8.1%}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Engine, fight and sweep throughput benchmarks.")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--save", metavar="PATH", help="Write the results to a JSON baseline")
+    action.add_argument("--compare", metavar="PATH", help="Flag regressions against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Allowed slowdown, e.g. 0.1 for 10%%")
+    parser.add_argument("--groups", default=",".join(GROUPS))
+    parser.add_argument("--quick", action="store_true", help="Shorter runs, for smoke tests")
+    args = parser.parse_args(argv)
+
+    groups = tuple(group.strip() for group in args.groups.split(","))
+    for group in groups:
+        if group not in GROUPS:
+            raise SystemExit(f"Unknown benchmark group: {group}")
+    baseline = load_baseline(args.compare) if args.compare else None
+    report = run_suite(groups, args.quick)
+    print_report(report, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as baseline_file:
+            json.dump(report, baseline_file, indent=1)
+        print(f"Wrote {len(report['results'])} results to {args.save}")
+    if baseline is not None:
+        regressions = compare(baseline, report, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression.name} {regression.measure}: {regression.baseline:,.0f} -> "
+                  f"{regression.current:,.0f} ({regression.change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+"""
+Command-line entry point: python -m fightsim simulate|sweep|solve|replay|loadout|campaign ...
+
+Only the model and simulation layers are imported, never tkinter or the views, and each subcommand imports what it
+needs when it runs, so short invocations on batch nodes start fast. `simulate` loads no numpy unless asked for the
+Clopper-Pearson interval; `solve` needs numpy and scipy.
+
+    python -m fightsim simulate --level 12 --weapon "Broad Sword" --enemy golem -n 100000 --json
+    python -m fightsim sweep DIRECTORY --levels 10-20 --enemies golem
+    python -m fightsim solve --level 12 --weapon "Broad Sword" --enemy golem [--optimal [--actions attack,herb,heal]]
+    python -m fightsim simulate --level 1 --enemy dragonlord_second -n 1000000 --record DIRECTORY
+    python -m fightsim replay DIRECTORY --fight 48113
+    python -m fightsim loadout --level 15 --enemy golem --enemy wizard:2 --no-edricks --budget 5000
+    python -m fightsim campaign --level 6 --herbs 3 --encounter ghost:2 --encounter magician --length 40 --rest-after 20
+"""
+
+import argparse
+import json
+import sys
+
+
+def add_player_arguments(parser):
+    parser.add_argument("--name", default="Rollo")
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--weapon", default="Unarmed")
+    parser.add_argument("--armor", default="Naked")
+    parser.add_argument("--shield", default="No Shield")
+    parser.add_argument("--herbs", type=int, default=0)
+    parser.add_argument("--enemy", required=True, help="Enemy key or name, e.g. golem or 'Red Dragon'")
+    parser.add_argument("--policy", default="attack", help="attack, cautious or flee")
+    parser.add_argument("--json", action="store_true", help="Print the result as one JSON object")
+
+
+def find_enemy(name):
+    """ The enemy key for an enemy key or display name """
+    from .models.enemy_data import enemy_dict, enemy_name_to_key
+
+    enemy_key = name if name in enemy_dict else enemy_name_to_key.get(name)
+    if enemy_key is None:
+        raise SystemExit(f"Unknown enemy: {name}")
+    return enemy_key
+
+
+def find_policy(name):
+    from .sim.policies import POLICIES
+
+    if name not in POLICIES:
+        raise SystemExit(f"Unknown policy: {name}")
+    return POLICIES[name]()
+
+
+def matchup(args):
+    """ The PlayerConfig, enemy key and policy the player arguments describe """
+    from .sim.simulator import PlayerConfig
+
+    enemy_key = find_enemy(args.enemy)
+    policy = find_policy(args.policy)
+    config = PlayerConfig(name=args.name, level=args.level, weapon=args.weapon, armor=args.armor,
+                          shield=args.shield, herbs=args.herbs)
+    return config, enemy_key, policy
+
+
+def describe(config, enemy_key, policy):
+    return {"player": vars(config), "enemy": enemy_key, "policy": repr(policy)}
+
+
+def simulate(args):
+    if args.profile:
+        from .sim.profiling import ProfiledSimulator as simulator_class
+    else:
+        from .sim.simulator import BattleSimulator as simulator_class
+
+    config, enemy_key, policy = matchup(args)
+    simulator = simulator_class(config, enemy_key, policy=policy, seed=args.seed)
+    report = describe(config, enemy_key, policy)
+    if args.record:
+        from .sim.draw_log import DrawLogWriter
+
+        if args.precision or args.workers > 1:
+            raise SystemExit("--record plays every fight in this process; drop --precision and --workers")
+        metadata = {"player": vars(config), "enemy": enemy_key, "policy": args.policy, "seed": args.seed}
+        with DrawLogWriter(args.record, metadata=metadata) as writer:
+            tally = writer.write_simulation(simulator, args.fights, seed_blocks=True)
+    elif args.precision:
+        from .sim.adaptive import Precision, sample_until
+
+        estimate = sample_until(simulator, Precision(args.precision, args.confidence, args.interval),
+                                max_fights=args.fights)
+        tally = estimate.tally
+        report.update(win_low=estimate.low, win_high=estimate.high, converged=estimate.converged)
+    else:
+        # run_parallel plays the same seed blocks in this process when workers is 1, so the seed alone fixes the result
+        tally = simulator.run_parallel(args.fights, workers=args.workers)
+
+    report.update(vars(tally), win_rate=tally.win_rate, loss_rate=tally.loss_rate, flee_rate=tally.flee_rate,
+                  mean_rounds=tally.mean_rounds, mean_damage_taken=tally.mean_damage_taken,
+                  mean_hp_left=tally.mean_hp_left)
+    if args.profile:
+        report["profile"] = vars(simulator.profile)
+    if args.json:
+        print(json.dumps(report))
+        return
+    print(f"{tally.fights:,} fights, level {config.level} {config.name} vs {enemy_key} ({report['policy']})")
+    print(f"Won {tally.win_rate:.2%}, lost {tally.loss_rate:.2%}, fled {tally.flee_rate:.2%}, "
+          f"enemy fled {tally.enemy_flees:,}, timed out {tally.timeouts:,}")
+    if args.precision:
+        print(f"Win rate interval: [{estimate.low:.2%}, {estimate.high:.2%}]")
+    print(f"Mean rounds {tally.mean_rounds:.2f}, mean damage taken {tally.mean_damage_taken:.1f}, "
+          f"mean HP left after a win {tally.mean_hp_left:.1f}")
+    if args.profile:
+        print(simulator.profile.summary())
+
+
+def solve(args):
+    config, enemy_key, policy = matchup(args)
+    report = describe(config, enemy_key, policy)
+    if args.optimal:
+        from .analysis.strategy import ACTIONS, DEFAULT_CACHE_DIR, optimal_strategy, parse_actions
+
+        actions = parse_actions(args.actions) if args.actions else ACTIONS
+        table = optimal_strategy(config, enemy_key, actions=actions,
+                                 cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR)
+        report.update(policy="optimal", win=table.win, states=len(table.keys))
+    else:
+        from .analysis.markov import solve_fight
+
+        solution = solve_fight(config, enemy_key, policy)
+        report.update(vars(solution))
+    if args.json:
+        print(json.dumps(report))
+        return
+    print(f"Level {config.level} {config.name} vs {enemy_key} ({report['policy']}): win chance {report['win']:.4%}")
+    if not args.optimal:
+        print(f"Loss {solution.loss:.4%}, player fled {solution.player_fled:.4%}, enemy fled "
+              f"{solution.enemy_fled:.4%}, expected rounds {solution.expected_rounds:.2f}")
+
+
+def replay(args):
+    from .models.enemy_data import enemy_dict
+    from .sim.draw_log import DrawLog
+    from .sim.fight_log import code_version
+    from .sim.policies import POLICIES
+    from .sim.simulator import BattleSimulator, PlayerConfig
+
+    with DrawLog(args.directory) as log:
+        metadata = log.metadata
+        if not {"player", "enemy", "policy"} <= set(metadata) or metadata["enemy"] not in enemy_dict:
+            raise SystemExit(f"{args.directory} does not record a matchup to replay; was it written by simulate?")
+        simulator = BattleSimulator(PlayerConfig(**metadata["player"]), metadata["enemy"],
+                                    policy=POLICIES[metadata["policy"]]())
+        events = []
+        simulator.events.subscribe(events.append)
+        if args.any_version and log.code_version != code_version():
+            print(f"Warning: replaying a log from code version {log.code_version} on {code_version()}; the fight "
+                  f"may differ from the one recorded", file=sys.stderr)
+        try:
+            result = log.replay(simulator, args.fight, check_version=not args.any_version)
+        except IndexError as error:
+            raise SystemExit(str(error))
+        draws = len(log.draws(args.fight))
+    if args.json:
+        print(json.dumps({"fight": args.fight, "outcome": result.outcome.name, "rounds": result.rounds,
+                          "player_hp": result.player_hp, "damage_taken": result.damage_taken, "draws": draws,
+                          "events": [repr(event) for event in events]}))
+        return
+    for event in events:
+        print(event)
+    print(f"Fight {args.fight}: {result.outcome.name} after {result.rounds} rounds and {draws} draws")
+
+
+def weighted_enemy(entry):
+    """ (enemy key, weight) for an --enemy of NAME or NAME:WEIGHT """
+    name, separator, weight = entry.rpartition(":")
+    if separator:
+        try:
+            return find_enemy(name), float(weight)
+        except ValueError:
+            pass
+    return find_enemy(entry), 1.0
+
+
+def loadout(args):
+    from .analysis.loadouts import EDRICKS_GEAR, LoadoutConstraints, best_loadouts
+
+    weights = {}
+    for entry in args.enemy:
+        enemy_key, weight = weighted_enemy(entry)
+        weights[enemy_key] = weights.get(enemy_key, 0.0) + weight
+    constraints = LoadoutConstraints(exclude=tuple(args.exclude) + (EDRICKS_GEAR if args.no_edricks else ()),
+                                     budget=args.budget)
+    search = best_loadouts(args.level, weights, name=args.name, herbs=args.herbs, policy=find_policy(args.policy),
+                           constraints=constraints, method="simulate" if args.simulate else "exact",
+                           fights=args.simulate)
+    ranking = search.ranking[:args.top]
+    if args.json:
+        print(json.dumps({"enemies": weights, "permitted": search.permitted, "classes": search.classes,
+                          "solved": search.solved, "ranking": [
+                              {**vars(ranked.loadout), "price": ranked.loadout.price, "score": ranked.score,
+                               "wins": ranked.wins, "equivalent": [vars(other) for other in ranked.equivalent]}
+                              for ranked in ranking]}))
+        return
+    print(f"{search.permitted} loadouts permitted, {search.classes} distinct in combat, {search.solved} solved")
+    for ranked in ranking:
+        loadout = ranked.loadout
+        price = "not sold" if loadout.price is None else f"{loadout.price:,} G"
+        print(f"{ranked.score:8.3%}  {loadout.weapon}, {loadout.armor}, {loadout.shield} ({price})")
+    if not ranking:
+        print("No loadout meets the constraints")
+
+
+def campaign(args):
+    from .sim.campaign import Campaign, CampaignSimulator
+    from .sim.simulator import PlayerConfig
+
+    encounters = {}
+    for entry in args.encounter:
+        enemy_key, weight = weighted_enemy(entry)
+        if not weight.is_integer():
+            raise SystemExit(f"Encounter weights must be whole numbers: {entry}")
+        encounters[enemy_key] = encounters.get(enemy_key, 0) + int(weight)
+    trip = Campaign(encounters, args.length, tuple(args.rest_after))
+    config = PlayerConfig(name=args.name, level=args.level, weapon=args.weapon, armor=args.armor, shield=args.shield,
+                          herbs=args.herbs)
+    simulator = CampaignSimulator(config, trip, policy=find_policy(args.policy), seed=args.seed)
+    tally = simulator.run_parallel(args.trips, workers=args.workers)
+
+    if args.json:
+        print(json.dumps({"player": vars(config), "encounters": encounters, "length": args.length,
+                          "rest_after": args.rest_after, "policy": args.policy, "trips": tally.trips,
+                          "survival_rate": tally.survival_rate, "death_rate": tally.death_rate,
+                          "stalled": tally.stalled, "encounters_fought": tally.encounters,
+                          "survival_curve": tally.survival_curve(), "mean_hp": tally.mean_curve("hp"),
+                          "mean_mp": tally.mean_curve("mp"), "mean_herbs": tally.mean_curve("herbs"),
+                          "deaths_by_enemy": dict(tally.deaths_by_enemy)}))
+        return
+    print(f"{tally.trips:,} trips of {args.length} encounters, level {config.level} {config.name} "
+          f"({tally.encounters:,} fights)")
+    print(f"Survived {tally.survival_rate:.2%}, died {tally.death_rate:.2%}, stalled {tally.stalled:,}")
+    for enemy_key, deaths in tally.deaths_by_enemy.most_common():
+        print(f"  {deaths:,} deaths to {enemy_key} ({deaths / tally.fights_by_enemy[enemy_key]:.2%} of its fights)")
+    survival, hp, mp, herbs = (tally.survival_curve(), tally.mean_curve("hp"), tally.mean_curve("mp"),
+                               tally.mean_curve("herbs"))
+    print("  after  alive    HP     MP  herbs")
+    for index in sorted({*range(0, args.length, max(1, args.length // 10)), args.length - 1}):
+        print(f"  {index + 1:>5} {survival[index]:6.1%} {hp[index]:6.1f} {mp[index]:6.1f} {herbs[index]:6.2f}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m fightsim", description="Headless DQ1 battle simulations.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    simulate_parser = commands.add_parser("simulate", help="Play fights for one matchup and report the tally")
+    add_player_arguments(simulate_parser)
+    simulate_parser.add_argument("-n", "--fights", type=int, default=10_000,
+                                 help="Fights to play, or the most to play with --precision")
+    simulate_parser.add_argument("--seed", type=int)
+    simulate_parser.add_argument("--workers", type=int, default=1)
+    simulate_parser.add_argument("--precision", type=float, help="Stop once the win rate is known to +- this")
+    simulate_parser.add_argument("--confidence", type=float, default=0.95)
+    simulate_parser.add_argument("--interval", choices=("wilson", "clopper-pearson"), default="wilson")
+    simulate_parser.add_argument("--profile", action="store_true",
+                                 help="Count RNG draws, actions and allocations and time each phase")
+    simulate_parser.add_argument("--record", metavar="DIRECTORY",
+                                 help="Record every fight's RNG draws to a draw log for replay")
+    simulate_parser.set_defaults(run=simulate)
+
+    replay_parser = commands.add_parser("replay", help="Play one fight from a draw log again, event by event")
+    replay_parser.add_argument("directory", help="Draw log written by simulate --record")
+    replay_parser.add_argument("--fight", type=int, default=0, help="Index of the fight, from 0")
+    replay_parser.add_argument("--any-version", action="store_true",
+                               help="Replay a log recorded by a different code version, with a warning")
+    replay_parser.add_argument("--json", action="store_true", help="Print the result as one JSON object")
+    replay_parser.set_defaults(run=replay)
+
+    solve_parser = commands.add_parser("solve", help="Exact outcome chances for one matchup")
+    add_player_arguments(solve_parser)
+    solve_parser.add_argument("--optimal", action="store_true",
+                              help="Solve for the win-maximizing strategy instead of --policy")
+    solve_parser.add_argument("--actions", metavar="LIST",
+                              help="With --optimal, the actions the strategy may use, e.g. attack,herb,heal. "
+                                   "Fewer actions mean fewer states. Default: every action")
+    solve_parser.add_argument("--no-cache", action="store_true", help="Don't read or write the strategy cache")
+    solve_parser.set_defaults(run=solve)
+
+    loadout_parser = commands.add_parser("loadout", help="Best weapon, armor and shield against enemies")
+    loadout_parser.add_argument("--name", default="Rollo")
+    loadout_parser.add_argument("--level", type=int, default=1)
+    loadout_parser.add_argument("--herbs", type=int, default=0)
+    loadout_parser.add_argument("--enemy", action="append", required=True,
+                                help="Enemy key or name, optionally with a weight as NAME:WEIGHT. Repeatable")
+    loadout_parser.add_argument("--policy", default="attack", help="attack, cautious or flee")
+    loadout_parser.add_argument("--exclude", action="append", default=[], metavar="ITEM",
+                                help="Never pick this item. Repeatable")
+    loadout_parser.add_argument("--no-edricks", action="store_true", help="Never pick Edrick's gear")
+    loadout_parser.add_argument("--budget", type=int, help="Most gold the three pieces may cost together")
+    loadout_parser.add_argument("--simulate", type=int, metavar="FIGHTS",
+                                help="Score by simulating FIGHTS fights instead of solving exactly")
+    loadout_parser.add_argument("--top", type=int, default=5)
+    loadout_parser.add_argument("--json", action="store_true", help="Print the result as one JSON object")
+    loadout_parser.set_defaults(run=loadout)
+
+    campaign_parser = commands.add_parser("campaign", help="Chains of fights with HP, MP and herbs carried over")
+    campaign_parser.add_argument("--name", default="Rollo")
+    campaign_parser.add_argument("--level", type=int, default=1)
+    campaign_parser.add_argument("--weapon", default="Unarmed")
+    campaign_parser.add_argument("--armor", default="Naked")
+    campaign_parser.add_argument("--shield", default="No Shield")
+    campaign_parser.add_argument("--herbs", type=int, default=0)
+    campaign_parser.add_argument("--policy", default="cautious", help="attack, cautious or flee")
+    campaign_parser.add_argument("--encounter", action="append", required=True,
+                                 help="Enemy key or name in the encounter table, as NAME or NAME:WEIGHT. Repeatable")
+    campaign_parser.add_argument("--length", type=int, default=20, help="Encounters per trip")
+    campaign_parser.add_argument("--rest-after", type=int, action="append", default=[], metavar="ENCOUNTER",
+                                 help="Rest at an inn after this encounter, counting from 1. Repeatable")
+    campaign_parser.add_argument("-n", "--trips", type=int, default=10_000)
+    campaign_parser.add_argument("--seed", type=int)
+    campaign_parser.add_argument("--workers", type=int, default=1)
+    campaign_parser.add_argument("--json", action="store_true", help="Print the result as one JSON object")
+    campaign_parser.set_defaults(run=campaign)
+
+    # Listed for --help only: main() hands everything after "sweep" to sim.sweep's own parser
+    commands.add_parser("sweep", help="Levels x equipment x enemies sweep, see sweep --help")
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["sweep"]:
+        from .sim import sweep
+
+        sweep.main(argv[1:])
+        return 0
+    args = build_parser().parse_args(argv)
+    try:
+        args.run(args)
+    except ValueError as error:  # Unknown items, out-of-range herbs and the like
+        raise SystemExit(str(error))
+    return 0
@@ -0,0 +1,55 @@
+"""
+Randomizer that serves draws from pre-drawn numpy blocks.
+
+random.randint spends most of its time in Python-level argument checks and bit fiddling. A fight only ever asks for
+a few dozen distinct ranges, so BufferedRandomizer keeps a pool per (low, high) range, refilled BLOCK_SIZE draws at
+a time by a numpy PCG64 Generator. Generator.integers maps raw bits into the range with Lemire's unbiased method, so
+every value stays exactly uniform. Serving a draw is then a single list.pop().
+
+chance() keeps using the inherited random.Random stream: random() is already a single C call and beats a pool.
+"""
+
+import numpy as np
+
+from .randomizer import Randomizer, _stream_seed
+
+BLOCK_SIZE = 4096
+
+
+class BufferedRandomizer(Randomizer):
+    """ Drop-in Randomizer for CombatEngine and Player. Seeds, streams and spawned children work the same way. """
+
+    def __init__(self, seed=None, spawn_key=(), block_size=BLOCK_SIZE):
+        super().__init__(seed, spawn_key)
+        self.block_size = block_size
+        self._generator = np.random.Generator(np.random.PCG64(_stream_seed(self.seed, self.spawn_key)))
+        self._pools = {}
+
+    def __repr__(self):
+        return f"BufferedRandomizer(seed={self.seed}, spawn_key={self.spawn_key})"
+
+    def stream(self, index):
+        return BufferedRandomizer(self.seed, self.spawn_key + (index,), self.block_size)
+
+    def _refill(self, low, high):
+        if high < low:
+            raise ValueError(f"empty range for randint({low}, {high})")
+        pool = self._generator.integers(low, high, size=self.block_size, endpoint=True).tolist()
+        self._pools[low, high] = pool
+        return pool.pop()
+
+    def randint(self, low, high):
+        """Return a random integer N such that low <= N <= high."""
+        try:
+            return self._pools[low, high].pop()
+        except (KeyError, IndexError):
+            return self._refill(low, high)
+
+    def choice(self, sequence):
+        """Return a randomly selected element from the non-empty sequence."""
+        if not sequence:
+            raise IndexError("Cannot choose from an empty sequence")
+        return sequence[self.randint(0, len(sequence) - 1)]
+
+    def agility_roll(self, agility, surprise_factor=1):
+        return agility * self.randint(1, 255) * surprise_factor
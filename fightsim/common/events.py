@@ -0,0 +1,136 @@
+"""
+Typed battle events and the bus that dispatches them.
+
+The BattleController and the headless BattleSimulator publish what happens in a fight as events. Anything that
+wants to follow a fight, like the BattlePresenter, a stats collector or a trace writer, subscribes to the event
+types it cares about. Publishers check EventBus.listening before building an event, so a bus nobody has subscribed
+to costs one attribute check per event and builds nothing.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from .messages import (AttackResult, EnemyActions, EnemySleepResult, FightOutcome, HerbResult, PlayerSleepResult,
+                       SpellResult)
+
+
+@dataclass(frozen=True, slots=True)
+class BattleEvent:
+    """ Base of all battle events. Subscribing to BattleEvent receives every event """
+
+
+@dataclass(frozen=True, slots=True)
+class FightStarted(BattleEvent):
+    enemy_name: str
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerSurprised(BattleEvent):
+    enemy_name: str
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerSleepChecked(BattleEvent):
+    """ Published at the start of a player turn while the player is (or just was) asleep """
+    result: PlayerSleepResult
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerAttacked(BattleEvent):
+    result: AttackResult
+    enemy_name: str
+
+
+@dataclass(frozen=True, slots=True)
+class HerbUsed(BattleEvent):
+    result: HerbResult
+
+
+@dataclass(frozen=True, slots=True)
+class FleeAttempted(BattleEvent):
+    success: bool
+    enemy_name: str
+
+
+@dataclass(frozen=True, slots=True)
+class NoSpellSelected(BattleEvent):
+    """ choice is what the spell menu held instead of a spell """
+    choice: str
+
+
+@dataclass(frozen=True, slots=True)
+class SpellCast(BattleEvent):
+    """ The player cast a spell. result.reason tells why a failed cast failed """
+    result: SpellResult
+    enemy_name: str
+
+
+@dataclass(frozen=True, slots=True)
+class EnemySleepChecked(BattleEvent):
+    """ Published at the start of an enemy turn while the enemy is (or just was) asleep """
+    result: EnemySleepResult
+    enemy_name: str
+
+
+@dataclass(frozen=True, slots=True)
+class EnemyFled(BattleEvent):
+    enemy_name: str
+
+
+@dataclass(frozen=True, slots=True)
+class EnemyActed(BattleEvent):
+    """ result is an AttackResult for EnemyActions.ATTACK and a SpellResult for everything else """
+    action: EnemyActions
+    result: Any
+    enemy_name: str
+    player_name: str
+
+
+@dataclass(frozen=True, slots=True)
+class TurnEnded(BattleEvent):
+    """ actor is "player" or "enemy" """
+    actor: str
+    player_hp: int
+    enemy_hp: int
+
+
+@dataclass(frozen=True, slots=True)
+class FightEnded(BattleEvent):
+    outcome: FightOutcome
+    enemy_name: str
+    rounds: Optional[int] = None
+
+
+class EventBus:
+    """ Dispatches events to the handlers subscribed to their exact type, then to BattleEvent subscribers """
+
+    def __init__(self):
+        self._handlers = {}
+        self.listening = False
+
+    def subscribe(self, handler, *event_types):
+        """ Calls handler(event) for each of event_types, or for every event if none are given. Returns handler """
+        for event_type in event_types or (BattleEvent,):
+            self._handlers[event_type] = self._handlers.get(event_type, ()) + (handler,)
+        self.listening = True
+        return handler
+
+    def unsubscribe(self, handler, *event_types):
+        """ Stops calling handler for event_types, or for anything at all if none are given """
+        for event_type in event_types or tuple(self._handlers):
+            remaining = tuple(known for known in self._handlers.get(event_type, ()) if known != handler)
+            if remaining:
+                self._handlers[event_type] = remaining
+            else:
+                self._handlers.pop(event_type, None)
+        self.listening = bool(self._handlers)
+
+    def wants(self, event_type):
+        """ True if publishing an event_type would reach any handler """
+        return event_type in self._handlers or BattleEvent in self._handlers
+
+    def publish(self, event):
+        for handler in self._handlers.get(type(event), ()):
+            handler(event)
+        for handler in self._handlers.get(BattleEvent, ()):
+            handler(event)
@@ -1,5 +1,6 @@
 from enum import Enum, auto
 from dataclasses import dataclass
+from typing import Optional
 
 # Enemy Actions
 class EnemyActions(Enum):
@@ -30,6 +31,24 @@ class EnemyActions(Enum):
         }
         return descriptions.get(self, "No description available.")
 
+class PlayerActions(Enum):
+    """
+    Non-spell actions the player can take on their turn. Spells are chosen with SpellType.
+    """
+    ATTACK = auto()
+    HERB = auto()
+    FLEE = auto()
+
+class FightOutcome(Enum):
+    """
+    How a fight ended
+    """
+    PLAYER_WINS = auto()
+    PLAYER_LOSES = auto()
+    PLAYER_FLED = auto()
+    ENEMY_FLED = auto()
+    TIMED_OUT = auto()
+
 class SpellFailureReason(Enum):
     NOT_ENOUGH_MP = auto()
     PLAYER_SPELLSTOPPED = auto()
@@ -45,15 +64,92 @@ class HerbFailureReason(Enum):
     NO_HERBS = auto()
     MAX_HP = auto()
 
-@dataclass
-class HerbResult:
-    success: bool
-    healing: int
-    reason: str = ""
-
 class SleepReason(Enum):
     NOT_ASLEEP = auto()
     FIRST_ROUND_ENEMY_ASLEEP = auto()
     ENEMY_WAKES_UP = auto()
     ENEMY_ASLEEP = auto()
+
+# Action results. Frozen and slotted, so the fixed outcomes below can be shared instead of built on every call.
+
+@dataclass(frozen=True, slots=True)
+class AttackResult:
+    damage: int
+    crit: bool = False
+    dodge: bool = False
+    hit: bool = True
+
+@dataclass(frozen=True, slots=True)
+class SpellResult:
+    """ spell is the SpellType the player cast or the EnemyActions member the enemy used """
+    spell: Enum
+    success: bool
+    amount: int = 0
+    reason: Optional[SpellFailureReason] = None
+
+    @property
+    def spell_name(self):
+        return getattr(self.spell.value, "name", self.spell.name.title())
+
+@dataclass(frozen=True, slots=True)
+class HerbResult:
+    success: bool
+    healing: int
+    reason: Optional[HerbFailureReason] = None
+
+@dataclass(frozen=True, slots=True)
+class PlayerSleepResult:
+    still_asleep: bool
+    just_woke_up: bool
+
+@dataclass(frozen=True, slots=True)
+class EnemySleepResult:
+    success: bool
+    reason: SleepReason
+
+PLAYER_AWAKE = PlayerSleepResult(still_asleep=False, just_woke_up=False)
+PLAYER_WOKE_UP = PlayerSleepResult(still_asleep=False, just_woke_up=True)
+PLAYER_STILL_ASLEEP = PlayerSleepResult(still_asleep=True, just_woke_up=False)
+
+ENEMY_NOT_ASLEEP = EnemySleepResult(success=False, reason=SleepReason.NOT_ASLEEP)
+ENEMY_FIRST_ROUND_ASLEEP = EnemySleepResult(success=True, reason=SleepReason.FIRST_ROUND_ENEMY_ASLEEP)
+ENEMY_WOKE_UP = EnemySleepResult(success=False, reason=SleepReason.ENEMY_WAKES_UP)
+ENEMY_STILL_ASLEEP = EnemySleepResult(success=True, reason=SleepReason.ENEMY_ASLEEP)
+
+NO_HERBS_LEFT = HerbResult(success=False, healing=0, reason=HerbFailureReason.NO_HERBS)
+HERB_AT_MAX_HP = HerbResult(success=False, healing=0, reason=HerbFailureReason.MAX_HP)
+
+# Packed results, returned by PackedCombatEngine. One int per action: the amount (damage, healing or sleep rounds)
+# above AMOUNT_SHIFT, the failure reason's enum value in the REASON bits and the flag bits below it.
+
+RESULT_SUCCESS = 1  # Also set for attacks that hit
+RESULT_CRIT = 2
+RESULT_DODGE = 4
+REASON_SHIFT = 3
+REASON_MASK = 0x1F
+AMOUNT_SHIFT = 8
+NO_REASON = 0
+
+def pack_result(amount=0, flags=0, reason=None):
+    return amount << AMOUNT_SHIFT | (reason.value if reason else NO_REASON) << REASON_SHIFT | flags
+
+def result_amount(packed):
+    return packed >> AMOUNT_SHIFT
+
+def result_reason(packed, reasons):
+    """ The reasons member stored in packed, or None if the action succeeded """
+    code = packed >> REASON_SHIFT & REASON_MASK
+    return reasons(code) if code != NO_REASON else None
+
+def unpack_attack(packed):
+    return AttackResult(damage=packed >> AMOUNT_SHIFT, crit=bool(packed & RESULT_CRIT),
+                        dodge=bool(packed & RESULT_DODGE), hit=bool(packed & RESULT_SUCCESS))
+
+def unpack_spell(spell, packed):
+    return SpellResult(spell=spell, success=bool(packed & RESULT_SUCCESS), amount=packed >> AMOUNT_SHIFT,
+                       reason=result_reason(packed, SpellFailureReason))
+
+def unpack_herb(packed):
+    return HerbResult(success=bool(packed & RESULT_SUCCESS), healing=packed >> AMOUNT_SHIFT,
+                      reason=result_reason(packed, HerbFailureReason))
     
\ No newline at end of file
@@ -1,22 +1,52 @@
+import hashlib
 import random
+import secrets
+
+
+def _stream_seed(seed, spawn_key):
+    """ Mixes a root seed and a spawn key into the seed of one stream """
+    digest = hashlib.sha256(repr((seed, spawn_key)).encode("utf-8")).digest()
+    return int.from_bytes(digest, "little")
 
 
 class Randomizer:
-    @staticmethod
-    def randint(low, high):
+    """
+    A seedable stream of random numbers. Each combat engine owns one, and all randomness in a fight goes through it.
+
+    Streams work like numpy's SeedSequence. The same seed and spawn key always give the same draws, and child
+    streams from stream() or spawn() are independent of their parent and of each other.
+    """
+
+    def __init__(self, seed=None, spawn_key=()):
+        self.seed = secrets.randbits(128) if seed is None else seed
+        self.spawn_key = tuple(spawn_key)
+        self.children_spawned = 0
+        self._random = random.Random(_stream_seed(self.seed, self.spawn_key))
+
+    def __repr__(self):
+        return f"Randomizer(seed={self.seed}, spawn_key={self.spawn_key})"
+
+    def stream(self, index):
+        """Return the child stream at index. Asking twice gives two copies of the same stream."""
+        return Randomizer(self.seed, self.spawn_key + (index,))
+
+    def spawn(self, count):
+        """Return count new child streams, never handing out the same child twice."""
+        first = self.children_spawned
+        self.children_spawned += count
+        return [self.stream(index) for index in range(first, first + count)]
+
+    def randint(self, low, high):
         """Return a random integer N such that low <= N <= high."""
-        return random.randint(low, high)
+        return self._random.randint(low, high)
 
-    @staticmethod
-    def chance(success_rate):
+    def chance(self, success_rate):
         """Determine if an event with a given success rate occurs."""
-        return random.random() < success_rate
+        return self._random.random() < success_rate
 
-    @staticmethod
-    def choice(sequence):
+    def choice(self, sequence):
         """Return a randomly selected element from the non-empty sequence."""
-        return random.choice(sequence)
+        return self._random.choice(sequence)
 
-    @staticmethod
-    def agility_roll(agility, surprise_factor=1):
-        return agility * random.randint(1, 255) * surprise_factor
+    def agility_roll(self, agility, surprise_factor=1):
+        return agility * self._random.randint(1, 255) * surprise_factor
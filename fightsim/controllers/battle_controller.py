@@ -1,10 +1,34 @@
-"""Controller for the battle system"""
+"""
+Controller for the battle system
+
+A fight is a state machine rather than a chain of turn methods calling each other. Each BattlePhase names what
+happens next; step() runs one phase and moves on, and run_until_input() steps until the fight needs a player action
+or is over. Button handlers resolve the player's action and hand back to run_until_input(), so the stack stays flat
+however long a sleep lock lasts, and nothing runs once the fight has ended.
+
+Headless callers can pass view=None and drive fights with act(), one PlayerActions or SpellType per player turn.
+"""
+
+from enum import Enum, auto
 
 from fightsim.presenters.battle_presenter import BattlePresenter
-from ..common.randomizer import Randomizer
-from ..common.messages import EnemyActions, HerbFailureReason, SleepReason, SpellFailureReason
+from ..common.events import (EnemyActed, EnemyFled, EnemySleepChecked, EventBus, FightEnded, FightStarted,
+                             FleeAttempted, HerbUsed, NoSpellSelected, PlayerAttacked, PlayerSleepChecked,
+                             PlayerSurprised, SpellCast, TurnEnded)
+from ..common.messages import (EnemyActions, FightOutcome, HerbFailureReason, PlayerActions, PLAYER_AWAKE,
+                               ENEMY_NOT_ASLEEP)
 from ..models.spells import SpellType
-from ..models.combat_engine import CombatEngine
+
+
+class BattlePhase(Enum):
+    """
+    Where a fight is. PLAYER_TURN and ENEMY_TURN run on their own; AWAITING_INPUT waits for a player action
+    """
+    IDLE = auto()
+    PLAYER_TURN = auto()
+    AWAITING_INPUT = auto()
+    ENEMY_TURN = auto()
+    FIGHT_OVER = auto()
 
 
 class BattleController:
@@ -13,9 +37,20 @@ class BattleController:
         self.view = view
         self.player = self.game_state.player
         self.enemy = self.game_state.enemy
-        self.combat_engine = CombatEngine(Randomizer())
+        self.combat_engine = game_state.combat_engine
+        self.phase = BattlePhase.IDLE
+        self.outcome = None
+        self.rounds = 0
+
+        self.events = EventBus()
+        if view is not None:
+            self.battle_presenter = BattlePresenter(view)
+            self.battle_presenter.subscribe(self.events)
 
-        self.battle_presenter = BattlePresenter(view)
+    def publish(self, event_type, *args):
+        """ Builds and dispatches an event, but only when something is subscribed to the bus """
+        if self.events.listening:
+            self.events.publish(event_type(*args))
 
     # Battle Setup
 
@@ -29,104 +64,142 @@ class BattleController:
 
     def setup_battle(self):
         """All of the initial battle setup before the battle menu appears"""
-        self.view.update_player_info(self.game_state.player)
-        self.view.show_frame(self.view.battle_frame)                
+        if self.view is not None:
+            self.view.update_player_info(self.game_state.player)
+            self.view.show_frame(self.view.battle_frame)
         self.player = self.game_state.player
         self.enemy = self.game_state.enemy
-        self.battle_presenter.start_fight_msg(None, self.enemy.name)  # test name here
+        self.publish(FightStarted, self.enemy.name)
         self.start_fight()
 
     def start_fight(self):
-        # Check for surprise at the very start of battle.
-        enemy_surprises = self.does_enemy_surprise()
-        if enemy_surprises:
-            self.battle_presenter.player_surprised(None, self.enemy.name)
-            self.enemy_turn()
+        """Checks for surprise at the very start of battle and runs the fight up to the first player action"""
+        self.outcome = None
+        self.rounds = 1
+        if self.does_enemy_surprise():
+            self.publish(PlayerSurprised, self.enemy.name)
+            self.phase = BattlePhase.ENEMY_TURN
         else:
-            self.player_turn()
+            self.phase = BattlePhase.PLAYER_TURN
+        self.run_until_input()
 
     def does_enemy_surprise(self):
         """Determine if the enemy surprises the player based on agility and randomness."""
-        player_roll = Randomizer.agility_roll(self.player.agility)
-        enemy_roll = Randomizer.agility_roll(self.enemy.agility, surprise_factor=0.25)
+        randomizer = self.combat_engine.randomizer
+        player_roll = randomizer.agility_roll(self.player.agility)
+        enemy_roll = randomizer.agility_roll(self.enemy.agility, surprise_factor=0.25)
         return player_roll < enemy_roll
 
+    # The turn loop
+
+    def step(self):
+        """Runs the current phase if it needs no input and moves to the next. Returns False if nothing could run"""
+        if self.phase is BattlePhase.PLAYER_TURN:
+            self.player_turn()
+        elif self.phase is BattlePhase.ENEMY_TURN:
+            self.enemy_turn()
+        else:
+            return False
+        return True
+
+    def run_until_input(self):
+        """Steps until the player has to act or the fight is over. Returns the phase it stopped in"""
+        while self.step():
+            pass
+        return self.phase
+
+    def act(self, action):
+        """
+        Takes a player turn with a PlayerActions member or a SpellType, then runs on to the next player action.
+        Returns the phase it stopped in; the fight is over once that is FIGHT_OVER, see self.outcome.
+        """
+        if action is PlayerActions.ATTACK:
+            self.on_attack_button()
+        elif action is PlayerActions.HERB:
+            self.on_herb_button()
+        elif action is PlayerActions.FLEE:
+            self.on_flee_button()
+        else:
+            self.cast_magic(action)
+        return self.phase
+
     # Player Turns and Actions
 
     def player_turn(self):
         """Runs at the start of player turn. Checks for sleep status and updates it, then waits for user to
         enter a command."""
         sleep_check = self.player.handle_sleep()
-        
+        if sleep_check is not PLAYER_AWAKE:
+            self.publish(PlayerSleepChecked, sleep_check)
+
         if sleep_check.still_asleep:
-            self.battle_presenter.player_is_sleeping()
-            self.enemy_turn()
-        if sleep_check.just_woke_up:
-            self.battle_presenter.player_woke_up()
+            self.phase = BattlePhase.ENEMY_TURN
+        else:
+            self.phase = BattlePhase.AWAITING_INPUT
         # Stopspell does not lift once the player is under that status.
 
     def on_attack_button(self):
+        if self.phase is not BattlePhase.AWAITING_INPUT:
+            return
         result = self.player.attack(self.enemy)
 
         if result.hit:
             self.enemy.take_damage(result.damage)
-            self.battle_presenter.attack_result(result, self.enemy.name)
-            self.view.update_enemy_info(self.enemy)
-            self.is_enemy_defeated()
-        else:
-            self.enemy_turn()
+        self.publish(PlayerAttacked, result, self.enemy.name)
+        self.is_enemy_defeated()
 
     def on_herb_button(self):
+        if self.phase is not BattlePhase.AWAITING_INPUT:
+            return
         result = self.player.use_herb()
 
+        self.publish(HerbUsed, result)
         if result.reason == HerbFailureReason.NO_HERBS:
-            self.battle_presenter.no_herbs()
             return  # Player does not lose turn if they try to use an herb when they have none.
-        elif result.reason == HerbFailureReason.MAX_HP:
-            self.battle_presenter.eat_herb_at_full_hp()
-        else:
+        if result.success:
             self.player.raise_hp(result.healing)
-            self.battle_presenter.eat_herb(None, result.healing)
         self.is_enemy_defeated()
 
     def on_flee_button(self):
+        if self.phase is not BattlePhase.AWAITING_INPUT:
+            return
         result = self.player.is_flee_successful(self.enemy.agility, self.enemy.run)
-        self.battle_presenter.fleeing(result, self.enemy.name)
+        self.publish(FleeAttempted, result, self.enemy.name)
         if result is True:
-            self.end_fight()
+            self.finish(FightOutcome.PLAYER_FLED)
         else:
-            self.enemy_turn()
+            self.end_player_turn()
 
     def on_cast_magic_button(self):
-        spell = self.view.battle_frame.magic_option_var.get()
+        self.cast_magic(self.view.battle_frame.selected_spell())
+
+    def cast_magic(self, spell):
+        if self.phase is not BattlePhase.AWAITING_INPUT:
+            return
 
         # First make sure a spell is selected
-        if spell in ["Select Spell", "No Magic Available"]:
-            self.battle_presenter.no_spell_selected(spell)
+        if not isinstance(spell, SpellType):
+            self.publish(NoSpellSelected, spell)
             return
 
         result = self.player.cast_magic(spell, self.enemy, self.combat_engine)
+        self.publish(SpellCast, result, self.enemy.name)
         if result.success is False:
-            self.battle_presenter.player_spell_failed(result, self.enemy.name)
+            self.is_enemy_defeated()
+            return
 
         # From here, spells are successful
         if spell in [SpellType.HEAL, SpellType.HEALMORE]:
             self.player.raise_hp(result.amount)
-            self.battle_presenter.player_casts_heal(spell, result.amount)
 
         if spell in [SpellType.HURT, SpellType.HURTMORE]:
             self.enemy.take_damage(result.amount)
-            self.battle_presenter.player_casts_hurt(
-                spell, self.enemy.name, result.amount
-            )
 
         if spell == SpellType.SLEEP:
             self.enemy.set_sleep(result.amount)
-            self.battle_presenter.enemy_now_asleep(self.enemy.name)
 
         if spell == SpellType.STOPSPELL:
             self.enemy.enemy_spell_stopped = True
-            self.battle_presenter.enemy_now_spell_stopped(self.enemy.name)
 
         self.is_enemy_defeated()
 
@@ -134,71 +207,36 @@ class BattleController:
 
     def enemy_turn(self):
 
-        sleep_result = self.enemy.process_sleep_turn()
+        sleep_result = self.enemy.process_enemy_sleep()
         # First, handle if the enemy's sleep status
-        if sleep_result.success is True: # Enemy is asleep
-            if sleep_result.reason == SleepReason.FIRST_ROUND_ENEMY_ASLEEP:
-                self.battle_presenter.enemy_is_sleeping(self.enemy.name)
-            if sleep_result.reason == SleepReason.ENEMY_ASLEEP:
-                self.battle_presenter.enemy_is_still_sleeping(self.enemy.name)
-            self.player_turn()
-        if sleep_result.reason == SleepReason.ENEMY_WAKES_UP:
-            self.battle_presenter.enemy_woke_up(self.enemy.name)
-
+        if sleep_result is not ENEMY_NOT_ASLEEP:
+            self.publish(EnemySleepChecked, sleep_result, self.enemy.name)
+        if sleep_result.success is True:  # Enemy is asleep
+            self.next_round()
+            return
 
         # Now see if the enemy flees
         if self.enemy.does_flee(self.player.strength):
-            self.battle_presenter.enemy_flees(self.enemy.name)
-            self.end_fight()  
+            self.publish(EnemyFled, self.enemy.name)
+            self.finish(FightOutcome.ENEMY_FLED)
+            return
 
         # Perform an action and get its result
         action, result = self.enemy.perform_enemy_action(self.player)
 
         if action == EnemyActions.ATTACK:
-            self.battle_presenter.enemy_attacks(self.enemy.name, result.damage)
             self.player.lower_hp(result.damage)
 
-        if action in [EnemyActions.HURT, EnemyActions.HURTMORE]:
-            if result.reason == SpellFailureReason.ENEMY_ALREADY_SPELLSTOPPED:            
-                self.battle_presenter.enemy_casts_while_spellstopped(
-                    self.enemy.name, action.description
-                )
-            else:
+        if action in [EnemyActions.HURT, EnemyActions.HURTMORE, EnemyActions.FIRE, EnemyActions.STRONGFIRE]:
+            if result.success:
                 self.player.lower_hp(result.amount)
-                self.battle_presenter.enemy_casts_hurt(
-                    self.enemy.name, result, self.player.name
-                )
-
-        if action in [EnemyActions.FIRE, EnemyActions.STRONGFIRE]:
-            self.player.lower_hp(result.amount)
-            self.battle_presenter.enemy_breathes_fire(                
-                self.enemy.name, self.player.name, result.amount, action
-            )
 
         if action in [EnemyActions.HEAL, EnemyActions.HEALMORE]:
-            if result.reason == SpellFailureReason.ENEMY_SPELLSTOPPED:                
-                self.battle_presenter.enemy_casts_while_spellstopped(
-                    self.enemy.name, action.description
-                )
-            else:
+            if result.success:
                 self.enemy.gain_hp(result.amount)
-                self.battle_presenter.enemy_casts_heal(self.enemy.name, result.amount)
-
-        if action == EnemyActions.SLEEP:
-            if result.reason == SpellFailureReason.ENEMY_SPELLSTOPPED:
-                self.battle_presenter.enemy_casts_while_spellstopped(
-                    self.enemy.name, action.description
-                )
-            else:
-                self.battle_presenter.enemy_casts_sleep(self.enemy.name)
-
-        if action == EnemyActions.STOPSPELL:
-            if self.enemy.enemy_spell_stopped:
-                self.battle_presenter.enemy_casts_while_spellstopped(
-                    self.enemy.name, action.description
-                )            
-            else:
-                self.battle_presenter.enemy_casts_stopspell(self.enemy.name, result.success)
+
+        # Sleep and Stopspell were already applied to the player by the combat engine
+        self.publish(EnemyActed, action, result, self.enemy.name, self.player.name)
 
         self.is_player_defeated()
 
@@ -206,26 +244,45 @@ class BattleController:
 
     def is_enemy_defeated(self):
         """Checks if the enemy is defeated. Ends fight if true. Starts enemy turn if false."""
-        self.view.update_enemy_info(self.enemy)
+        if self.view is not None:
+            self.view.update_enemy_info(self.enemy)
         if self.enemy.is_defeated():
-            self.battle_presenter.player_wins(None, self.enemy.name)
-            self.end_fight()
+            self.finish(FightOutcome.PLAYER_WINS)
         else:
-            self.enemy_turn()
+            self.end_player_turn()
+
+    def end_player_turn(self):
+        self.publish(TurnEnded, "player", self.player.current_hp, self.enemy.current_hp)
+        self.phase = BattlePhase.ENEMY_TURN
+        self.run_until_input()
 
     def is_player_defeated(self):
-        self.view.update_player_info(self.player)
+        if self.view is not None:
+            self.view.update_player_info(self.player)
+        self.publish(TurnEnded, "enemy", self.player.current_hp, self.enemy.current_hp)
         if self.player.is_defeated():
-            self.battle_presenter.enemy_wins(self.enemy.name)
-            self.end_fight()
+            self.finish(FightOutcome.PLAYER_LOSES)
         else:
-            self.player_turn()
+            self.next_round()
+
+    def next_round(self):
+        self.rounds += 1
+        self.phase = BattlePhase.PLAYER_TURN
+
+    def finish(self, outcome):
+        """Ends the fight with outcome. Nothing else runs until the next fight starts"""
+        self.outcome = outcome
+        self.publish(FightEnded, outcome, self.enemy.name, self.rounds)
+        self.end_fight()
 
     def end_fight(self):
+        self.phase = BattlePhase.FIGHT_OVER
         self.enemy.current_hp = self.enemy.max_hp
         self.player.current_hp = self.player.max_hp
         self.player.current_mp = self.player.max_mp
         self.player.herb_count = 0
+        if self.view is None:
+            return
         self.view.main_frame.txt["state"] = "disabled"
         self.view.update_player_info(self.player)
         self.view.update_enemy_info(self.enemy)
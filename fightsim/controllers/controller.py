@@ -3,12 +3,16 @@
 import logging
 from ..models.enemy_data import enemy_name_to_key
 from ..models.enemy import create_enemy
+from ..sim.simulator import BattleSimulator, PlayerConfig
+
+SIMULATION_FIGHTS = 10_000
+SIMULATION_POLL_MS = 100
 
 
 class Controller:
     """ Main controller class"""
 
-    def __init__(self, game_state, view):
+    def __init__(self, game_state, view, simulation_pool=None):
         self.logger = logging.getLogger(__name__)  # Get a module-level logger
         if not game_state or not view:
             self.logger.error("Model and View are required for Controller initialization.")
@@ -16,6 +20,9 @@ class Controller:
 
         self.game_state = game_state
         self.view = view
+        self.enemy_key = None
+        self.simulation_pool = simulation_pool  # A warmed-up sim.background.SimulationPool
+        self.simulation = None  # The BackgroundBatch in flight, if any
         self.initialize_view()
    
     def initialize_view(self):
@@ -43,6 +50,7 @@ class Controller:
                 self.view.update_output(None, "You have the maximum number of herbs.")
 
         self.view.update_player_info(self.game_state.player)        
+        self.update_kill_estimate()
         self.logger.info(f"Updated {attribute_type} to {value}")
 
     def update_enemy(self, name):
@@ -50,14 +58,30 @@ class Controller:
         if name == "Select Enemy":
             self.game_state.enemy = None
         # Find the enemy
-        key = enemy_name_to_key(name)
+        key = enemy_name_to_key.get(name)
+        self.enemy_key = key
         if key:
             self.game_state.enemy = create_enemy(key, self.game_state.combat_engine)
         else:
             self.game_state.enemy = None
         
         self.view.update_enemy_info(self.game_state.enemy)
+        self.update_kill_estimate()
         self.logger.info(f"Updated enemy to {self.game_state.enemy}")
+
+    def update_kill_estimate(self):
+        """ Shows how many hits the chosen enemy takes and how many turns it needs to win, from exact kill counts """
+        player, enemy = self.game_state.player, self.game_state.enemy
+        if enemy is None:
+            self.view.setup_frame.set_kill_estimate("")
+            return
+        from ..analysis.kill_counts import hits_to_kill, turns_to_kill  # Loads numpy once an enemy is picked
+
+        constants = self.game_state.combat_engine.constants
+        hits = hits_to_kill(player, enemy, constants)
+        turns = turns_to_kill(enemy, player, constants)
+        self.view.setup_frame.set_kill_estimate(f"Hits to defeat the {enemy.name}: {hits.describe()}\n"
+                                                f"Turns for it to defeat you: {turns.describe()}")
     
 
     def initial_update(self):
@@ -75,6 +99,65 @@ class Controller:
 
     def enable_main_frame_text(self):
         self.view.main_frame.txt["state"] = 'normal'
+
+    # Background simulation
+
+    def player_config(self):
+        """ The current player setup as a PlayerConfig the simulator can rebuild in a worker """
+        player = self.game_state.player
+        return PlayerConfig(name=player.name, level=player.level, weapon=player.weapon.name,
+                            armor=player.armor.name, shield=player.shield.name, herbs=player.herb_count)
+
+    def simulate_fights(self, fights=SIMULATION_FIGHTS):
+        """ Starts playing fights against the chosen enemy on the simulation pool and polls them with after() """
+        if self.simulation is not None or self.simulation_pool is None:
+            return
+        if self.enemy_key is None:
+            self.view.update_output(None, "Select an enemy to simulate against.")
+            return
+        simulator = BattleSimulator(self.player_config(), self.enemy_key,
+                                    constants=self.game_state.combat_engine.constants)
+        self.simulation = self.simulation_pool.submit(simulator, fights)
+        self.view.setup_frame.set_simulation_status(f"Simulating 0 / {fights:,} fights", running=True)
+        self.logger.info(f"Simulating {fights} fights against {self.enemy_key}")
+        self.view.after(SIMULATION_POLL_MS, self.poll_simulation)
+
+    def poll_simulation(self):
+        simulation = self.simulation
+        if simulation is None:
+            return  # Cancelled since the last poll
+        if not simulation.poll():
+            self.view.setup_frame.set_simulation_status(
+                f"Simulating {simulation.played:,} / {simulation.fights:,} fights", running=True)
+            self.view.after(SIMULATION_POLL_MS, self.poll_simulation)
+            return
+        self.simulation = None
+        if simulation.error is not None:
+            self.logger.error(f"Simulation against {self.enemy_key} failed: {simulation.error!r}")
+            self.view.setup_frame.set_simulation_status(f"Simulation failed: {simulation.error}", running=False)
+            return
+        self.view.setup_frame.set_simulation_status("", running=False)
+        self.report_simulation(simulation.tally)
+
+    def cancel_simulation(self):
+        if self.simulation is None:
+            return
+        played = self.simulation.played
+        self.simulation.cancel()
+        self.simulation = None
+        self.view.setup_frame.set_simulation_status(f"Cancelled after {played:,} fights", running=False)
+
+    def report_simulation(self, tally):
+        """ Writes the win rate, round count and damage summary of a finished batch to the output """
+        enemy_name = self.game_state.enemy.name if self.game_state.enemy else self.enemy_key
+        self.view.update_output(None, "\n".join([
+            f"Simulated {tally.fights:,} fights against the {enemy_name}:",
+            f"  Won {tally.win_rate:.1%}, lost {tally.loss_rate:.1%}, fled {tally.flee_rate:.1%}, "
+            f"enemy fled {tally.enemy_flees / tally.fights:.1%}",
+            f"  Average rounds: {tally.mean_rounds:.1f}",
+            f"  Average damage taken: {tally.mean_damage_taken:.1f} HP",
+            f"  Average HP left after a win: {tally.mean_hp_left:.1f}",
+        ]))
    
     
     
@@ -0,0 +1,221 @@
+"""
+Vectorized versions of the CombatEngine resolution methods.
+
+Each method takes NumPy arrays (or scalars, which are broadcast) for the per-fight inputs and a numpy.random.Generator,
+and resolves one action for every fight at once. The rules, ranges and clamps are the same as the scalar
+CombatEngine; only the order the random numbers are drawn in differs. Results come back as structure-of-arrays
+dataclasses. Failure reasons are SpellFailureReason / HerbFailureReason values, with NO_REASON where the action
+succeeded.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from ..common.messages import SpellFailureReason, HerbFailureReason
+from .game_constants import GameConstants
+
+NO_REASON = 0
+
+
+@dataclass
+class AttackBatch:
+    damage: np.ndarray
+    crit: np.ndarray
+    dodge: np.ndarray
+    hit: np.ndarray
+
+
+@dataclass
+class SpellBatch:
+    success: np.ndarray
+    amount: np.ndarray
+    reason: np.ndarray
+
+
+@dataclass
+class HerbBatch:
+    success: np.ndarray
+    healing: np.ndarray
+    reason: np.ndarray
+
+
+def _draw(rng, low, high):
+    """ One uniform integer per element in [low, high], like Randomizer.randint """
+    return rng.integers(low, high, endpoint=True, dtype=np.int64)
+
+
+def _roll_at_most(rng, limit, chance, size):
+    """ Array of randint(1, limit) <= chance, the resist and dodge check used throughout the engine """
+    return _draw(rng, 1, np.full(size, limit, dtype=np.int64)) <= chance
+
+
+def _spell_batch(success, amount, reason):
+    return SpellBatch(success=success, amount=amount.astype(np.int64, copy=False), reason=reason)
+
+
+class BatchCombatEngine:
+    def __init__(self, constants=None):
+        self.constants = constants or GameConstants()
+
+    # Player Attack
+
+    def player_damage_range(self, player_attack, enemy_agility):
+        """ Array form of CombatEngine.player_damage_range. Returns (low, high) arrays. """
+        base = np.asarray(player_attack, dtype=np.int64) - np.asarray(enemy_agility, dtype=np.int64) // 2
+        return np.maximum(base // 4, 0), np.maximum(base // 2, 1)
+
+    def player_crit_range(self, player_attack):
+        """ Array form of CombatEngine.player_crit_range. Returns (low, high) arrays. """
+        player_attack = np.asarray(player_attack, dtype=np.int64)
+        return np.maximum(player_attack // 2, 0), np.maximum(player_attack, 1)
+
+    def resolve_player_attack_batch(self, player_strength, player_weapon, enemy_agility, enemy_dodge_chance,
+                                    enemy_blocks_crits, rng):
+        player_strength, player_weapon, enemy_agility, enemy_dodge_chance, enemy_blocks_crits = np.broadcast_arrays(
+            np.asarray(player_strength, dtype=np.int64), np.asarray(player_weapon, dtype=np.int64),
+            np.asarray(enemy_agility, dtype=np.int64), np.asarray(enemy_dodge_chance, dtype=np.int64),
+            np.asarray(enemy_blocks_crits, dtype=bool))
+        size = player_strength.shape
+
+        crit = ~enemy_blocks_crits & (_draw(rng, 1, np.full(size, self.constants.crit_chance)) == 1)
+        dodge = _roll_at_most(rng, self.constants.enemy_dodge_limit, enemy_dodge_chance, size)
+
+        player_attack = player_strength + player_weapon
+        normal_low, normal_high = self.player_damage_range(player_attack, enemy_agility)
+        crit_low, crit_high = self.player_crit_range(player_attack)
+        damage = _draw(rng, np.where(crit, crit_low, normal_low), np.where(crit, crit_high, normal_high))
+
+        return AttackBatch(damage=damage, crit=crit, dodge=dodge, hit=~(dodge & ~crit))
+
+    # Player Magic
+
+    def resolve_player_magic_batch(self, spell, player_mp, player_is_spellstopped):
+        player_mp, player_is_spellstopped = np.broadcast_arrays(
+            np.asarray(player_mp, dtype=np.int64), np.asarray(player_is_spellstopped, dtype=bool))
+        no_mp = player_mp < spell.value.mp_cost
+        stopped = ~no_mp & player_is_spellstopped
+        reason = np.full(player_mp.shape, NO_REASON, dtype=np.int64)
+        reason[no_mp] = SpellFailureReason.NOT_ENOUGH_MP.value
+        reason[stopped] = SpellFailureReason.PLAYER_SPELLSTOPPED.value
+        return _spell_batch(~(no_mp | stopped), np.zeros(player_mp.shape, dtype=np.int64), reason)
+
+    def player_casts_heal_batch(self, spell, heal_max, rng):
+        heal_max = np.asarray(heal_max, dtype=np.int64)
+        low, high = self.constants.heal_ranges[spell]
+        amount = np.minimum(heal_max, _draw(rng, low, np.full(heal_max.shape, high)))
+        failed = amount == 0
+        reason = np.where(failed, SpellFailureReason.HEALED_AT_MAX_HP.value, NO_REASON)
+        return _spell_batch(~failed, amount, reason)
+
+    def player_casts_hurt_batch(self, spell, enemy_hurt_resist, rng):
+        enemy_hurt_resist = np.asarray(enemy_hurt_resist, dtype=np.int64)
+        low, high = self.constants.hurt_ranges[spell]
+        amount = _draw(rng, low, np.full(enemy_hurt_resist.shape, high))
+        resisted = _roll_at_most(rng, self.constants.enemy_resist_limit, enemy_hurt_resist, enemy_hurt_resist.shape)
+        reason = np.where(resisted, SpellFailureReason.ENEMY_RESISTED_HURT.value, NO_REASON)
+        return _spell_batch(~resisted, np.where(resisted, 0, amount), reason)
+
+    def player_casts_sleep_batch(self, spell, enemy_sleep_count, enemy_sleep_resistance, rng):
+        enemy_sleep_count, enemy_sleep_resistance = np.broadcast_arrays(
+            np.asarray(enemy_sleep_count, dtype=np.int64), np.asarray(enemy_sleep_resistance, dtype=np.int64))
+        asleep = enemy_sleep_count > 0
+        resisted = ~asleep & _roll_at_most(rng, self.constants.enemy_resist_limit, enemy_sleep_resistance,
+                                           asleep.shape)
+        success = ~(asleep | resisted)
+        reason = np.full(asleep.shape, NO_REASON, dtype=np.int64)
+        reason[asleep] = SpellFailureReason.ENEMY_ALREADY_ASLEEP.value
+        reason[resisted] = SpellFailureReason.ENEMY_RESISTED_SLEEP.value
+        return _spell_batch(success, np.where(success, self.constants.enemy_sleep_rounds, 0), reason)
+
+    def player_casts_stopspell_batch(self, spell, enemy_is_spellstopped, enemy_spellstop_resistance, rng):
+        enemy_is_spellstopped, enemy_spellstop_resistance = np.broadcast_arrays(
+            np.asarray(enemy_is_spellstopped, dtype=bool), np.asarray(enemy_spellstop_resistance, dtype=np.int64))
+        resisted = ~enemy_is_spellstopped & _roll_at_most(rng, self.constants.enemy_resist_limit,
+                                                          enemy_spellstop_resistance, enemy_is_spellstopped.shape)
+        reason = np.full(resisted.shape, NO_REASON, dtype=np.int64)
+        reason[enemy_is_spellstopped] = SpellFailureReason.ENEMY_ALREADY_SPELLSTOPPED.value
+        reason[resisted] = SpellFailureReason.ENEMY_RESISTED_SPELLSTOP.value
+        return _spell_batch(~(enemy_is_spellstopped | resisted), np.zeros(resisted.shape, dtype=np.int64), reason)
+
+    # Player herbs
+
+    def resolve_herb_healing_batch(self, current_hp, max_hp, rng):
+        current_hp, max_hp = np.broadcast_arrays(np.asarray(current_hp, dtype=np.int64),
+                                                 np.asarray(max_hp, dtype=np.int64))
+        full = current_hp >= max_hp
+        low, high = self.constants.herb_range
+        healing = np.minimum(_draw(rng, low, np.full(full.shape, high)), max_hp - current_hp)
+        healing[full] = 0
+        reason = np.where(full, HerbFailureReason.MAX_HP.value, NO_REASON)
+        return HerbBatch(success=~full, healing=healing, reason=reason)
+
+    #
+    # ENEMY
+    #
+
+    def enemy_flees_batch(self, enemy_strength, player_strength, rng):
+        enemy_strength, player_strength = np.broadcast_arrays(np.asarray(enemy_strength, dtype=np.int64),
+                                                              np.asarray(player_strength, dtype=np.int64))
+        roll = _draw(rng, 1, np.full(enemy_strength.shape, self.constants.enemy_flee_limit))
+        return (player_strength > enemy_strength * 2) & (roll == 4)
+
+    def enemy_wakes_up_batch(self, size, rng):
+        return _draw(rng, 1, np.full(size, self.constants.enemy_wakeup_limit)) == 3
+
+    def weak_damage_range(self, enemy_strength):
+        """ Array form of CombatEngine.weak_damage_range """
+        enemy_strength = np.asarray(enemy_strength, dtype=np.int64)
+        return np.zeros_like(enemy_strength), (enemy_strength + 4) // 6
+
+    def normal_damage_range(self, enemy_strength, player_defense):
+        """ Array form of CombatEngine.normal_damage_range """
+        base = np.asarray(enemy_strength, dtype=np.int64) - np.asarray(player_defense, dtype=np.int64) // 2
+        return base // 4, base // 2
+
+    def resolve_enemy_attack_batch(self, enemy_strength, player_defense, rng):
+        """ Enemy attack damage for each fight. Weak attacks where the player's defense beats the enemy's strength. """
+        enemy_strength, player_defense = np.broadcast_arrays(np.asarray(enemy_strength, dtype=np.int64),
+                                                             np.asarray(player_defense, dtype=np.int64))
+        weak = player_defense > enemy_strength
+        weak_low, weak_high = self.weak_damage_range(enemy_strength)
+        normal_low, normal_high = self.normal_damage_range(enemy_strength, player_defense)
+        return _draw(rng, np.where(weak, weak_low, normal_low), np.where(weak, weak_high, normal_high))
+
+    def enemy_casts_hurt_batch(self, action, reduce_hurt_damage, enemy_spell_stopped, rng):
+        reduce_hurt_damage, enemy_spell_stopped = np.broadcast_arrays(np.asarray(reduce_hurt_damage, dtype=bool),
+                                                                      np.asarray(enemy_spell_stopped, dtype=bool))
+        hurt_high, hurt_low = self.constants.enemy_hurt_ranges[action]
+        damage = _draw(rng, np.where(reduce_hurt_damage, hurt_low[0], hurt_high[0]),
+                       np.where(reduce_hurt_damage, hurt_low[1], hurt_high[1]))
+        reason = np.where(enemy_spell_stopped, SpellFailureReason.ENEMY_SPELLSTOPPED.value, NO_REASON)
+        return _spell_batch(~enemy_spell_stopped, np.where(enemy_spell_stopped, 0, damage), reason)
+
+    def enemy_breathes_fire_batch(self, action, reduce_fire_damage, rng):
+        reduce_fire_damage = np.asarray(reduce_fire_damage, dtype=bool)
+        fire_high, fire_low = self.constants.enemy_breathes_fire_ranges[action]
+        damage = _draw(rng, np.where(reduce_fire_damage, fire_low[0], fire_high[0]),
+                       np.where(reduce_fire_damage, fire_low[1], fire_high[1]))
+        size = reduce_fire_damage.shape
+        return _spell_batch(np.ones(size, dtype=bool), damage, np.full(size, NO_REASON, dtype=np.int64))
+
+    def enemy_casts_heal_batch(self, action, is_stopped, heal_max, rng):
+        is_stopped, heal_max = np.broadcast_arrays(np.asarray(is_stopped, dtype=bool),
+                                                   np.asarray(heal_max, dtype=np.int64))
+        low, high = self.constants.enemy_heal_ranges[action]
+        amount = np.minimum(_draw(rng, low, np.full(heal_max.shape, high)), heal_max)
+        reason = np.where(is_stopped, SpellFailureReason.ENEMY_SPELLSTOPPED.value, NO_REASON)
+        return _spell_batch(~is_stopped, np.where(is_stopped, 0, amount), reason)
+
+    def enemy_casts_sleep_batch(self, is_stopped):
+        """ Sleep always lands unless the enemy is spellstopped. Success means the player falls asleep. """
+        is_stopped = np.asarray(is_stopped, dtype=bool)
+        reason = np.where(is_stopped, SpellFailureReason.ENEMY_SPELLSTOPPED.value, NO_REASON)
+        return _spell_batch(~is_stopped, np.zeros(is_stopped.shape, dtype=np.int64), reason)
+
+    def enemy_casts_stopspell_batch(self, is_stopped, rng):
+        """ Success means the player is now spellstopped """
+        is_stopped = np.asarray(is_stopped, dtype=bool)
+        lands = _draw(rng, 1, np.full(is_stopped.shape, self.constants.enemy_spellstop_limit)) == 2
+        reason = np.where(is_stopped, SpellFailureReason.ENEMY_SPELLSTOPPED.value, NO_REASON)
+        return _spell_batch(~is_stopped & lands, np.zeros(is_stopped.shape, dtype=np.int64), reason)
@@ -1,16 +1,10 @@
 from ..common.randomizer import Randomizer
-from dataclasses import dataclass
-from .spells import SpellType, SpellResult
-from ..common.messages import SpellFailureReason, HerbFailureReason, HerbResult, EnemyActions
+from .spells import SpellType
+from ..common.messages import (SpellFailureReason, HerbFailureReason, HerbResult, EnemyActions, AttackResult,
+                               SpellResult, HERB_AT_MAX_HP, RESULT_SUCCESS, RESULT_CRIT, RESULT_DODGE,
+                               REASON_SHIFT, AMOUNT_SHIFT)
 from ..models.game_constants import GameConstants
 
-@dataclass
-class AttackResult:
-    damage: int
-    crit: bool = False
-    dodge: bool = False    
-    hit: bool = True
-
 class CombatEngine:
     def __init__(self, randomizer, constants = None):
         self.randomizer = randomizer if randomizer is not None else Randomizer()
@@ -62,45 +56,45 @@ class CombatEngine:
     def resolve_player_magic(self, spell, player_mp, player_is_spellstopped):
         if player_mp < spell.value.mp_cost:
             return SpellResult(
-                spell_name=spell, success=False, amount=0, reason=SpellFailureReason.NOT_ENOUGH_MP
+                spell=spell, success=False, amount=0, reason=SpellFailureReason.NOT_ENOUGH_MP
             )
         if player_is_spellstopped:
             return SpellResult(
-                spell_name=spell, success=False, amount=0, reason=SpellFailureReason.PLAYER_SPELLSTOPPED
+                spell=spell, success=False, amount=0, reason=SpellFailureReason.PLAYER_SPELLSTOPPED
             )
-        return SpellResult(spell_name=spell, success=True, amount=0)
+        return SpellResult(spell=spell, success=True, amount=0)
 
     def player_casts_heal(self, spell, heal_max):        
         heal_amount = min(heal_max, self.randomizer.randint(*self.constants.heal_ranges[spell]))  
         if heal_amount == 0:
-            return SpellResult(spell_name=spell, success=False, amount=0, reason=SpellFailureReason.HEALED_AT_MAX_HP)
-        return SpellResult(spell_name=spell, success=True, amount=heal_amount, reason=None)
+            return SpellResult(spell=spell, success=False, amount=0, reason=SpellFailureReason.HEALED_AT_MAX_HP)
+        return SpellResult(spell=spell, success=True, amount=heal_amount, reason=None)
 
     def player_casts_hurt(self, spell, enemy_hurt_resist):
         hurt_range = self.constants.hurt_ranges[spell]
         hurt_amount = self.randomizer.randint(*hurt_range)
         if self.randomizer.randint(1, self.constants.enemy_resist_limit) <= enemy_hurt_resist:
-            return SpellResult(spell_name=spell, success=False, amount=0, reason=SpellFailureReason.ENEMY_RESISTED_HURT)
-        return SpellResult(spell_name=spell, success=True, amount=hurt_amount, reason=None)
+            return SpellResult(spell=spell, success=False, amount=0, reason=SpellFailureReason.ENEMY_RESISTED_HURT)
+        return SpellResult(spell=spell, success=True, amount=hurt_amount, reason=None)
 
     def player_casts_sleep(self, spell, enemy_sleep_count, enemy_sleep_resistance):        
         if enemy_sleep_count > 0:  # enemy already asleep
-            return SpellResult(spell_name="Sleep", success=False, reason=SpellFailureReason.ENEMY_ALREADY_ASLEEP)
+            return SpellResult(spell=spell, success=False, reason=SpellFailureReason.ENEMY_ALREADY_ASLEEP)
         if self.randomizer.randint(1, self.constants.enemy_resist_limit) <= enemy_sleep_resistance:  # enemy resists sleep
-            return SpellResult(spell_name="Sleep", success=False, reason=SpellFailureReason.ENEMY_RESISTED_SLEEP)
-        return SpellResult(spell_name=spell, success=True, amount=self.constants.enemy_sleep_rounds, reason=None)
+            return SpellResult(spell=spell, success=False, reason=SpellFailureReason.ENEMY_RESISTED_SLEEP)
+        return SpellResult(spell=spell, success=True, amount=self.constants.enemy_sleep_rounds, reason=None)
     
     def player_casts_stopspell(self, spell, enemy_is_spellstopped, enemy_spellstop_resistance):
         if enemy_is_spellstopped:
-            return SpellResult(spell_name=spell, success=False, reason=SpellFailureReason.ENEMY_ALREADY_SPELLSTOPPED)
+            return SpellResult(spell=spell, success=False, reason=SpellFailureReason.ENEMY_ALREADY_SPELLSTOPPED)
         if self.randomizer.randint(1, self.constants.enemy_resist_limit) <= enemy_spellstop_resistance:  
-            return SpellResult(spell_name="Sleep", success=False, reason=SpellFailureReason.ENEMY_RESISTED_SPELLSTOP)
-        return SpellResult(spell_name=spell, success=True, amount=0, reason=None)
+            return SpellResult(spell=spell, success=False, reason=SpellFailureReason.ENEMY_RESISTED_SPELLSTOP)
+        return SpellResult(spell=spell, success=True, amount=0, reason=None)
     
     # Player herbs
     def resolve_herb_healing(self, current_hp, max_hp):
         if current_hp >= max_hp:
-            return HerbResult(success=False, healing=0, reason=HerbFailureReason.MAX_HP)
+            return HERB_AT_MAX_HP
         herb_hp = self.randomizer.randint(*self.constants.herb_range)
         actual_hp_gained = min(herb_hp, max_hp - current_hp)
 
@@ -133,7 +127,7 @@ class CombatEngine:
     
     def enemy_casts_hurt(self, action, player_defense, enemy_spell_stopped):
         if enemy_spell_stopped:
-            return SpellResult(action.description, False, 0, SpellFailureReason.ENEMY_SPELLSTOPPED)
+            return SpellResult(action, False, 0, SpellFailureReason.ENEMY_SPELLSTOPPED)
         
         hurt_high, hurt_low = self.constants.enemy_hurt_ranges[action]
 
@@ -142,7 +136,7 @@ class CombatEngine:
         else:
             hurt_dmg = self.randomizer.randint(*hurt_high)
 
-        return SpellResult(action.description, True, hurt_dmg)
+        return SpellResult(action, True, hurt_dmg)
     
     def enemy_breathes_fire(self, action, reduce_fire_damage):        
         
@@ -153,7 +147,7 @@ class CombatEngine:
         else:
             fire_dmg = self.randomizer.randint(*fire_high)
 
-        return SpellResult(action.description, True, fire_dmg)
+        return SpellResult(action, True, fire_dmg)
     
     def enemy_casts_heal(self, action, is_stopped, heal_max):
         if is_stopped:
@@ -177,4 +171,113 @@ class CombatEngine:
         if self.randomizer.randint(1,self.constants.enemy_spellstop_limit) == 2:
             player.is_spellstopped = True
             return SpellResult(action, True, 0)        
-        return SpellResult(action, False, 0)
\ No newline at end of file
+        return SpellResult(action, False, 0)
+
+
+# Packed failure reasons, already shifted into place
+_NOT_ENOUGH_MP = SpellFailureReason.NOT_ENOUGH_MP.value << REASON_SHIFT
+_PLAYER_SPELLSTOPPED = SpellFailureReason.PLAYER_SPELLSTOPPED.value << REASON_SHIFT
+_HEALED_AT_MAX_HP = SpellFailureReason.HEALED_AT_MAX_HP.value << REASON_SHIFT
+_ENEMY_RESISTED_HURT = SpellFailureReason.ENEMY_RESISTED_HURT.value << REASON_SHIFT
+_ENEMY_ALREADY_ASLEEP = SpellFailureReason.ENEMY_ALREADY_ASLEEP.value << REASON_SHIFT
+_ENEMY_RESISTED_SLEEP = SpellFailureReason.ENEMY_RESISTED_SLEEP.value << REASON_SHIFT
+_ENEMY_ALREADY_SPELLSTOPPED = SpellFailureReason.ENEMY_ALREADY_SPELLSTOPPED.value << REASON_SHIFT
+_ENEMY_RESISTED_SPELLSTOP = SpellFailureReason.ENEMY_RESISTED_SPELLSTOP.value << REASON_SHIFT
+_ENEMY_SPELLSTOPPED = SpellFailureReason.ENEMY_SPELLSTOPPED.value << REASON_SHIFT
+_HERB_MAX_HP = HerbFailureReason.MAX_HP.value << REASON_SHIFT
+
+
+class PackedCombatEngine(CombatEngine):
+    """
+    CombatEngine for headless callers. Every method returns one packed int instead of a result object (see
+    pack_result in common.messages), so resolving an action allocates nothing. Draws the same random numbers in the
+    same order as CombatEngine, so a seeded fight plays out identically in either mode.
+    """
+
+    def resolve_player_attack(self, player_strength, player_weapon, enemy_agility, enemy_dodge_chance,
+                              enemy_blocks_crits):
+        crit = enemy_blocks_crits is False and self.player_did_crit()
+        dodge = self.enemy_did_dodge(enemy_dodge_chance)
+        damage = self.calculate_player_attack_damage(crit, enemy_agility, player_strength, player_weapon)
+        if crit:
+            return damage << AMOUNT_SHIFT | (RESULT_CRIT | RESULT_DODGE | RESULT_SUCCESS if dodge
+                                             else RESULT_CRIT | RESULT_SUCCESS)
+        return damage << AMOUNT_SHIFT | (RESULT_DODGE if dodge else RESULT_SUCCESS)
+
+    def resolve_player_magic(self, spell, player_mp, player_is_spellstopped):
+        if player_mp < spell.value.mp_cost:
+            return _NOT_ENOUGH_MP
+        if player_is_spellstopped:
+            return _PLAYER_SPELLSTOPPED
+        return RESULT_SUCCESS
+
+    def player_casts_heal(self, spell, heal_max):
+        heal_amount = min(heal_max, self.randomizer.randint(*self.constants.heal_ranges[spell]))
+        if heal_amount == 0:
+            return _HEALED_AT_MAX_HP
+        return heal_amount << AMOUNT_SHIFT | RESULT_SUCCESS
+
+    def player_casts_hurt(self, spell, enemy_hurt_resist):
+        hurt_amount = self.randomizer.randint(*self.constants.hurt_ranges[spell])
+        if self.randomizer.randint(1, self.constants.enemy_resist_limit) <= enemy_hurt_resist:
+            return _ENEMY_RESISTED_HURT
+        return hurt_amount << AMOUNT_SHIFT | RESULT_SUCCESS
+
+    def player_casts_sleep(self, spell, enemy_sleep_count, enemy_sleep_resistance):
+        if enemy_sleep_count > 0:
+            return _ENEMY_ALREADY_ASLEEP
+        if self.randomizer.randint(1, self.constants.enemy_resist_limit) <= enemy_sleep_resistance:
+            return _ENEMY_RESISTED_SLEEP
+        return self.constants.enemy_sleep_rounds << AMOUNT_SHIFT | RESULT_SUCCESS
+
+    def player_casts_stopspell(self, spell, enemy_is_spellstopped, enemy_spellstop_resistance):
+        if enemy_is_spellstopped:
+            return _ENEMY_ALREADY_SPELLSTOPPED
+        if self.randomizer.randint(1, self.constants.enemy_resist_limit) <= enemy_spellstop_resistance:
+            return _ENEMY_RESISTED_SPELLSTOP
+        return RESULT_SUCCESS
+
+    def resolve_herb_healing(self, current_hp, max_hp):
+        if current_hp >= max_hp:
+            return _HERB_MAX_HP
+        herb_hp = self.randomizer.randint(*self.constants.herb_range)
+        return min(herb_hp, max_hp - current_hp) << AMOUNT_SHIFT | RESULT_SUCCESS
+
+    def resolve_enemy_attack(self, enemy_strength, player_defense):
+        if player_defense > enemy_strength:
+            damage = self.randomizer.randint(*self.weak_damage_range(enemy_strength))
+        else:
+            damage = self.randomizer.randint(*self.normal_damage_range(enemy_strength, player_defense))
+        return damage << AMOUNT_SHIFT | RESULT_SUCCESS
+
+    def enemy_casts_hurt(self, action, player_defense, enemy_spell_stopped):
+        if enemy_spell_stopped:
+            return _ENEMY_SPELLSTOPPED
+        hurt_high, hurt_low = self.constants.enemy_hurt_ranges[action]
+        hurt_dmg = self.randomizer.randint(*(hurt_low if player_defense else hurt_high))
+        return hurt_dmg << AMOUNT_SHIFT | RESULT_SUCCESS
+
+    def enemy_breathes_fire(self, action, reduce_fire_damage):
+        fire_high, fire_low = self.constants.enemy_breathes_fire_ranges[action]
+        fire_dmg = self.randomizer.randint(*(fire_low if reduce_fire_damage else fire_high))
+        return fire_dmg << AMOUNT_SHIFT | RESULT_SUCCESS
+
+    def enemy_casts_heal(self, action, is_stopped, heal_max):
+        if is_stopped:
+            return _ENEMY_SPELLSTOPPED
+        heal_low, heal_high = self.constants.enemy_heal_ranges[action]
+        return min(self.randomizer.randint(heal_low, heal_high), heal_max) << AMOUNT_SHIFT | RESULT_SUCCESS
+
+    def enemy_casts_sleep(self, action, player, is_stopped):
+        if is_stopped:
+            return _ENEMY_SPELLSTOPPED
+        player.is_asleep = True
+        return RESULT_SUCCESS
+
+    def enemy_casts_stopspell(self, action, player, is_stopped):
+        if is_stopped:
+            return _ENEMY_SPELLSTOPPED
+        if self.randomizer.randint(1, self.constants.enemy_spellstop_limit) == 2:
+            player.is_spellstopped = True
+            return RESULT_SUCCESS
+        return 0
@@ -1,16 +1,13 @@
-import random
 from dataclasses import dataclass, field
 from typing import List
 from .enemy_data import enemy_dict
-from ..common.randomizer import Randomizer
 from .combat_engine import CombatEngine
-from ..common.messages import EnemyActions, SleepReason
-
-@dataclass
-class SleepResult:
-    success: bool
-    reason: SleepReason
+from ..common.messages import (EnemyActions, SleepReason, ENEMY_NOT_ASLEEP, ENEMY_FIRST_ROUND_ASLEEP, ENEMY_WOKE_UP,
+                               ENEMY_STILL_ASLEEP)
 
+DAMAGE_ACTIONS = (EnemyActions.ATTACK, EnemyActions.HURT, EnemyActions.FIRE, EnemyActions.HURTMORE,
+                  EnemyActions.STRONGFIRE)
+HEAL_ACTIONS = (EnemyActions.HEAL, EnemyActions.HEALMORE)
 
 
 # Enemy Class
@@ -32,7 +29,7 @@ class Enemy:
     
 
     def __post_init__(self):
-        self.max_hp = Randomizer.randint(self.base_hp[0], self.base_hp[1])
+        self.max_hp = self.combat_engine.randomizer.randint(self.base_hp[0], self.base_hp[1])
         self.current_hp = self.max_hp
         self.enemy_sleep_count = 0  # was e_sleep
         self.enemy_spell_stopped = False  # was e_stop
@@ -68,14 +65,15 @@ class Enemy:
 
     def choose_enemy_action(self, player): 
         choice = None
+        randomizer = self.combat_engine.randomizer
         for item in self.pattern:
             chance = item["weight"]
-            if random.randint(1, 100) <= chance:
+            if randomizer.randint(1, 100) <= chance:
                 action = item["id"]
-                if action in [EnemyActions.ATTACK, EnemyActions.HURT, EnemyActions.FIRE, EnemyActions.HURTMORE, EnemyActions.STRONGFIRE]:
+                if action in DAMAGE_ACTIONS:
                     choice = action
                     break
-                if action in [EnemyActions.HEAL, EnemyActions.HEALMORE] and self.trigger_healing(): # Won't always heal
+                if action in HEAL_ACTIONS and self.trigger_healing(): # Won't always heal
                     choice = action
                     break
                 if action == EnemyActions.SLEEP and not player.is_asleep: # Don't cast sleep if player is asleep. Smart monsters.
@@ -91,7 +89,7 @@ class Enemy:
         
     def reset_battle_state(self):
         """Resets the enemy's mutable state back to default for a new battle."""
-        self.max_hp = Randomizer.randint(self.base_hp[0], self.base_hp[1])
+        self.max_hp = self.combat_engine.randomizer.randint(self.base_hp[0], self.base_hp[1])
         self.current_hp = self.max_hp
         self.enemy_sleep_count = 0
         self.enemy_spell_stopped = False    
@@ -102,19 +100,19 @@ class Enemy:
 
     def process_enemy_sleep(self):
         if self.enemy_sleep_count <= 0:
-            return SleepResult(success=False, reason=SleepReason.NOT_ASLEEP)
+            return ENEMY_NOT_ASLEEP
         if self.enemy_sleep_count == 2:
             self.enemy_sleep_count -= 1
-            return SleepResult(success=True, reason=SleepReason.FIRST_ROUND_ENEMY_ASLEEP)
+            return ENEMY_FIRST_ROUND_ASLEEP
         return self.check_for_wake_up()        
 
     def check_for_wake_up(self):
         """ Determines if the enemy wakes up or not """
         if self.combat_engine.enemy_wakes_up():
             self.enemy_sleep_count = 0
-            return SleepResult(success=False, reason=SleepReason.ENEMY_WAKES_UP)
+            return ENEMY_WOKE_UP
         else:
-            return SleepResult(success=True, reason=SleepReason.ENEMY_ASLEEP)
+            return ENEMY_STILL_ASLEEP
 
     def does_flee(self, player_strength):
         return self.combat_engine.enemy_flees(self.strength, player_strength)
@@ -0,0 +1,135 @@
+"""
+Structure-of-arrays view of enemy_dict for batch and exact engines.
+
+compile_roster() flattens the enemy dictionaries into one numpy array per stat, indexed by enemy id (the position of
+the key in enemy_dict). Attack patterns are stored in CSR layout: the pattern of enemy i is
+pattern_actions[pattern_offsets[i]:pattern_offsets[i + 1]], with the matching pattern_weights. Actions are stored
+as EnemyActions values. Missing entries take the defaults of the Enemy dataclass, so a roster row always describes
+the same enemy create_enemy would build.
+"""
+
+from dataclasses import MISSING, dataclass, fields
+from functools import lru_cache
+
+import numpy as np
+
+from ..common.messages import EnemyActions
+from .enemy import Enemy
+from .enemy_data import enemy_dict
+
+STAT_COLUMNS = ("strength", "agility", "dodge", "sleep_resist", "stopspell_resist", "hurt_resist", "run")
+DAMAGE_ACTION_CODES = np.array([action.value for action in (EnemyActions.ATTACK, EnemyActions.HURT, EnemyActions.FIRE,
+                                                            EnemyActions.HURTMORE, EnemyActions.STRONGFIRE)])
+HEAL_ACTION_CODES = np.array([EnemyActions.HEAL.value, EnemyActions.HEALMORE.value])
+NO_ACTION = 0
+
+
+def _enemy_defaults():
+    """ Default values of the optional Enemy fields """
+    defaults = {}
+    for enemy_field in fields(Enemy):
+        if enemy_field.default is not MISSING:
+            defaults[enemy_field.name] = enemy_field.default
+        elif enemy_field.default_factory is not MISSING:
+            defaults[enemy_field.name] = enemy_field.default_factory()
+    return defaults
+
+
+@dataclass(frozen=True, eq=False)
+class EnemyRoster:
+    keys: tuple
+    names: tuple
+    strength: np.ndarray
+    agility: np.ndarray
+    hp_min: np.ndarray
+    hp_max: np.ndarray
+    dodge: np.ndarray
+    sleep_resist: np.ndarray
+    stopspell_resist: np.ndarray
+    hurt_resist: np.ndarray
+    run: np.ndarray
+    void_critical_hit: np.ndarray
+    pattern_offsets: np.ndarray
+    pattern_actions: np.ndarray
+    pattern_weights: np.ndarray
+
+    def __len__(self):
+        return len(self.keys)
+
+    def index(self, key):
+        """ Enemy id of an enemy_dict key """
+        try:
+            return self.keys.index(key)
+        except ValueError:
+            raise ValueError(f"Unknown enemy: {key}") from None
+
+    def ids(self, keys):
+        return np.array([self.index(key) for key in keys], dtype=np.intp)
+
+    def pattern(self, enemy_id):
+        """ (actions, weights) of one enemy's attack pattern """
+        start, end = self.pattern_offsets[enemy_id], self.pattern_offsets[enemy_id + 1]
+        return self.pattern_actions[start:end], self.pattern_weights[start:end]
+
+    def subset(self, ids):
+        """ A roster of just the given enemy ids, in that order """
+        ids = np.asarray(ids, dtype=np.intp)
+        lengths = np.diff(self.pattern_offsets)[ids]
+        offsets = np.zeros(len(ids) + 1, dtype=self.pattern_offsets.dtype)
+        np.cumsum(lengths, out=offsets[1:])
+        rows = [np.arange(self.pattern_offsets[i], self.pattern_offsets[i + 1]) for i in ids]
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.intp)
+        columns = {column: getattr(self, column)[ids] for column in
+                   STAT_COLUMNS + ("hp_min", "hp_max", "void_critical_hit")}
+        return EnemyRoster(keys=tuple(self.keys[i] for i in ids), names=tuple(self.names[i] for i in ids),
+                           pattern_offsets=offsets, pattern_actions=self.pattern_actions[rows],
+                           pattern_weights=self.pattern_weights[rows], **columns)
+
+    def choose_actions(self, ids, heal_triggered, player_asleep, player_stopped, rng):
+        """
+        Vectorized Enemy.choose_enemy_action for a batch of fights. ids holds each fight's enemy id, the flags are
+        boolean arrays (or scalars) and rng a numpy Generator. Returns EnemyActions values.
+        """
+        ids = np.asarray(ids, dtype=np.intp)
+        starts = self.pattern_offsets[ids]
+        lengths = self.pattern_offsets[ids + 1] - starts
+        choice = np.full(len(ids), NO_ACTION, dtype=self.pattern_actions.dtype)
+        for slot in range(int(lengths.max(initial=0))):
+            undecided = (choice == NO_ACTION) & (slot < lengths)
+            position = np.where(undecided, starts + slot, 0)
+            action = self.pattern_actions[position]
+            fires = undecided & (rng.integers(1, 100, size=len(ids), endpoint=True) <= self.pattern_weights[position])
+            allowed = (np.isin(action, DAMAGE_ACTION_CODES)
+                       | (np.isin(action, HEAL_ACTION_CODES) & heal_triggered)
+                       | ((action == EnemyActions.SLEEP.value) & ~np.asarray(player_asleep, dtype=bool))
+                       | ((action == EnemyActions.STOPSPELL.value) & ~np.asarray(player_stopped, dtype=bool)))
+            choice = np.where(fires & allowed, action, choice)
+        choice[choice == NO_ACTION] = EnemyActions.ATTACK.value
+        return choice
+
+
+def compile_roster(enemies=None):
+    """ Builds an EnemyRoster from enemy dictionaries shaped like enemy_dict """
+    enemies = enemy_dict if enemies is None else enemies
+    defaults = _enemy_defaults()
+    rows = [{**defaults, **data} for data in enemies.values()]
+
+    columns = {column: np.array([row[column] for row in rows], dtype=np.int16) for column in STAT_COLUMNS}
+    patterns = [row["pattern"] for row in rows]
+    offsets = np.zeros(len(rows) + 1, dtype=np.int32)
+    np.cumsum([len(pattern) for pattern in patterns], out=offsets[1:])
+    return EnemyRoster(
+        keys=tuple(enemies), names=tuple(row["name"] for row in rows),
+        hp_min=np.array([row["base_hp"][0] for row in rows], dtype=np.int16),
+        hp_max=np.array([row["base_hp"][1] for row in rows], dtype=np.int16),
+        void_critical_hit=np.array([row["void_critical_hit"] for row in rows], dtype=bool),
+        pattern_offsets=offsets,
+        pattern_actions=np.array([item["id"].value for pattern in patterns for item in pattern], dtype=np.uint8),
+        pattern_weights=np.array([item["weight"] for pattern in patterns for item in pattern], dtype=np.uint8),
+        **columns)
+
+
+@lru_cache(maxsize=1)
+def default_roster():
+    """ The roster for enemy_dict, compiled once """
+    return compile_roster()
@@ -24,7 +24,7 @@ class GameConstants:
         EnemyActions.HURTMORE: ([30,45], [20,30])
     })
     enemy_breathes_fire_ranges: dict = field(default_factory=lambda: {
-        EnemyActions.FIRE: ([16,23], [10,4]),
+        EnemyActions.FIRE: ([16,23], [10,14]),
         EnemyActions.STRONGFIRE: ([65,72], [42,48])
     })
     enemy_heal_ranges: dict = field(default_factory=lambda: {
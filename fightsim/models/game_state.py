@@ -10,6 +10,6 @@ from fightsim.models.combat_engine import CombatEngine
 class GameState:
     """ Shared state container for game """
     player: Player
-    enemy: Optional[Enemy] = None
     combat_engine: CombatEngine
+    enemy: Optional[Enemy] = None
     
\ No newline at end of file
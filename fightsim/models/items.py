@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from enum import Enum
+from typing import Optional
 
 
 class ItemType(Enum):
@@ -14,6 +15,7 @@ class Item:
     item_type: ItemType
     reduce_hurt_damage: bool = False
     reduce_fire_damage: bool = False
+    price: Optional[int] = None  # Gold in the shops. None for items that can't be bought
 
     def describe(self) -> str:
         return f"{self.name} (Modifier: {self.modifier})"
@@ -25,32 +27,40 @@ def create_item(item_type: ItemType, item_name: str, item_data: dict) -> Item:
         modifier=item_data["modifier"],
         item_type=item_type,
         reduce_hurt_damage=item_data.get("reduce_hurt_damage", False),
-        reduce_fire_damage=item_data.get("reduce_fire_damage", False)
+        reduce_fire_damage=item_data.get("reduce_fire_damage", False),
+        price=item_data.get("price")
     )
 
 
 item_data = {
     "weapons": {
         "Unarmed": {
-            "modifier": 0
+            "modifier": 0,
+            "price": 0
         },
         "Bamboo Pole": {
-            "modifier": 2
+            "modifier": 2,
+            "price": 10
         },
         "Club": {
-            "modifier": 4
+            "modifier": 4,
+            "price": 60
         },
         "Copper Sword": {
-            "modifier": 10
+            "modifier": 10,
+            "price": 180
         },
         "Hand Axe": {
-            "modifier": 15
+            "modifier": 15,
+            "price": 560
         },
         "Broad Sword": {
-            "modifier": 20
+            "modifier": 20,
+            "price": 1500
         },
         "Flame Sword": {
-            "modifier": 28
+            "modifier": 28,
+            "price": 9800
         },
         "Edrick's Sword": {
             "modifier": 40
@@ -58,26 +68,33 @@ item_data = {
     },
     "armors": {
         "Naked": {
-            "modifier": 0
+            "modifier": 0,
+            "price": 0
         },
         "Clothes": {
-            "modifier": 2
+            "modifier": 2,
+            "price": 20
         },
         "Leather Armor": {
-            "modifier": 4
+            "modifier": 4,
+            "price": 70
         },
         "Chain Mail": {
-            "modifier": 10
+            "modifier": 10,
+            "price": 300
         },
         "Half Plate": {
-            "modifier": 16
+            "modifier": 16,
+            "price": 1000
         },
         "Full Plate": {
-            "modifier": 24
+            "modifier": 24,
+            "price": 3000
         },
         "Magic Armor": {
             "modifier": 2,
-            "reduce_hurt_damage": True
+            "reduce_hurt_damage": True,
+            "price": 7700
         },
         "Edrick's Armor": {
             "modifier": 2,
@@ -87,16 +104,20 @@ item_data = {
     },
     "shields": {
         "No Shield": {
-            "modifier": 0
+            "modifier": 0,
+            "price": 0
         },
         "Small Shield": {
-            "modifier": 4
+            "modifier": 4,
+            "price": 90
         },
         "Large Shield": {
-            "modifier": 10
+            "modifier": 10,
+            "price": 800
         },
         "Silver Shield": {
-            "modifier": 25
+            "modifier": 25,
+            "price": 14800
         }
     }
 }
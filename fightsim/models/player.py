@@ -5,7 +5,8 @@ Player class
 from typing import List, Optional
 from dataclasses import dataclass, field
 from fightsim.models.items import Item, ItemType, items
-from ..common.messages import SpellFailureReason, HerbFailureReason, HerbResult
+from ..common.messages import (SpellFailureReason, HerbFailureReason, HerbResult, NO_HERBS_LEFT, PLAYER_AWAKE,
+                               PLAYER_WOKE_UP, PLAYER_STILL_ASLEEP)
 from .player_leveling import _Levelling
 from ..common.randomizer import Randomizer
 from .spells import SpellType
@@ -15,20 +16,6 @@ CRIT_CHANCE: int = 32
 SLEEP_COUNT: int = 6
 
 
-@dataclass
-class AttackResult:
-    crit: bool
-    dodge: bool
-    damage: int
-    hit: bool
-
-@dataclass
-class SleepResult:
-    still_asleep: bool
-    just_woke_up: bool
-
-
-
 @dataclass
 class Player:
     name: str = "Rollo"
@@ -81,7 +68,7 @@ class Player:
 
     def recalculate_stats(self):
 
-        self.strength, self.agility, self.max_hp, self.max_hp = (
+        self.strength, self.agility, self.max_hp, self.max_mp = (
             self.leveler.adjust_stats(self.level, self.name)
         )
         self.current_hp = self.max_hp
@@ -141,7 +128,7 @@ class Player:
 
     def use_herb(self):
         if not self.has_herbs():
-            return HerbResult(success=False, healing=0, reason=HerbFailureReason.NO_HERBS)
+            return NO_HERBS_LEFT
         result = self.combat_engine.resolve_herb_healing(
             current_hp = self.current_hp,
             max_hp = self.max_hp
@@ -175,7 +162,7 @@ class Player:
                 spell, enemy.enemy_sleep_count, enemy.sleep_resist
             ),
             SpellType.STOPSPELL: lambda: combat_engine.player_casts_stopspell(
-                spell, enemy.enemy_spell_stopped, enemy.enemy_stopspell_resist
+                spell, enemy.enemy_spell_stopped, enemy.stopspell_resist
             ),
         }
 
@@ -191,7 +178,7 @@ class Player:
 
         self.current_mp -= spell.value.mp_cost
         spell_function = spell_switch.get(spell, lambda: None)
-        spell_function()
+        return spell_function()
 
     # Handle player's sleep status
 
@@ -200,15 +187,15 @@ class Player:
         Returns the status of the player's sleep
         """
         if not self.is_asleep:
-            return SleepResult(still_asleep=False, just_woke_up=False)
+            return PLAYER_AWAKE
         else:
             self.sleep_count -= 1
             if self.randomizer.randint(1, 2) == 2 or self.sleep_count <= 0:
                 self.is_asleep = False
                 self.sleep_count = 6
-                return SleepResult(still_asleep=False, just_woke_up=True)
+                return PLAYER_WOKE_UP
             else:
-                return SleepResult(still_asleep=True, just_woke_up=False)
+                return PLAYER_STILL_ASLEEP
 
     # Handle fleeing
 
@@ -251,6 +238,6 @@ def player_factory(combat_engine):
     Returns a player
     """
     return Player(
-        randomizer=Randomizer(),
+        randomizer=combat_engine.randomizer,
         combat_engine=combat_engine        
     )
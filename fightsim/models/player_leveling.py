@@ -1,5 +1,78 @@
+from functools import lru_cache
 from math import floor
 
+# Base strength, agility, max HP and max MP for levels 1 to 30
+LEVEL_STATS = (
+    (4, 4, 15, 0),
+    (5, 4, 22, 0),
+    (7, 6, 24, 5),
+    (7, 8, 31, 16),
+    (12, 10, 35, 20),
+    (16, 10, 38, 24),
+    (18, 17, 40, 26),
+    (22, 20, 46, 29),
+    (30, 22, 50, 36),
+    (35, 31, 54, 40),
+    (40, 35, 62, 50),
+    (48, 40, 63, 58),
+    (52, 48, 70, 64),
+    (60, 55, 78, 70),
+    (68, 64, 86, 72),
+    (72, 70, 92, 95),
+    (72, 78, 100, 100),
+    (85, 84, 115, 108),
+    (87, 86, 130, 115),
+    (92, 88, 138, 128),
+    (95, 90, 149, 135),
+    (97, 90, 158, 146),
+    (99, 94, 165, 153),
+    (103, 98, 170, 161),
+    (113, 100, 174, 161),
+    (117, 105, 180, 168),
+    (125, 107, 189, 175),
+    (130, 115, 195, 180),
+    (135, 120, 200, 190),
+    (140, 130, 210, 200)
+)
+
+LETTER_CLUSTERS = ("gwM", "hxN", "iyO", "jzP", "kAQ", "lBR", "mCS", "nDT", "oEU", "pFV", "aqGW",
+                   "brHX", "csIY", "dtJZ", "euK", "fvL")
+# Letter value lookup. Letters outside every cluster count as 0.
+LETTER_VALUES = {letter: index for index, cluster in enumerate(LETTER_CLUSTERS) for letter in cluster}
+NAME_LETTERS = 4
+MAX_NAME_SUM = NAME_LETTERS * (len(LETTER_CLUSTERS) - 1)
+PROGRESSIONS = 4
+
+
+def _slow_progression(name_sum, stat):
+    return floor(stat * (9 / 10) + (floor(name_sum / 4) % 4))
+
+
+def _progression_stats(progression, name_sum, level_base):
+    """ Applies one of the four progression types to a level's base stats """
+    strength, agility, max_hp, max_mp = level_base
+    if progression == 0:
+        return (_slow_progression(name_sum, strength), _slow_progression(name_sum, agility), max_hp, max_mp)
+    if progression == 1:
+        return (strength, _slow_progression(name_sum, agility), max_hp, _slow_progression(name_sum, max_mp))
+    if progression == 2:
+        return (_slow_progression(name_sum, strength), agility, _slow_progression(name_sum, max_hp), max_mp)
+    return (strength, agility, _slow_progression(name_sum, max_hp), _slow_progression(name_sum, max_mp))
+
+
+# STAT_TABLE[progression][name_sum][level - 1] is the (strength, agility, max_hp, max_mp) tuple for that class
+STAT_TABLE = tuple(
+    tuple(tuple(_progression_stats(progression, name_sum, level_base) for level_base in LEVEL_STATS)
+          for name_sum in range(MAX_NAME_SUM + 1))
+    for progression in range(PROGRESSIONS)
+)
+
+
+@lru_cache(maxsize=1024)
+def name_sum(name):
+    """ Sum of the letter values of the first four letters of a name """
+    return sum(LETTER_VALUES.get(letter, 0) for letter in name[0:NAME_LETTERS])
+
 
 class _Levelling:
     """
@@ -7,38 +80,7 @@ class _Levelling:
     """
     def __init__(self):
         # level_stats holds the base leveling data for the player
-        self.level_stats = [
-            [4, 4, 15, 0],
-            [5, 4, 22, 0],
-            [7, 6, 24, 5],
-            [7, 8, 31, 16],
-            [12, 10, 35, 20],
-            [16, 10, 38, 24],
-            [18, 17, 40, 26],
-            [22, 20, 46, 29],
-            [30, 22, 50, 36],
-            [35, 31, 54, 40],
-            [40, 35, 62, 50],
-            [48, 40, 63, 58],
-            [52, 48, 70, 64],
-            [60, 55, 78, 70],
-            [68, 64, 86, 72],
-            [72, 70, 92, 95],
-            [72, 78, 100, 100],
-            [85, 84, 115, 108],
-            [87, 86, 130, 115],
-            [92, 88, 138, 128],
-            [95, 90, 149, 135],
-            [97, 90, 158, 146],
-            [99, 94, 165, 153],
-            [103, 98, 170, 161],
-            [113, 100, 174, 161],
-            [117, 105, 180, 168],
-            [125, 107, 189, 175],
-            [130, 115, 195, 180],
-            [135, 120, 200, 190],
-            [140, 130, 210, 200]
-        ]
+        self.level_stats = LEVEL_STATS
         self.name_sum = 0
 
     @staticmethod
@@ -47,55 +89,39 @@ class _Levelling:
         Formula for the slower progression of stats. Takes the name_sum and the stat base for a particular level
         and calculates the true value using this formula.
         """
-        return floor(stat * (9 / 10) + (floor(name_sum / 4) % 4))
+        return _slow_progression(name_sum, stat)
 
     @staticmethod
     def calculate_letter_stat(ltr):
         """
         Calculates letter values of the name for stat calculations
         """
-        ltr_clusters = ["gwM", "hxN", "iyO", "jzP", "kAQ", "lBR", "mCS", "nDT", "oEU", "pFV", "aqGW",
-                        "brHX", "csIY", "dtJZ", "euK", "fvL"]
-        for index, cluster in enumerate(ltr_clusters):
-            if ltr in cluster:
-                return index
-        return 0
+        return LETTER_VALUES.get(ltr, 0)
 
     def progress_mods(self, name):
         """
         Calculate name_sum and progression modifier
         """
-        letters = name[0:4]
-        return sum(map(self.calculate_letter_stat, letters)), floor(self.name_sum % 4)
+        return name_sum(name), floor(self.name_sum % 4)
 
     def adjust_stats(self, level, name):
         """
         Main level up function
 
-        The function reads the new level, recalculates the name_sum and progression path
-        Then uses the right level_base to adjust the stats of the player.
+        Looks up the stats for the level, name_sum and progression path in the precomputed STAT_TABLE.
         """
-        level_base = self.level_stats[level - 1]
-        name_sum, progression = self.progress_mods(name)
-        # Four types of progression
-        if progression == 0:
-            strength = self.calculate_slow_progression(name_sum, level_base[0])
-            agility = self.calculate_slow_progression(name_sum, level_base[1])
-            max_hp = level_base[2]
-            max_mp = level_base[3]
-        elif progression == 1:
-            strength = level_base[0]
-            agility = self.calculate_slow_progression(name_sum, level_base[1])
-            max_hp = level_base[2]
-            max_mp = self.calculate_slow_progression(name_sum, level_base[3])
-        elif progression == 2:
-            strength = self.calculate_slow_progression(name_sum, level_base[0])
-            agility = level_base[1]
-            max_hp = self.calculate_slow_progression(name_sum, level_base[2])
-            max_mp = level_base[3]
-        else:
-            strength = level_base[0]
-            agility = level_base[1]
-            max_hp = self.calculate_slow_progression(name_sum, level_base[2])
-            max_mp = self.calculate_slow_progression(name_sum, level_base[3])
-        return strength, agility, max_hp, max_mp
+        total, progression = self.progress_mods(name)
+        return STAT_TABLE[progression][total][level - 1]
+
+    def stat_grid(self, levels, names):
+        """
+        Stats for every level and name pair as one array of shape (len(levels), len(names), 4), with the last axis
+        holding strength, agility, max_hp and max_mp.
+        """
+        import numpy as np  # Only needed for grids; keeps numpy out of the GUI's start-up
+
+        table = np.array(STAT_TABLE, dtype=np.int16)
+        sums, progressions = zip(*(self.progress_mods(name) for name in names)) if names else ((), ())
+        level_index = np.asarray(levels, dtype=np.intp)[:, None] - 1
+        return table[np.asarray(progressions, dtype=np.intp)[None, :], np.asarray(sums, dtype=np.intp)[None, :],
+                     level_index]
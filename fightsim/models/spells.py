@@ -18,10 +18,3 @@ class SpellType(Enum):
     HURTMORE = SpellData("Hurtmore", 5, 19)
     SLEEP = SpellData("Sleep", 2, 7)
     STOPSPELL = SpellData("Stopspell", 2, 10)
-
-@dataclass
-class SpellResult:
-    spell_name: str
-    success: bool
-    amount: int = 0
-    reason: Optional[SpellFailureReason] = None
\ No newline at end of file
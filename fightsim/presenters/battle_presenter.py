@@ -1,164 +1,150 @@
-from ..common.messages import EnemyActions, SpellFailureReason
-
-class BattlePresenter:
-    def __init__(self, view):
-        self.view = view
-
-    def attack_result(self, result, enemy_name):    
-        message = ""
-        if result.crit:
-            message += f"\nYou attack with an excellent attack!!\n"
-        else:
-            message += f"\nYou attack!\n"
-
-        if result.dodge and not result.crit:
-            message += f"But the {enemy_name} dodged your attack!\n"
-        else:
-            message += f"You hit {enemy_name} for {result.damage} points of damage!\n"
-        self.view.update_output(None, message)
-    
-    def start_fight_msg(self, _, enemy_name):
-        self.view.main_frame.txt["state"] = 'normal'
-        message = f"""You are fighting the {enemy_name}!\n"""
-        self.view.update_output(None, message)
-        
-
-    def player_surprised(self, _, enemy_name):
-        message = f"""The {enemy_name} surprises you! They attack first!\n"""
-        self.view.update_output(None, message)
-
-    def player_wins(self, _, enemy_name):
-        message = f"""You have defeated the {enemy_name}!\n"""
-        self.view.update_output(None, message)
-
-    def no_herbs(self):
-        message = "You have no herbs!\n"
-        self.view.update_output(None, message)
-
-    def eat_herb_at_full_hp(self):
-        message = "You eat a herb, but your hit points are already at maximum!\n"
-        self.view.update_output(None, message)
-
-    def eat_herb(self, _, heal_amt):
-        message = f"""You eat a herb and regain {heal_amt} hit points!\n"""
-        self.view.update_output(None, message)
-
-    def fleeing(self, succeed, enemy_name):
-        self.view.update_output(None, f"You attempt to run away...\n")
-        if succeed:
-            self.view.update_output(None, f"You successfully flee!\n")
-        else:
-            self.view.update_output(None, f"""...but the {enemy_name} blocks you from running away!\n""")
-
-    def no_spell_selected(self, spell):
-        if spell == "Select Spell":
-            self.view.update_output(None, "You must select a valid spell first.\n")
-        else:
-            self.view.update_output(None, "Your level is too low to cast magic.\n")
-
-    def player_spell_failed(self, result, enemy_name):
-        if result.reason == SpellFailureReason.NOT_ENOUGH_MP:
-            self.view.update_output(None, f"Player tries to cast {result.spell_name}, but doesn't have enough MP!\n")
-        elif result.reason == SpellFailureReason.PLAYER_SPELLSTOPPED:
-            self.view.update_output(None, f"""Player casts {result.spell_name}, but their magic has been sealed!\n""")
-        elif result.reason == SpellFailureReason.HEALED_AT_MAX_HP:
-            self.view.update_output(None, f"""Player casts {result.spell_name}, but their hit points were already at maximum!\n""")
-        elif result.reason == SpellFailureReason.ENEMY_RESISTED_HURT:
-            self.view.update_output(None, f"""Player casts {result.spell_name}, but the enemy resisted!\n""")
-        elif result.reason == SpellFailureReason.ENEMY_ALREADY_ASLEEP:
-            self.view.update_output(None, f"""Player casts Sleep! But the {enemy_name} is already asleep!\n""")
-        elif result.reason == SpellFailureReason.ENEMY_RESISTED_SLEEP:
-            self.view.update_output(None, f"""Player casts Sleep! But the {enemy_name} resisted!\n""")
-        elif result.reason == SpellFailureReason.ENEMY_ALREADY_SPELLSTOPPED:
-            self.view.update_output(None, f"""Player casts Stopspell! But the {enemy_name}'s magic was already blocked!\n""")
-        elif result.reason == SpellFailureReason.ENEMY_RESISTED_SPELLSTOP:
-            self.view.update_output(None, f"""Player casts Stopspell! But the {enemy_name} resisted!\n""")
-
-
-    def player_casts_heal(self, spell, amount):
-        self.view.update_output(None, f"""Player casts {spell.name}! Player is healed {str(amount)} hit points!\n""")
-
-    def player_casts_hurt(self, spell, enemy_name, amount):
-        self.view.update_output(None, f"""Player casts {spell.name}! {enemy_name} is hurt by {str(amount)} hit points!\n""")
-
-    def enemy_now_asleep(self, enemy_name):
-        self.view.update_output(None, f"""Player casts Sleep! The {enemy_name} is now asleep!\n""")
-
-    def enemy_now_spell_stopped(self, enemy_name):
-        self.view.update_output(None, f"""Player casts Stopspell! The {enemy_name}'s magic is now blocked!!\n""")
-    
-    def player_is_sleeping(self):
-        self.view.update_output(None, "You're still asleep...'\n")
-
-    def player_woke_up(self):
-        self.view.update_output(None, "You wake up!\n")
-
-    def enemy_is_sleeping(self, enemy_name):
-        self.view.update_output(None, f"The {enemy_name} is asleep...")
-    
-    def enemy_is_still_sleeping(self, enemy_name):
-        self.view.update_output(None, f"The {enemy_name} is still asleep...")
-    
-    def enemy_woke_up(self, enemy_name):
-        self.view.update_output(None, f"The {enemy_name} woke up!")
-
-    def enemy_flees(self, enemy_name):
-        self.view.update_output(None, f"The {enemy_name} flees the battlefield!")
-    
-    def enemy_attacks(self, enemy_name, amount):
-        self.view.update_output(None, f"{enemy_name} attacks! {enemy_name} hits you for {amount} damage.\n")
-
-    def enemy_wins(self, enemy_name):
-        self.view.update_output(None, f"You have been defeated by the {enemy_name}!\n")
-
-    def enemy_casts_while_spellstopped(self, enemy_name, spell):
-        spell_name = ""
-        if spell == EnemyActions.HURT:
-            spell_name = "Hurt"
-        if spell == EnemyActions.HURTMORE:
-            spell_name = "Hurtmore"
-        if spell == EnemyActions.HEAL:
-            spell_name = "Heal"
-        if spell == EnemyActions.HEALMORE:
-            spell_name = "Healmore"
-        if spell == EnemyActions.SLEEP:
-            spell_name = "Sleep"
-        if spell == EnemyActions.STOPSPELL:
-            spell_name = "Stopspell"
-        self.view.update_output(f"""The {enemy_name} casts {spell_name}, but their spell has been blocked!""")
-
-    def enemy_casts_hurt(self, enemy_name, result, player_name):
-        spell_name = ""
-        damage = result[1]
-        if result[0] == EnemyActions.HURT:
-            spell_name = "Hurt"
-        if result[0] == EnemyActions.HURTMORE:
-            spell_name = "Hurtmore"
-        self.view.update_output(f"""The {enemy_name} casts {spell_name}! {player_name} is hurt for {damage} damage!""")
-
-    def enemy_breathes_fire(self, enemy_name, player_name, amount, action):
-        spell_name = ""
-        
-        if action == EnemyActions.FIRE:
-            spell_name = "fire"
-        if action == EnemyActions.STRONGFIRE:
-            spell_name = "strong flames at you!"
-        self.view.update_output(f"""The {enemy_name} breathes {spell_name}! {player_name} is hurt for {amount} damage!""")
-
-    def enemy_casts_heal(self, enemy_name, result):
-        spell_name = ""
-        heal_amt = result[1]
-        if result[0] == EnemyActions.HEAL:
-            spell_name = "Heal"
-        if result[0] == EnemyActions.HEALMORE:
-            spell_name = "Healmore"
-        self.view.update_output(f"""The {enemy_name} casts {spell_name}! {enemy_name} is healed {heal_amt} hit points!""")
-
-    def enemy_casts_sleep(self, enemy_name):
-        self.view.update_output(f"""The {enemy_name} casts Sleep. You fall asleep!!""")
-
-    def enemy_casts_stopspell(self, enemy_name, result):
-        if result is False:
-            self.view.update_output(f"""The {enemy_name} casts Spellstop, but the spell fails!""")
-        else:
-            self.view.update_output(f"""The {enemy_name} casts Spellstop. Your magic has been blocked!""")
\ No newline at end of file
+from ..common.events import (EnemyActed, EnemyFled, EnemySleepChecked, FightEnded, FightStarted, FleeAttempted,
+                             HerbUsed, NoSpellSelected, PlayerAttacked, PlayerSleepChecked, PlayerSurprised, SpellCast)
+from ..common.messages import (EnemyActions, FightOutcome, HerbFailureReason, SleepReason, SpellFailureReason)
+from ..models.spells import SpellType
+
+class BattlePresenter:
+    """ Turns battle events into text for the output window. Subscribe it to the controller's EventBus. """
+
+    def __init__(self, view):
+        self.view = view
+
+    def subscribe(self, events):
+        handlers = {
+            FightStarted: self.start_fight_msg,
+            PlayerSurprised: self.player_surprised,
+            PlayerSleepChecked: self.player_sleep,
+            PlayerAttacked: self.attack_result,
+            HerbUsed: self.herb_used,
+            FleeAttempted: self.fleeing,
+            NoSpellSelected: self.no_spell_selected,
+            SpellCast: self.spell_cast,
+            EnemySleepChecked: self.enemy_sleep,
+            EnemyFled: self.enemy_flees,
+            EnemyActed: self.enemy_acted,
+            FightEnded: self.fight_ended,
+        }
+        for event_type, handler in handlers.items():
+            events.subscribe(handler, event_type)
+
+    def output(self, event, message):
+        self.view.update_output(event, message)
+
+    def attack_result(self, event):
+        result, enemy_name = event.result, event.enemy_name
+        message = ""
+        if result.crit:
+            message += f"\nYou attack with an excellent attack!!\n"
+        else:
+            message += f"\nYou attack!\n"
+
+        if result.dodge and not result.crit:
+            message += f"But the {enemy_name} dodged your attack!\n"
+        else:
+            message += f"You hit {enemy_name} for {result.damage} points of damage!\n"
+        self.output(event, message)
+    
+    def start_fight_msg(self, event):
+        self.view.main_frame.txt["state"] = 'normal'
+        self.output(event, f"""You are fighting the {event.enemy_name}!\n""")
+
+    def player_surprised(self, event):
+        self.output(event, f"""The {event.enemy_name} surprises you! They attack first!\n""")
+
+    def fight_ended(self, event):
+        if event.outcome is FightOutcome.PLAYER_WINS:
+            self.output(event, f"""You have defeated the {event.enemy_name}!\n""")
+        elif event.outcome is FightOutcome.PLAYER_LOSES:
+            self.output(event, f"You have been defeated by the {event.enemy_name}!\n")
+
+    def herb_used(self, event):
+        if event.result.reason == HerbFailureReason.NO_HERBS:
+            self.output(event, "You have no herbs!\n")
+        elif event.result.reason == HerbFailureReason.MAX_HP:
+            self.output(event, "You eat a herb, but your hit points are already at maximum!\n")
+        else:
+            self.output(event, f"""You eat a herb and regain {event.result.healing} hit points!\n""")
+
+    def fleeing(self, event):
+        self.output(event, f"You attempt to run away...\n")
+        if event.success:
+            self.output(event, f"You successfully flee!\n")
+        else:
+            self.output(event, f"""...but the {event.enemy_name} blocks you from running away!\n""")
+
+    def no_spell_selected(self, event):
+        if event.choice == "Select Spell":
+            self.output(event, "You must select a valid spell first.\n")
+        else:
+            self.output(event, "Your level is too low to cast magic.\n")
+
+    def spell_cast(self, event):
+        result, enemy_name = event.result, event.enemy_name
+        if not result.success:
+            self.player_spell_failed(event)
+        elif result.spell in (SpellType.HEAL, SpellType.HEALMORE):
+            self.output(event, f"""Player casts {result.spell_name}! Player is healed {str(result.amount)} hit points!\n""")
+        elif result.spell in (SpellType.HURT, SpellType.HURTMORE):
+            self.output(event, f"""Player casts {result.spell_name}! {enemy_name} is hurt by {str(result.amount)} hit points!\n""")
+        elif result.spell == SpellType.SLEEP:
+            self.output(event, f"""Player casts Sleep! The {enemy_name} is now asleep!\n""")
+        elif result.spell == SpellType.STOPSPELL:
+            self.output(event, f"""Player casts Stopspell! The {enemy_name}'s magic is now blocked!!\n""")
+
+    def player_spell_failed(self, event):
+        result, enemy_name = event.result, event.enemy_name
+        if result.reason == SpellFailureReason.NOT_ENOUGH_MP:
+            self.output(event, f"Player tries to cast {result.spell_name}, but doesn't have enough MP!\n")
+        elif result.reason == SpellFailureReason.PLAYER_SPELLSTOPPED:
+            self.output(event, f"""Player casts {result.spell_name}, but their magic has been sealed!\n""")
+        elif result.reason == SpellFailureReason.HEALED_AT_MAX_HP:
+            self.output(event, f"""Player casts {result.spell_name}, but their hit points were already at maximum!\n""")
+        elif result.reason == SpellFailureReason.ENEMY_RESISTED_HURT:
+            self.output(event, f"""Player casts {result.spell_name}, but the enemy resisted!\n""")
+        elif result.reason == SpellFailureReason.ENEMY_ALREADY_ASLEEP:
+            self.output(event, f"""Player casts Sleep! But the {enemy_name} is already asleep!\n""")
+        elif result.reason == SpellFailureReason.ENEMY_RESISTED_SLEEP:
+            self.output(event, f"""Player casts Sleep! But the {enemy_name} resisted!\n""")
+        elif result.reason == SpellFailureReason.ENEMY_ALREADY_SPELLSTOPPED:
+            self.output(event, f"""Player casts Stopspell! But the {enemy_name}'s magic was already blocked!\n""")
+        elif result.reason == SpellFailureReason.ENEMY_RESISTED_SPELLSTOP:
+            self.output(event, f"""Player casts Stopspell! But the {enemy_name} resisted!\n""")
+
+    def player_sleep(self, event):
+        if event.result.still_asleep:
+            self.output(event, "You're still asleep...'\n")
+        elif event.result.just_woke_up:
+            self.output(event, "You wake up!\n")
+
+    def enemy_sleep(self, event):
+        enemy_name = event.enemy_name
+        if event.result.reason == SleepReason.FIRST_ROUND_ENEMY_ASLEEP:
+            self.output(event, f"The {enemy_name} is asleep...")
+        elif event.result.reason == SleepReason.ENEMY_ASLEEP:
+            self.output(event, f"The {enemy_name} is still asleep...")
+        elif event.result.reason == SleepReason.ENEMY_WAKES_UP:
+            self.output(event, f"The {enemy_name} woke up!")
+
+    def enemy_flees(self, event):
+        self.output(event, f"The {event.enemy_name} flees the battlefield!")
+
+    def enemy_acted(self, event):
+        action, result, enemy_name, player_name = event.action, event.result, event.enemy_name, event.player_name
+        if action == EnemyActions.ATTACK:
+            self.output(event, f"{enemy_name} attacks! {enemy_name} hits you for {result.damage} damage.\n")
+        elif result.reason == SpellFailureReason.ENEMY_SPELLSTOPPED:
+            self.output(event, f"""The {enemy_name} casts {result.spell_name}, but their spell has been blocked!""")
+        elif action in (EnemyActions.HURT, EnemyActions.HURTMORE):
+            self.output(event, f"""The {enemy_name} casts {result.spell_name}! {player_name} is hurt for {result.amount} damage!""")
+        elif action in (EnemyActions.FIRE, EnemyActions.STRONGFIRE):
+            flames = "fire" if action == EnemyActions.FIRE else "strong flames at you!"
+            self.output(event, f"""The {enemy_name} breathes {flames}! {player_name} is hurt for {result.amount} damage!""")
+        elif action in (EnemyActions.HEAL, EnemyActions.HEALMORE):
+            self.output(event, f"""The {enemy_name} casts {result.spell_name}! {enemy_name} is healed {result.amount} hit points!""")
+        elif action == EnemyActions.SLEEP:
+            self.output(event, f"""The {enemy_name} casts Sleep. You fall asleep!!""")
+        elif action == EnemyActions.STOPSPELL:
+            if result.success is False:
+                self.output(event, f"""The {enemy_name} casts Spellstop, but the spell fails!""")
+            else:
+                self.output(event, f"""The {enemy_name} casts Spellstop. Your magic has been blocked!""")
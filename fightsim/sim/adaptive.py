@@ -0,0 +1,114 @@
+"""
+Adaptive sampling: play a matchup until its rate is known to a target precision.
+
+A Precision asks for a confidence interval of at most half_width either side of the estimate, e.g. Precision(0.005,
+0.95) for +-0.5% at 95%. sample_until() plays fights in chunks and stops as soon as the Wilson or Clopper-Pearson
+interval for the chosen outcome is that narrow. One-sided matchups settle after a chunk or two, close ones keep
+sampling up to max_fights.
+
+Chunks divide SEED_BLOCK and each block is played on its own child stream, as in BattleSimulator.run_blocks, so a
+seeded run always stops at the same fight count with the same tally.
+"""
+
+import math
+from dataclasses import dataclass
+from statistics import NormalDist
+
+from ..common.messages import FightOutcome
+from .simulator import SEED_BLOCK, BattleTally
+
+DEFAULT_CHUNK = 128
+DEFAULT_MAX_FIGHTS = 1_000_000
+INTERVALS = ("wilson", "clopper-pearson")
+OUTCOME_COUNTS = {
+    FightOutcome.PLAYER_WINS: "wins",
+    FightOutcome.PLAYER_LOSES: "losses",
+    FightOutcome.PLAYER_FLED: "flees",
+    FightOutcome.ENEMY_FLED: "enemy_flees",
+    FightOutcome.TIMED_OUT: "timeouts",
+}
+
+
+def wilson_interval(successes, trials, confidence=0.95):
+    """ Wilson score interval for a binomial proportion, as (low, high) """
+    if trials == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    rate = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (rate + z * z / (2 * trials)) / denominator
+    spread = z * math.sqrt(rate * (1 - rate) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(centre - spread, 0.0), min(centre + spread, 1.0)
+
+
+def clopper_pearson_interval(successes, trials, confidence=0.95):
+    """ Exact (Clopper-Pearson) interval for a binomial proportion, as (low, high) """
+    from scipy.stats import beta
+
+    if trials == 0:
+        return 0.0, 1.0
+    alpha = 1 - confidence
+    low = beta.ppf(alpha / 2, successes, trials - successes + 1) if successes > 0 else 0.0
+    high = beta.ppf(1 - alpha / 2, successes + 1, trials - successes) if successes < trials else 1.0
+    return float(low), float(high)
+
+
+@dataclass(frozen=True)
+class Precision:
+    half_width: float = 0.005
+    confidence: float = 0.95
+    interval: str = "wilson"
+
+    def __post_init__(self):
+        if self.interval not in INTERVALS:
+            raise ValueError(f"Unknown interval: {self.interval}")
+        if not 0 < self.confidence < 1 or self.half_width <= 0:
+            raise ValueError("confidence must be within (0, 1) and half_width positive")
+
+    def bounds(self, successes, trials):
+        if self.interval == "wilson":
+            return wilson_interval(successes, trials, self.confidence)
+        return clopper_pearson_interval(successes, trials, self.confidence)
+
+    def is_met(self, successes, trials):
+        low, high = self.bounds(successes, trials)
+        return high - low <= 2 * self.half_width
+
+
+@dataclass
+class Estimate:
+    """ An outcome rate with its confidence interval and the tally it came from """
+    tally: BattleTally
+    outcome: FightOutcome
+    rate: float
+    low: float
+    high: float
+    converged: bool
+
+    def __str__(self):
+        return f"{self.rate:.2%} [{self.low:.2%}, {self.high:.2%}] after {self.tally.fights:,} fights"
+
+
+def sample_until(simulator, precision, outcome=FightOutcome.PLAYER_WINS, max_fights=DEFAULT_MAX_FIGHTS,
+                 chunk=DEFAULT_CHUNK):
+    """
+    Plays fights on simulator until precision is met for the rate of outcome, or max_fights have been played.
+    Returns an Estimate; converged is False if max_fights ran out first.
+    """
+    if SEED_BLOCK % chunk:
+        raise ValueError(f"chunk must divide the seed block of {SEED_BLOCK} fights")
+    count = OUTCOME_COUNTS[outcome]
+    root = simulator.randomizer.spawn(1)[0]
+    tally = BattleTally()
+    converged = False
+    while tally.fights < max_fights and not converged:
+        if tally.fights % SEED_BLOCK == 0:
+            simulator.use_randomizer(root.stream(tally.fights // SEED_BLOCK))
+        tally.merge(simulator.run(min(chunk, max_fights - tally.fights)))
+        converged = precision.is_met(getattr(tally, count), tally.fights)
+    simulator.use_randomizer(simulator.randomizer)
+
+    successes = getattr(tally, count)
+    low, high = precision.bounds(successes, tally.fights)
+    return Estimate(tally=tally, outcome=outcome, rate=successes / tally.fights if tally.fights else 0.0, low=low,
+                    high=high, converged=converged)
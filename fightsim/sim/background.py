@@ -0,0 +1,88 @@
+"""
+Batches of fights played in the background, for callers like the GUI that must keep responding while they run.
+
+A SimulationPool owns a ProcessPoolExecutor that lives as long as the application. warm_up() starts every worker and
+has it import the simulator ahead of the first batch, so a click doesn't pay for process start-up. submit() splits a
+batch into SEED_BLOCK chunks and returns a BackgroundBatch right away; the caller polls it, e.g. from Tk's after(),
+to collect finished chunks, and may cancel it. A seeded batch gives the same tally as BattleSimulator.run_parallel.
+If a chunk raises, poll() keeps the exception in error and cancels the rest of the batch rather than raising it into
+the caller's event loop.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .simulator import SEED_BLOCK, BattleTally, _run_chunk
+
+
+def _warm_up():
+    """ Runs in each worker; importing this module has already loaded the simulator """
+    return os.getpid()
+
+
+class BackgroundBatch:
+    """
+    A batch of fights in flight on a SimulationPool. tally grows as poll() collects finished chunks, and error holds
+    the exception of a chunk that failed
+    """
+
+    def __init__(self, fights, futures):
+        self.fights = fights
+        self.tally = BattleTally()
+        self.cancelled = False
+        self.error = None
+        self._pending = set(futures)
+
+    @property
+    def played(self):
+        return self.tally.fights
+
+    @property
+    def done(self):
+        return not self._pending
+
+    def poll(self):
+        """ Merges chunks that have finished since the last poll. Returns True once the batch is done """
+        for future in [future for future in self._pending if future.done()]:
+            self._pending.discard(future)
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is not None:
+                self.error = error
+                self._cancel_pending()
+                break
+            self.tally.merge(future.result())
+        return self.done
+
+    def cancel(self):
+        """ Cancels chunks that haven't started. Chunks already running finish but are not counted """
+        self.cancelled = True
+        self._cancel_pending()
+
+    def _cancel_pending(self):
+        for future in self._pending:
+            future.cancel()
+        self._pending = set()
+
+
+class SimulationPool:
+    """ A long-lived process pool for background batches. Call shutdown() when the application exits """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def warm_up(self):
+        """ Starts every worker now instead of on the first batch. Does not wait for them. Returns the pool """
+        for _ in range(self.workers):
+            self.executor.submit(_warm_up)
+        return self
+
+    def submit(self, simulator, fights, chunk_size=SEED_BLOCK):
+        """ Starts playing fights on simulator's configuration and returns the BackgroundBatch tracking them """
+        jobs = simulator.chunk_jobs(fights, self.workers, chunk_size)
+        return BackgroundBatch(fights, [self.executor.submit(_run_chunk, job) for job in jobs])
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,214 @@
+"""
+Trips through an area: chains of fights with HP, MP and herbs carried from one fight to the next.
+
+A Campaign describes one trip: the encounter table of enemy keys with integer weights, how many encounters the trip
+has, and the encounters after which the player rests. A rest is an inn or a save point, with HP and MP back to full
+and the herb pouch refilled to what the player set out with. A trip ends early when the player dies, or when a
+fight runs past max_rounds, which is counted as stalled.
+
+CampaignSimulator plays trips on one BattleSimulator. It keeps a built enemy per key, swaps in the one each
+encounter draws, and resets only the enemy and the player's in-battle status between fights. CampaignTally streams
+what happened into per-encounter counters: deaths, trips still going, and summed HP, MP and herbs. Its memory grows
+with the trip length but not with the number of trips, so 10**7 encounters need no more memory than 10**3. Tallies
+from different workers are combined with merge.
+"""
+
+import os
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import accumulate
+
+from ..common.messages import FightOutcome
+from ..common.randomizer import Randomizer
+from ..models.enemy import create_enemy
+from .simulator import MAX_ROUNDS, SEED_BLOCK, BattleSimulator
+
+TRIPS_PER_CHUNK = SEED_BLOCK
+
+
+@dataclass
+class Campaign:
+    """ encounters maps enemy keys to integer weights. Rests follow the encounters numbered in rest_after, from 1 """
+    encounters: dict
+    length: int
+    rest_after: tuple = ()
+
+    def __post_init__(self):
+        if not self.encounters or any(not isinstance(weight, int) or weight <= 0
+                                      for weight in self.encounters.values()):
+            raise ValueError("Encounter weights must be positive integers")
+        if self.length < 1:
+            raise ValueError("A campaign needs at least one encounter")
+
+
+@dataclass
+class CampaignTally:
+    """
+    Running totals for a batch of trips. Index i of the lists is encounter i + 1: deaths[i] trips died there,
+    alive[i] trips came through it, and hp, mp and herbs sum what those trips had left right after it
+    """
+    length: int
+    trips: int = 0
+    survived: int = 0
+    stalled: int = 0
+    encounters: int = 0
+    rounds: int = 0
+    deaths: list = None
+    alive: list = None
+    hp: list = None
+    mp: list = None
+    herbs: list = None
+    fights_by_enemy: Counter = field(default_factory=Counter)
+    deaths_by_enemy: Counter = field(default_factory=Counter)
+
+    def __post_init__(self):
+        for name in ("deaths", "alive", "hp", "mp", "herbs"):
+            if getattr(self, name) is None:
+                setattr(self, name, [0] * self.length)
+
+    def merge(self, other):
+        """ Adds other's counts into this tally and returns it """
+        self.trips += other.trips
+        self.survived += other.survived
+        self.stalled += other.stalled
+        self.encounters += other.encounters
+        self.rounds += other.rounds
+        for name in ("deaths", "alive", "hp", "mp", "herbs"):
+            mine = getattr(self, name)
+            for index, count in enumerate(getattr(other, name)):
+                mine[index] += count
+        self.fights_by_enemy.update(other.fights_by_enemy)
+        self.deaths_by_enemy.update(other.deaths_by_enemy)
+        return self
+
+    @property
+    def survival_rate(self):
+        return self.survived / self.trips if self.trips else 0.0
+
+    @property
+    def death_rate(self):
+        return sum(self.deaths) / self.trips if self.trips else 0.0
+
+    def survival_curve(self):
+        """ Chance of coming through each encounter alive and not stalled """
+        return [alive / self.trips if self.trips else 0.0 for alive in self.alive]
+
+    def mean_curve(self, resource):
+        """ Mean "hp", "mp" or "herbs" left after each encounter, over the trips that came through it """
+        return [total / alive if alive else 0.0 for total, alive in zip(getattr(self, resource), self.alive)]
+
+
+class CampaignSimulator(BattleSimulator):
+    """ Plays Campaign trips, carrying the player's HP, MP and herbs between fights """
+
+    def __init__(self, player_config, campaign, policy=None, constants=None, max_rounds=MAX_ROUNDS, seed=None,
+                 randomizer_class=Randomizer, events=None):
+        keys = list(campaign.encounters)
+        super().__init__(player_config, keys[0], policy=policy, constants=constants, max_rounds=max_rounds, seed=seed,
+                         randomizer_class=randomizer_class, events=events)
+        self.campaign = campaign
+        self.enemies = {keys[0]: self.enemy}
+        for enemy_key in keys[1:]:
+            self.enemies[enemy_key] = create_enemy(enemy_key, self.combat_engine)
+        self.encounter_keys = keys
+        self.cumulative_weights = list(accumulate(campaign.encounters.values()))
+
+    def reset(self):
+        """ Starts the next fight of a trip: a fresh enemy, and the player's in-battle status cleared """
+        self.clear_battle_status()
+
+    def rest(self):
+        """ Full HP and MP and the starting herbs, as at the start of a trip """
+        player = self.player
+        player.current_hp = player.max_hp
+        player.current_mp = player.max_mp
+        player.herb_count = self.player_config.herbs
+
+    def draw_encounter(self):
+        roll = self.combat_engine.randomizer.randint(1, self.cumulative_weights[-1])
+        enemy_key = self.encounter_keys[bisect_left(self.cumulative_weights, roll)]
+        self.enemy_key = enemy_key
+        self.enemy = self.enemies[enemy_key]
+        return enemy_key
+
+    def trip(self, tally, log=None):
+        """ Plays one trip into tally. Each FightResult is also recorded to log when one is given """
+        campaign, player = self.campaign, self.player
+        rests = campaign.rest_after
+        self.rest()
+        tally.trips += 1
+        for index in range(campaign.length):
+            enemy_key = self.draw_encounter()
+            result = self.fight()
+            if log is not None:
+                log.record(result)
+            tally.encounters += 1
+            tally.rounds += result.rounds
+            tally.fights_by_enemy[enemy_key] += 1
+            if result.outcome is FightOutcome.PLAYER_LOSES:
+                tally.deaths[index] += 1
+                tally.deaths_by_enemy[enemy_key] += 1
+                return
+            if result.outcome is FightOutcome.TIMED_OUT:
+                tally.stalled += 1
+                return
+            tally.alive[index] += 1
+            tally.hp[index] += player.current_hp
+            tally.mp[index] += player.current_mp
+            tally.herbs[index] += player.herb_count
+            if index + 1 in rests:
+                self.rest()
+        tally.survived += 1
+
+    def run(self, trips, log=None):
+        """ Plays trips one after another in this process and returns their CampaignTally """
+        tally = CampaignTally(self.campaign.length)
+        for _ in range(trips):
+            self.trip(tally, log)
+        return tally
+
+    def run_blocks(self, root, first_block, trips):
+        """ Plays trips starting at block first_block, each block of TRIPS_PER_CHUNK on its own stream of root """
+        tally = CampaignTally(self.campaign.length)
+        block = first_block
+        while trips > 0:
+            self.use_randomizer(root.stream(block))
+            tally.merge(self.run(min(TRIPS_PER_CHUNK, trips)))
+            trips -= TRIPS_PER_CHUNK
+            block += 1
+        self.use_randomizer(self.randomizer)
+        return tally
+
+    def run_parallel(self, trips, workers=None, chunk_size=None, executor=None):
+        """ Splits trips into chunks of whole blocks and plays them on a process pool, like BattleSimulator's """
+        workers = workers or os.cpu_count() or 1
+        jobs = self.chunk_jobs(trips, workers, chunk_size)
+        tally = CampaignTally(self.campaign.length)
+        if executor is None and workers == 1:
+            for job in jobs:
+                tally.merge(_run_campaign_chunk(job))
+            return tally
+        if executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for chunk_tally in pool.map(_run_campaign_chunk, jobs):
+                    tally.merge(chunk_tally)
+        else:
+            for chunk_tally in executor.map(_run_campaign_chunk, jobs):
+                tally.merge(chunk_tally)
+        return tally
+
+    def chunk_jobs(self, trips, workers=1, chunk_size=None):
+        """ Picklable jobs for _run_campaign_chunk that together play trips. The last item is the trip count """
+        jobs = super().chunk_jobs(trips, workers, chunk_size)
+        return [(self.player_config, self.campaign, self.policy, self.constants, self.max_rounds, root, first_block,
+                 count) for _, _, _, _, _, root, first_block, count in jobs]
+
+
+def _run_campaign_chunk(job):
+    """ Worker entry point. Plays the job's trips on a fresh CampaignSimulator """
+    player_config, campaign, policy, constants, max_rounds, root, first_block, trips = job
+    simulator = CampaignSimulator(player_config, campaign, policy=policy, constants=constants, max_rounds=max_rounds)
+    return simulator.run_blocks(root, first_block, trips)
@@ -0,0 +1,292 @@
+"""
+Recordings of every random number drawn in a batch of fights, for replaying any one fight exactly.
+
+A draw log is a directory with three files:
+- draws.bin: a magic number, then every draw as three unsigned varints: zigzag(low), high - low and value - low.
+  Nearly all draws fit in three or four bytes.
+- index.bin: little-endian uint64 byte offsets into draws.bin, one where each fight starts plus one past the end,
+  so fight n is the bytes between entries n and n + 1.
+- header.json: the fight count, the code version of the rules and the caller's metadata, usually the matchup.
+
+DrawLogWriter wraps the simulator's randomizer in a RecordingRandomizer for the duration of write_simulation().
+Fights only draw through randint() and agility_roll(), and agility_roll() is recorded as the randint(1, 255) both
+randomizers make inside it, so recording never changes the stream being recorded. DrawLog memory-maps draws.bin and
+index.bin: finding fight n is one read from the index, however large the log. replay() plays a fight again on a
+ReplayRandomizer that hands back the recorded values.
+
+A replay only reproduces the recorded fight under the rules it was recorded with. replay() refuses a log whose
+code version differs from the running code's, unless told to check_version=False. Even then it raises ValueError as
+soon as the fight asks for a different range than the recording holds, but a rules change that keeps every range the
+same would quietly play a different fight.
+"""
+
+import json
+import mmap
+import os
+import struct
+
+from .fight_log import code_version
+
+LOG_FORMAT = 1
+MAGIC = b"FSDRAWS\x01"
+DRAWS_NAME = "draws.bin"
+INDEX_NAME = "index.bin"
+HEADER_NAME = "header.json"
+FLUSH_BYTES = 1 << 20
+OFFSET = struct.Struct("<Q")
+
+
+def _zigzag(number):
+    return number << 1 if number >= 0 else (-number << 1) - 1
+
+
+def _unzigzag(number):
+    return number >> 1 if not number & 1 else -((number + 1) >> 1)
+
+
+def _append_varint(buffer, number):
+    while number > 0x7F:
+        buffer.append(number & 0x7F | 0x80)
+        number >>= 7
+    buffer.append(number)
+
+
+def decode_draws(data):
+    """ The (low, high, value) draws encoded in data """
+    numbers, number, shift = [], 0, 0
+    for byte in data:
+        number |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            numbers.append(number)
+            number = shift = 0
+    if shift or len(numbers) % 3:
+        raise ValueError("Truncated draw record")
+    draws = []
+    for position in range(0, len(numbers), 3):
+        low = _unzigzag(numbers[position])
+        draws.append((low, low + numbers[position + 1], low + numbers[position + 2]))
+    return draws
+
+
+class RecordingRandomizer:
+    """ Wraps a Randomizer or BufferedRandomizer and records each number drawn from it to a DrawLogWriter """
+
+    def __init__(self, randomizer, writer):
+        self.randomizer = randomizer
+        self.writer = writer
+
+    def __getattr__(self, name):
+        return getattr(self.randomizer, name)
+
+    def randint(self, low, high):
+        value = self.randomizer.randint(low, high)
+        self.writer.record(low, high, value)
+        return value
+
+    def choice(self, sequence):
+        return sequence[self.randint(0, len(sequence) - 1)]
+
+    def agility_roll(self, agility, surprise_factor=1):
+        return agility * self.randint(1, 255) * surprise_factor
+
+
+class ReplayRandomizer:
+    """ Hands back recorded draws in order. Raises ValueError when asked for a range the recording doesn't hold """
+
+    def __init__(self, draws):
+        self.draws = draws
+        self.position = 0
+
+    @property
+    def remaining(self):
+        return len(self.draws) - self.position
+
+    def randint(self, low, high):
+        if self.position >= len(self.draws):
+            raise ValueError(f"Replay asked for randint({low}, {high}) after all {len(self.draws)} recorded draws")
+        recorded_low, recorded_high, value = self.draws[self.position]
+        if (recorded_low, recorded_high) != (low, high):
+            raise ValueError(f"Replay diverged at draw {self.position}: asked for randint({low}, {high}), "
+                             f"recorded randint({recorded_low}, {recorded_high})")
+        self.position += 1
+        return value
+
+    def choice(self, sequence):
+        return sequence[self.randint(0, len(sequence) - 1)]
+
+    def agility_roll(self, agility, surprise_factor=1):
+        return agility * self.randint(1, 255) * surprise_factor
+
+
+class DrawLogWriter:
+    """
+    Streams draws into a new draw log. Call begin_fight() before each fight's draws, or let write_simulation() do
+    it. Use as a context manager, or call close() to finish the files.
+    """
+
+    def __init__(self, directory, metadata=None, flush_bytes=FLUSH_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.metadata = metadata or {}
+        self.flush_bytes = flush_bytes
+        self.fights = 0
+        self._draws_file = open(os.path.join(directory, DRAWS_NAME), "wb")
+        self._index_file = open(os.path.join(directory, INDEX_NAME), "wb")
+        self._draws_file.write(MAGIC)
+        self._written = len(MAGIC)
+        self._buffer = bytearray()
+        self._offsets = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def offset(self):
+        """ Where the next draw will start in draws.bin """
+        return self._written + len(self._buffer)
+
+    def begin_fight(self):
+        self._offsets.append(self.offset)
+        self.fights += 1
+
+    def record(self, low, high, value):
+        buffer = self._buffer
+        _append_varint(buffer, _zigzag(low))
+        _append_varint(buffer, high - low)
+        _append_varint(buffer, value - low)
+        if len(buffer) >= self.flush_bytes:
+            self.flush()
+
+    def write_simulation(self, simulator, fights, seed_blocks=False):
+        """
+        Plays fights on a BattleSimulator, recording each one's draws, and returns their BattleTally. With
+        seed_blocks, plays the child streams simulator.run_parallel() would, so the tally matches an unrecorded batch.
+        """
+        from .simulator import SEED_BLOCK, BattleTally
+
+        randomizer = simulator.combat_engine.randomizer
+        tally = BattleTally()
+        try:
+            if seed_blocks:
+                root = simulator.randomizer.spawn(1)[0]
+                for block, start in enumerate(range(0, fights, SEED_BLOCK)):
+                    simulator.use_randomizer(RecordingRandomizer(root.stream(block), self))
+                    self._record_fights(simulator, min(SEED_BLOCK, fights - start), tally)
+            else:
+                simulator.use_randomizer(RecordingRandomizer(randomizer, self))
+                self._record_fights(simulator, fights, tally)
+        finally:
+            simulator.use_randomizer(randomizer)
+        return tally
+
+    def _record_fights(self, simulator, fights, tally):
+        for _ in range(fights):
+            self.begin_fight()
+            tally.record(simulator.fight())
+
+    def flush(self):
+        self._draws_file.write(self._buffer)
+        self._written += len(self._buffer)
+        self._buffer.clear()
+        if self._offsets:
+            self._index_file.write(struct.pack(f"<{len(self._offsets)}Q", *self._offsets))
+            self._offsets.clear()
+
+    def close(self):
+        if self._draws_file is None:
+            return
+        self._offsets.append(self.offset)
+        self.flush()
+        self._draws_file.close()
+        self._index_file.close()
+        self._draws_file = self._index_file = None
+
+        header = {
+            "format": LOG_FORMAT,
+            "code_version": code_version(),
+            "fights": self.fights,
+            "bytes": self._written,
+            "metadata": self.metadata,
+        }
+        partial = os.path.join(self.directory, f"{HEADER_NAME}.{os.getpid()}")
+        with open(partial, "w", encoding="utf-8") as header_file:
+            json.dump(header, header_file, indent=1)
+        os.replace(partial, os.path.join(self.directory, HEADER_NAME))
+
+
+def _map(path):
+    with open(path, "rb") as mapped_file:
+        return mmap.mmap(mapped_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class DrawLog:
+    """ Read-only, memory-mapped view of a draw log directory. Call close() to release the maps """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, HEADER_NAME), encoding="utf-8") as header_file:
+            self.header = json.load(header_file)
+        if self.header["format"] != LOG_FORMAT:
+            raise ValueError(f"Unsupported draw log format: {self.header['format']}")
+        self.draws_map = _map(os.path.join(directory, DRAWS_NAME))
+        self.index_map = _map(os.path.join(directory, INDEX_NAME))
+        if self.draws_map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a draw log: {directory}")
+
+    def __len__(self):
+        return self.header["fights"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def metadata(self):
+        return self.header["metadata"]
+
+    @property
+    def code_version(self):
+        return self.header["code_version"]
+
+    def span(self, fight):
+        """ (start, stop) byte offsets of fight's draws in draws.bin """
+        if not 0 <= fight < len(self):
+            raise IndexError(f"Fight {fight} is not in a log of {len(self)} fights")
+        return (OFFSET.unpack_from(self.index_map, fight * OFFSET.size)[0],
+                OFFSET.unpack_from(self.index_map, (fight + 1) * OFFSET.size)[0])
+
+    def draws(self, fight):
+        """ The (low, high, value) draws of one fight, in the order they were made """
+        start, stop = self.span(fight)
+        return decode_draws(self.draws_map[start:stop])
+
+    def replay(self, simulator, fight, check_version=True):
+        """
+        Plays fight again on simulator, which must be set up with the recorded matchup, and returns its
+        FightResult. Subscribe to simulator.events first to see the fight turn by turn. Raises ValueError if the
+        log was recorded by a different code version, unless check_version is False.
+        """
+        if check_version and self.code_version != code_version():
+            raise ValueError(f"Draw log was recorded by code version {self.code_version}, but this is "
+                             f"{code_version()}; the rules may have changed since")
+        randomizer = simulator.combat_engine.randomizer
+        replayed = ReplayRandomizer(self.draws(fight))
+        simulator.use_randomizer(replayed)
+        try:
+            result = simulator.fight()
+        finally:
+            simulator.use_randomizer(randomizer)
+        if replayed.remaining:
+            raise ValueError(f"Replay of fight {fight} finished with {replayed.remaining} recorded draws unused")
+        return result
+
+    def close(self):
+        self.draws_map.close()
+        self.index_map.close()
@@ -0,0 +1,227 @@
+"""
+Columnar fight logs on disk.
+
+A fight log is a directory with one .npy file per column and a header.json. Every row is one fight. The matchup
+(enemy, level, equipment, policy) is not repeated per row: rows are written in segments, one per matchup, and the
+header lists each segment's matchup and row range. The header also records the GameConstants the fights were played
+under, the code version of the rules and the FightOutcome codes used in the outcome column.
+
+FightLogWriter streams rows straight to the column files in chunks, so a log can grow far beyond memory. Each
+.npy file gets a fixed-size header up front that is rewritten with the final row count on close, so the files are
+plain .npy arrays any numpy can open. FightLog memory-maps them; selecting a matchup returns views into the maps,
+copying only when the matching segments are not next to each other.
+"""
+
+import hashlib
+import json
+import os
+import struct
+from dataclasses import dataclass, fields
+from enum import Enum
+
+import numpy as np
+
+from ..common.messages import FightOutcome
+from ..models.game_constants import GameConstants
+
+LOG_FORMAT = 1
+HEADER_NAME = "header.json"
+CHUNK_ROWS = 65_536
+NPY_HEADER_SIZE = 128  # Room for any 1-D shape, so the header can be rewritten in place
+COLUMNS = {
+    "outcome": np.dtype("u1"),
+    "rounds": np.dtype("<u2"),
+    "player_hp": np.dtype("<i2"),
+    "damage_taken": np.dtype("<u4"),
+}
+SOURCE_PACKAGES = ("common", "models", "sim")
+
+
+def code_version():
+    """ Short digest of the sources that decide how fights play out """
+    package = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha256()
+    for subpackage in SOURCE_PACKAGES:
+        directory = os.path.join(package, subpackage)
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".py"):
+                with open(os.path.join(directory, name), "rb") as source:
+                    digest.update(name.encode("utf-8") + source.read().replace(b"\r\n", b"\n"))
+    return digest.hexdigest()[:16]
+
+
+def _jsonable(value):
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, dict):
+        return {_jsonable(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+def constants_record(constants):
+    """ GameConstants as plain JSON data, with enum keys by name """
+    return {field.name: _jsonable(getattr(constants, field.name)) for field in fields(constants)}
+
+
+def _npy_header(dtype, rows):
+    header = repr({"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (rows,)})
+    header = header.ljust(NPY_HEADER_SIZE - 11) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+@dataclass
+class Segment:
+    matchup: dict
+    start: int
+    stop: int
+
+    def matches(self, filters):
+        return all(self.matchup.get(name) == value for name, value in filters.items())
+
+
+class FightLogWriter:
+    """
+    Streams FightResults into a new fight log. Call begin() with the matchup before its fights, or let
+    write_simulation() do both. Use as a context manager, or call close() to finish the files.
+    """
+
+    def __init__(self, directory, constants=None, chunk_rows=CHUNK_ROWS, metadata=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.constants = constants or GameConstants()
+        self.chunk_rows = chunk_rows
+        self.metadata = metadata or {}
+        self.rows = 0
+        self.segments = []
+        self._files = {}
+        for name, dtype in COLUMNS.items():
+            column_file = open(os.path.join(directory, f"{name}.npy"), "wb")
+            column_file.write(_npy_header(dtype, 0))
+            self._files[name] = column_file
+        self._buffers = {name: [] for name in COLUMNS}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def begin(self, **matchup):
+        """ Starts a new segment. Rows recorded from now on belong to matchup """
+        self._end_segment()
+        self.segments.append(Segment(matchup, self.rows, self.rows))
+
+    def record(self, result):
+        if not self.segments:
+            raise ValueError("begin() a segment before recording fights")
+        buffers = self._buffers
+        buffers["outcome"].append(result.outcome.value)
+        buffers["rounds"].append(result.rounds)
+        buffers["player_hp"].append(result.player_hp)
+        buffers["damage_taken"].append(result.damage_taken)
+        self.rows += 1
+        if len(buffers["outcome"]) >= self.chunk_rows:
+            self.flush()
+
+    def write_simulation(self, simulator, fights):
+        """ Plays fights on a BattleSimulator as one segment and returns their BattleTally """
+        config = simulator.player_config
+        self.begin(enemy=simulator.enemy_key, level=config.level, weapon=config.weapon, armor=config.armor,
+                   shield=config.shield, herbs=config.herbs, name=config.name, policy=repr(simulator.policy))
+        return simulator.run(fights, log=self)
+
+    def flush(self):
+        for name, dtype in COLUMNS.items():
+            if self._buffers[name]:
+                np.asarray(self._buffers[name], dtype=dtype).tofile(self._files[name])
+                self._buffers[name].clear()
+
+    def _end_segment(self):
+        if self.segments:
+            self.segments[-1].stop = self.rows
+
+    def close(self):
+        if not self._files:
+            return
+        self.flush()
+        self._end_segment()
+        for name, dtype in COLUMNS.items():
+            column_file = self._files[name]
+            column_file.seek(0)
+            column_file.write(_npy_header(dtype, self.rows))
+            column_file.close()
+        self._files = {}
+
+        header = {
+            "format": LOG_FORMAT,
+            "code_version": code_version(),
+            "rows": self.rows,
+            "columns": {name: dtype.str for name, dtype in COLUMNS.items()},
+            "outcomes": {outcome.name: outcome.value for outcome in FightOutcome},
+            "constants": constants_record(self.constants),
+            "metadata": self.metadata,
+            "segments": [[segment.matchup, segment.start, segment.stop] for segment in self.segments],
+        }
+        partial = os.path.join(self.directory, f"{HEADER_NAME}.{os.getpid()}")
+        with open(partial, "w", encoding="utf-8") as header_file:
+            json.dump(header, header_file, indent=1)
+        os.replace(partial, os.path.join(self.directory, HEADER_NAME))
+
+
+class FightLog:
+    """ Read-only, memory-mapped view of a fight log directory """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, HEADER_NAME), encoding="utf-8") as header_file:
+            self.header = json.load(header_file)
+        if self.header["format"] != LOG_FORMAT:
+            raise ValueError(f"Unsupported fight log format: {self.header['format']}")
+        self.segments = [Segment(matchup, start, stop) for matchup, start, stop in self.header["segments"]]
+        self.columns = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                        for name in self.header["columns"]}
+
+    def __len__(self):
+        return self.header["rows"]
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @property
+    def constants(self):
+        return self.header["constants"]
+
+    @property
+    def code_version(self):
+        return self.header["code_version"]
+
+    def ranges(self, **filters):
+        """ (start, stop) row ranges of the segments whose matchup has every given value, adjacent ones merged """
+        ranges = []
+        for segment in self.segments:
+            if segment.matches(filters) and segment.stop > segment.start:
+                if ranges and ranges[-1][1] == segment.start:
+                    ranges[-1] = (ranges[-1][0], segment.stop)
+                else:
+                    ranges.append((segment.start, segment.stop))
+        return ranges
+
+    def select(self, **filters):
+        """
+        Columns for the fights whose matchup has every given value, e.g. select(enemy='golem', level=20). The
+        arrays are views into the memory maps when the matching rows are contiguous.
+        """
+        ranges = self.ranges(**filters)
+        if len(ranges) == 1:
+            start, stop = ranges[0]
+            return {name: column[start:stop] for name, column in self.columns.items()}
+        return {name: np.concatenate([column[start:stop] for start, stop in ranges]) if ranges
+                else column[:0] for name, column in self.columns.items()}
+
+    def outcome_counts(self, **filters):
+        """ Fights per FightOutcome among the selected rows """
+        outcomes = self.select(**filters)["outcome"]
+        counts = np.bincount(outcomes, minlength=max(outcome.value for outcome in FightOutcome) + 1)
+        return {outcome: int(counts[outcome.value]) for outcome in FightOutcome}
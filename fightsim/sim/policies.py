@@ -0,0 +1,60 @@
+"""
+Player policies for headless battles.
+
+A policy is asked for an action at the start of every player turn the player is awake for. It returns either a
+PlayerActions member or the SpellType to cast. Policies are pickled into worker processes, so keep them as plain
+module-level classes.
+"""
+
+from ..common.messages import PlayerActions
+from ..models.spells import SpellType
+
+
+class PlayerPolicy:
+    """ Base policy. Subclasses override choose_action. """
+
+    def choose_action(self, player, enemy):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+class AttackPolicy(PlayerPolicy):
+    """ Attacks every turn. """
+
+    def choose_action(self, player, enemy):
+        return PlayerActions.ATTACK
+
+
+class FleePolicy(PlayerPolicy):
+    """ Tries to run away every turn. """
+
+    def choose_action(self, player, enemy):
+        return PlayerActions.FLEE
+
+
+class CautiousPolicy(PlayerPolicy):
+    """
+    Attacks, but heals once HP drops below heal_below (a fraction of max HP). Prefers the strongest healing spell the
+    player can afford and is allowed to cast, then herbs.
+    """
+
+    def __init__(self, heal_below=0.35):
+        self.heal_below = heal_below
+
+    def choose_action(self, player, enemy):
+        if player.current_hp < player.max_hp * self.heal_below:
+            if not player.is_spellstopped:
+                for spell in (SpellType.HEALMORE, SpellType.HEAL):
+                    if spell in player.player_magic and player.current_mp >= spell.value.mp_cost:
+                        return spell
+            if player.has_herbs():
+                return PlayerActions.HERB
+        return PlayerActions.ATTACK
+
+    def __repr__(self):
+        return f"CautiousPolicy(heal_below={self.heal_below})"
+
+
+POLICIES = {"attack": AttackPolicy, "cautious": CautiousPolicy, "flee": FleePolicy}  # By command-line name
@@ -0,0 +1,212 @@
+"""
+Opt-in profiling of headless fights: RNG draws, actions by type, result objects allocated and time per phase.
+
+Nothing here touches the classes themselves. instrument() wraps the methods of one engine, player and enemy
+*instance* with counting or timing hooks, and ProfiledSimulator adds the phase timers around the battle loop.
+A plain BattleSimulator or BattleController never sees a hook, so profiling costs nothing while it is off.
+
+The phases are:
+- status: player and enemy sleep checks at the start of their turns
+- player_action: the rest of the player's turn, from choosing an action to resolving it
+- enemy_choice: Enemy.choose_enemy_action
+- enemy_resolution: the rest of the enemy's turn, flee check included
+
+Every simulator keeps its own FightProfile. run_parallel() profiles each chunk in its worker and merges the
+profiles with the tallies, so a batch reports one profile however it was split.
+"""
+
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from ..common.messages import (ENEMY_FIRST_ROUND_ASLEEP, ENEMY_NOT_ASLEEP, ENEMY_STILL_ASLEEP, ENEMY_WOKE_UP,
+                               HERB_AT_MAX_HP, NO_HERBS_LEFT, PLAYER_AWAKE, PLAYER_STILL_ASLEEP, PLAYER_WOKE_UP)
+from .simulator import BattleSimulator, BattleTally
+
+PHASES = ("status", "player_action", "enemy_choice", "enemy_resolution")
+SHARED_RESULTS = frozenset(map(id, (PLAYER_AWAKE, PLAYER_WOKE_UP, PLAYER_STILL_ASLEEP, ENEMY_NOT_ASLEEP,
+                                    ENEMY_FIRST_ROUND_ASLEEP, ENEMY_WOKE_UP, ENEMY_STILL_ASLEEP, NO_HERBS_LEFT,
+                                    HERB_AT_MAX_HP)))
+PLAYER_ENGINE_ACTIONS = {"resolve_player_attack": "ATTACK", "resolve_herb_healing": "HERB"}
+RESULT_METHODS = ("resolve_player_attack", "resolve_player_magic", "player_casts_heal", "player_casts_hurt",
+                  "player_casts_sleep", "player_casts_stopspell", "resolve_herb_healing", "resolve_enemy_attack",
+                  "enemy_casts_hurt", "enemy_breathes_fire", "enemy_casts_heal", "enemy_casts_sleep",
+                  "enemy_casts_stopspell")
+
+
+@dataclass
+class FightProfile:
+    """ Counters and phase timers for a batch of fights. Profiles from different workers are combined with merge """
+    fights: int = 0
+    draws: int = 0
+    results: int = 0  # Result objects allocated; the shared fixed-outcome instances don't count
+    actions: Counter = field(default_factory=Counter)  # "player ATTACK", "enemy HURTMORE", ...
+    seconds: dict = field(default_factory=lambda: dict.fromkeys(PHASES, 0.0))
+
+    def merge(self, other):
+        """ Adds other's counts and times into this profile and returns it """
+        self.fights += other.fights
+        self.draws += other.draws
+        self.results += other.results
+        self.actions.update(other.actions)
+        for phase, seconds in other.seconds.items():
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+        return self
+
+    def per_fight(self, count):
+        return count / self.fights if self.fights else 0.0
+
+    def summary(self):
+        """ The profile as lines of text, phases with their share of the profiled time """
+        total = sum(self.seconds.values())
+        lines = [f"{self.fights:,} fights: {self.per_fight(self.draws):.1f} RNG draws and "
+                 f"{self.per_fight(self.results):.1f} result objects per fight"]
+        for phase in PHASES:
+            seconds = self.seconds.get(phase, 0.0)
+            share = seconds / total if total else 0.0
+            lines.append(f"  {phase:<17} {seconds:9.3f} s {share:7.1%}")
+        for action, count in self.actions.most_common():
+            lines.append(f"  {action:<22} {self.per_fight(count):8.2f} per fight")
+        return "\n".join(lines)
+
+
+class CountingRandomizer:
+    """ Wraps a Randomizer or BufferedRandomizer and counts the numbers drawn from it into a FightProfile """
+
+    def __init__(self, randomizer, profile):
+        self.randomizer = randomizer
+        self.profile = profile
+
+    def __getattr__(self, name):
+        return getattr(self.randomizer, name)
+
+    def randint(self, low, high):
+        self.profile.draws += 1
+        return self.randomizer.randint(low, high)
+
+    def chance(self, success_rate):
+        self.profile.draws += 1
+        return self.randomizer.chance(success_rate)
+
+    def choice(self, sequence):
+        self.profile.draws += 1
+        return self.randomizer.choice(sequence)
+
+    def agility_roll(self, agility, surprise_factor=1):
+        self.profile.draws += 1
+        return self.randomizer.agility_roll(agility, surprise_factor)
+
+
+def _timed(function, profile, phase):
+    seconds, perf_counter = profile.seconds, time.perf_counter
+
+    def timed(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds[phase] += perf_counter() - start
+    return timed
+
+
+def _counted(function, profile, action=None, spell_action=False):
+    """ Counts the result objects function allocates and, if it is one, the player action it resolves """
+    actions = profile.actions
+
+    def counted(*args, **kwargs):
+        result = function(*args, **kwargs)
+        if action is not None:
+            actions[action] += 1
+        elif spell_action:
+            actions[f"player {(args[0] if args else kwargs['spell']).name}"] += 1
+        if type(result) is not int and id(result) not in SHARED_RESULTS:
+            profile.results += 1
+        return result
+    return counted
+
+
+def instrument(profile, engine=None, player=None, enemy=None):
+    """
+    Installs counting and timing hooks on the given instances. Works for the packed and the object-returning
+    engine, so a BattleController's game state can be profiled too. Returns profile.
+    """
+    if engine is not None:
+        for name in RESULT_METHODS:
+            action = PLAYER_ENGINE_ACTIONS.get(name)
+            setattr(engine, name, _counted(getattr(engine, name), profile, action and f"player {action}",
+                                           spell_action=name == "resolve_player_magic"))
+    if player is not None:
+        player.handle_sleep = _timed(player.handle_sleep, profile, "status")
+        player.is_flee_successful = _counted(player.is_flee_successful, profile, "player FLEE")
+    if enemy is not None:
+        enemy.process_enemy_sleep = _timed(enemy.process_enemy_sleep, profile, "status")
+        choose_enemy_action, actions = enemy.choose_enemy_action, profile.actions
+
+        def choose_and_count(*args):
+            action = choose_enemy_action(*args)
+            actions[f"enemy {action.name}"] += 1
+            return action
+        enemy.choose_enemy_action = _timed(choose_and_count, profile, "enemy_choice")
+    return profile
+
+
+class ProfiledSimulator(BattleSimulator):
+    """ A BattleSimulator that fills self.profile as it plays. Tallies are the same as an unprofiled run's """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.profile = instrument(FightProfile(), self.combat_engine, self.player, self.enemy)
+        self.use_randomizer(self.randomizer)
+
+    def use_randomizer(self, randomizer):
+        super().use_randomizer(CountingRandomizer(randomizer, self.profile))
+
+    def fight(self):
+        self.profile.fights += 1
+        return super().fight()
+
+    def player_turn(self):
+        seconds = self.profile.seconds
+        status = seconds["status"]
+        start = time.perf_counter()
+        outcome = super().player_turn()
+        seconds["player_action"] += time.perf_counter() - start - (seconds["status"] - status)
+        return outcome
+
+    def enemy_turn(self):
+        seconds = self.profile.seconds
+        inner = seconds["status"] + seconds["enemy_choice"]
+        start = time.perf_counter()
+        outcome = super().enemy_turn()
+        seconds["enemy_resolution"] += (time.perf_counter() - start -
+                                        (seconds["status"] + seconds["enemy_choice"] - inner))
+        return outcome
+
+    def run_parallel(self, fights, workers=None, chunk_size=None, executor=None):
+        """ BattleSimulator.run_parallel, merging each chunk's profile into self.profile as well """
+        workers = workers or os.cpu_count() or 1
+        jobs = self.chunk_jobs(fights, workers, chunk_size)
+        tally = BattleTally()
+        if executor is None and workers == 1:
+            results = map(_run_profiled_chunk, jobs)
+        else:
+            pool = executor or ProcessPoolExecutor(max_workers=min(workers, len(jobs)) or 1)
+            try:
+                results = list(pool.map(_run_profiled_chunk, jobs))
+            finally:
+                if executor is None:
+                    pool.shutdown()
+        for chunk_tally, chunk_profile in results:
+            tally.merge(chunk_tally)
+            self.profile.merge(chunk_profile)
+        return tally
+
+
+def _run_profiled_chunk(job):
+    """ Worker entry point. Plays the job's fights on a fresh ProfiledSimulator, returns (tally, profile) """
+    player_config, enemy_key, policy, constants, max_rounds, root, first_block, fights = job
+    simulator = ProfiledSimulator(player_config, enemy_key, policy=policy, constants=constants,
+                                  max_rounds=max_rounds)
+    return simulator.run_blocks(root, first_block, fights), simulator.profile
@@ -0,0 +1,434 @@
+"""
+Headless battle simulator.
+
+Runs complete fights between a Player and an Enemy with the same CombatEngine rules the BattleController uses, but
+with a policy picking the player's actions instead of the battle frame buttons. Batches can be spread over a
+ProcessPoolExecutor; every worker builds its own player, enemy and engine from the picklable configuration and
+returns a BattleTally, which are merged in the parent.
+
+Batches are cut into blocks of SEED_BLOCK fights, each played on its own child stream of the simulator's Randomizer.
+Chunks are made of whole blocks, so a seeded batch gives the same tally whatever the worker count or chunk size.
+
+Fights run on a PackedCombatEngine and the turn logic reads its packed int results directly, so resolving an action
+allocates no result objects. Pass an EventBus to follow fights played in this process: the simulator publishes the
+same battle events as the BattleController, unpacking results only while something is subscribed.
+"""
+
+import math
+import os
+from dataclasses import dataclass
+
+from ..common.events import (EnemyActed, EnemyFled, EnemySleepChecked, EventBus, FightEnded, FightStarted,
+                             FleeAttempted, HerbUsed, PlayerAttacked, PlayerSleepChecked, PlayerSurprised, SpellCast,
+                             TurnEnded)
+from ..common.messages import (AMOUNT_SHIFT, ENEMY_NOT_ASLEEP, PLAYER_AWAKE, REASON_MASK, REASON_SHIFT,
+                               RESULT_SUCCESS, EnemyActions, FightOutcome, PlayerActions, SpellFailureReason,
+                               unpack_attack, unpack_herb, unpack_spell)
+from ..common.randomizer import Randomizer
+from ..models.combat_engine import PackedCombatEngine
+from ..models.enemy import create_enemy
+from ..models.items import ItemType, items
+from ..models.player import Player, SLEEP_COUNT
+from ..models.spells import SpellType
+from .policies import AttackPolicy
+
+MAX_ROUNDS = 1000  # Safety valve for fights where neither side can finish the other
+MAX_CHUNK_SIZE = 50_000
+CHUNKS_PER_WORKER = 4
+SEED_BLOCK = 1024  # Fights played on each child random stream
+
+ENEMY_HURT_SPELLS = (EnemyActions.HURT, EnemyActions.HURTMORE)
+ENEMY_FIRE_ACTIONS = (EnemyActions.FIRE, EnemyActions.STRONGFIRE)
+ENEMY_HEAL_SPELLS = (EnemyActions.HEAL, EnemyActions.HEALMORE)
+PLAYER_SPELLSTOPPED = SpellFailureReason.PLAYER_SPELLSTOPPED.value
+
+
+@dataclass
+class PlayerConfig:
+    """ Everything needed to rebuild the same player in another process """
+    name: str = "Rollo"
+    level: int = 1
+    weapon: str = "Unarmed"
+    armor: str = "Naked"
+    shield: str = "No Shield"
+    herbs: int = 0
+
+    def build(self, combat_engine):
+        """ Returns a Player with stats and equipment set from this config """
+        for item_type, item_name in ((ItemType.WEAPON, self.weapon), (ItemType.ARMOR, self.armor),
+                                     (ItemType.SHIELD, self.shield)):
+            if item_name not in items[item_type.value]:
+                raise ValueError(f"Unknown {item_type.value}: {item_name}")
+        if not 0 <= self.herbs <= 6:
+            raise ValueError("Herbs must be within 0 to 6")
+
+        player = Player(name=self.name, level=self.level, randomizer=combat_engine.randomizer,
+                        combat_engine=combat_engine)
+        player.recalculate_stats()
+        player.equip_weapon(self.weapon)
+        player.equip_armor(self.armor)
+        player.equip_shield(self.shield)
+        player.herb_count = self.herbs
+        return player
+
+
+@dataclass
+class FightResult:
+    outcome: FightOutcome
+    rounds: int
+    player_hp: int
+    damage_taken: int
+
+
+@dataclass
+class BattleTally:
+    """
+    Running totals for a batch of fights. hp_left is summed over won fights only. Tallies from different workers are
+    combined with merge.
+    """
+    fights: int = 0
+    wins: int = 0
+    losses: int = 0
+    flees: int = 0
+    enemy_flees: int = 0
+    timeouts: int = 0
+    rounds: int = 0
+    hp_left: int = 0
+    damage_taken: int = 0
+
+    def record(self, result):
+        self.fights += 1
+        self.rounds += result.rounds
+        self.damage_taken += result.damage_taken
+        outcome = result.outcome
+        if outcome is FightOutcome.PLAYER_WINS:
+            self.wins += 1
+            self.hp_left += result.player_hp
+        elif outcome is FightOutcome.PLAYER_LOSES:
+            self.losses += 1
+        elif outcome is FightOutcome.PLAYER_FLED:
+            self.flees += 1
+        elif outcome is FightOutcome.ENEMY_FLED:
+            self.enemy_flees += 1
+        else:
+            self.timeouts += 1
+
+    def merge(self, other):
+        """ Adds other's totals into this tally and returns it """
+        self.fights += other.fights
+        self.wins += other.wins
+        self.losses += other.losses
+        self.flees += other.flees
+        self.enemy_flees += other.enemy_flees
+        self.timeouts += other.timeouts
+        self.rounds += other.rounds
+        self.hp_left += other.hp_left
+        self.damage_taken += other.damage_taken
+        return self
+
+    @property
+    def win_rate(self):
+        return self.wins / self.fights if self.fights else 0.0
+
+    @property
+    def loss_rate(self):
+        return self.losses / self.fights if self.fights else 0.0
+
+    @property
+    def flee_rate(self):
+        return self.flees / self.fights if self.fights else 0.0
+
+    @property
+    def mean_rounds(self):
+        return self.rounds / self.fights if self.fights else 0.0
+
+    @property
+    def mean_hp_left(self):
+        """ Mean HP the player has left after a win """
+        return self.hp_left / self.wins if self.wins else 0.0
+
+    @property
+    def mean_damage_taken(self):
+        return self.damage_taken / self.fights if self.fights else 0.0
+
+
+class BattleSimulator:
+    """
+    Runs fights for one player configuration against one enemy.
+
+    The player and enemy are built once and reset between fights. run() plays fights in this process,
+    run_parallel() splits them into chunks for a process pool. Pass randomizer_class=BufferedRandomizer for faster
+    draws; child streams handed to workers keep the same class.
+    """
+
+    def __init__(self, player_config, enemy_key, policy=None, constants=None, max_rounds=MAX_ROUNDS, seed=None,
+                 randomizer_class=Randomizer, events=None):
+        self.player_config = player_config
+        self.enemy_key = enemy_key
+        self.policy = policy or AttackPolicy()
+        self.constants = constants
+        self.max_rounds = max_rounds
+        self.randomizer = randomizer_class(seed)
+        self.combat_engine = PackedCombatEngine(self.randomizer, constants)
+        self.player = player_config.build(self.combat_engine)
+        self.enemy = create_enemy(enemy_key, self.combat_engine)
+        self.events = events if events is not None else EventBus()
+        self.publishing = False
+
+    # Whole batches
+
+    def use_randomizer(self, randomizer):
+        """ Switches the engine and player over to another random stream """
+        self.combat_engine.randomizer = randomizer
+        self.player.randomizer = randomizer
+
+    def run(self, fights, log=None):
+        """
+        Plays fights one after another in this process and returns their BattleTally. Each FightResult is also
+        recorded to log (a fight_log.FightLogWriter) when one is given.
+        """
+        tally = BattleTally()
+        if log is None:
+            for _ in range(fights):
+                tally.record(self.fight())
+            return tally
+        for _ in range(fights):
+            result = self.fight()
+            tally.record(result)
+            log.record(result)
+        return tally
+
+    def run_blocks(self, root, first_block, fights):
+        """ Plays fights starting at block first_block, each block on its own child stream of root """
+        tally = BattleTally()
+        block = first_block
+        while fights > 0:
+            self.use_randomizer(root.stream(block))
+            tally.merge(self.run(min(SEED_BLOCK, fights)))
+            fights -= SEED_BLOCK
+            block += 1
+        self.use_randomizer(self.randomizer)
+        return tally
+
+    def run_parallel(self, fights, workers=None, chunk_size=None, executor=None):
+        """
+        Splits fights into chunks and plays them on a process pool. Pass executor to reuse a pool across calls,
+        otherwise one is created for this batch. chunk_size is rounded up to whole SEED_BLOCKs.
+        """
+        workers = workers or os.cpu_count() or 1
+        jobs = self.chunk_jobs(fights, workers, chunk_size)
+
+        tally = BattleTally()
+        if executor is None and workers == 1:
+            for job in jobs:
+                tally.merge(_run_chunk(job))
+            return tally
+
+        if executor is None:
+            from concurrent.futures import ProcessPoolExecutor  # Only pay for importing it when a pool is needed
+
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for chunk_tally in pool.map(_run_chunk, jobs):
+                    tally.merge(chunk_tally)
+        else:
+            for chunk_tally in executor.map(_run_chunk, jobs):
+                tally.merge(chunk_tally)
+        return tally
+
+    def chunk_jobs(self, fights, workers=1, chunk_size=None):
+        """
+        Picklable jobs for _run_chunk that together play fights. The last item of each job is its fight count.
+        chunk_size is rounded up to whole SEED_BLOCKs.
+        """
+        if chunk_size is None:
+            chunk_size = min(MAX_CHUNK_SIZE, max(1, math.ceil(fights / (workers * CHUNKS_PER_WORKER))))
+        chunk_size = math.ceil(chunk_size / SEED_BLOCK) * SEED_BLOCK
+        root = self.randomizer.spawn(1)[0]  # A fresh stream per batch, so repeated batches differ
+        return [(self.player_config, self.enemy_key, self.policy, self.constants, self.max_rounds, root,
+                 start // SEED_BLOCK, min(chunk_size, fights - start))
+                for start in range(0, fights, chunk_size)]
+
+    # A single fight
+
+    def reset(self):
+        """ Restores the player and enemy to their pre-fight state """
+        player = self.player
+        player.current_hp = player.max_hp
+        player.current_mp = player.max_mp
+        player.herb_count = self.player_config.herbs
+        self.clear_battle_status()
+
+    def clear_battle_status(self):
+        """ Wakes the player, lifts Stopspell and gives the enemy a fresh start, leaving HP, MP and herbs alone """
+        player = self.player
+        player.is_asleep = False
+        player.is_spellstopped = False
+        player.sleep_count = SLEEP_COUNT
+        self.enemy.reset_battle_state()
+
+    def fight(self):
+        """ Plays one fight from the surprise check to the end and returns a FightResult """
+        self.reset()
+        publishing = self.publishing = self.events.listening
+        if publishing:
+            self.events.publish(FightStarted(self.enemy.name))
+        damage_taken = 0
+        skip_player_turn = self.enemy_surprises()
+        if skip_player_turn and publishing:
+            self.events.publish(PlayerSurprised(self.enemy.name))
+        rounds = 0
+        outcome = None
+        while outcome is None:
+            rounds += 1
+            if rounds > self.max_rounds:
+                outcome = FightOutcome.TIMED_OUT
+                rounds = self.max_rounds
+                break
+            if skip_player_turn:
+                skip_player_turn = False
+            else:
+                outcome = self.player_turn()
+                if publishing:
+                    self.events.publish(TurnEnded("player", self.player.current_hp, self.enemy.current_hp))
+                if outcome is not None:
+                    break
+            hp_before = self.player.current_hp
+            outcome = self.enemy_turn()
+            damage_taken += max(hp_before - self.player.current_hp, 0)
+            if publishing:
+                self.events.publish(TurnEnded("enemy", self.player.current_hp, self.enemy.current_hp))
+
+        if publishing:
+            self.events.publish(FightEnded(outcome, self.enemy.name, rounds))
+        return FightResult(outcome=outcome, rounds=rounds, player_hp=max(self.player.current_hp, 0),
+                           damage_taken=damage_taken)
+
+    def enemy_surprises(self):
+        randomizer = self.combat_engine.randomizer
+        player_roll = randomizer.agility_roll(self.player.agility)
+        enemy_roll = randomizer.agility_roll(self.enemy.agility, surprise_factor=0.25)
+        return player_roll < enemy_roll
+
+    def player_turn(self):
+        """ Runs the player's half of a round. Returns a FightOutcome if the fight ended, otherwise None """
+        player, enemy, engine = self.player, self.enemy, self.combat_engine
+        sleep = player.handle_sleep()
+        if self.publishing and sleep is not PLAYER_AWAKE:
+            self.events.publish(PlayerSleepChecked(sleep))
+        if sleep.still_asleep:
+            return None
+
+        action = self.policy.choose_action(player, enemy)
+        if action is PlayerActions.HERB and not player.has_herbs():
+            action = PlayerActions.ATTACK  # Asking for a missing herb doesn't cost the turn in the GUI either
+
+        if action is PlayerActions.ATTACK:
+            result = engine.resolve_player_attack(player.strength, player.weapon.modifier, enemy.agility, enemy.dodge,
+                                                  enemy.void_critical_hit)
+            if result & RESULT_SUCCESS:
+                enemy.take_damage(result >> AMOUNT_SHIFT)
+            if self.publishing:
+                self.events.publish(PlayerAttacked(unpack_attack(result), enemy.name))
+        elif action is PlayerActions.HERB:
+            result = engine.resolve_herb_healing(player.current_hp, player.max_hp)
+            if result & RESULT_SUCCESS:
+                player.consume_herb()
+                player.raise_hp(result >> AMOUNT_SHIFT)
+            if self.publishing:
+                self.events.publish(HerbUsed(unpack_herb(result)))
+        elif action is PlayerActions.FLEE:
+            fled = player.is_flee_successful(enemy.agility, enemy.run)
+            if self.publishing:
+                self.events.publish(FleeAttempted(fled, enemy.name))
+            if fled:
+                return FightOutcome.PLAYER_FLED
+        else:
+            result = self.cast_player_spell(action)
+            if self.publishing:
+                self.events.publish(SpellCast(unpack_spell(action, result), enemy.name))
+
+        if enemy.is_defeated():
+            return FightOutcome.PLAYER_WINS
+        return None
+
+    def cast_player_spell(self, spell):
+        """
+        Player.cast_magic on packed results. Spellstopped casts still cost MP, like in the GUI. Returns the packed
+        result of the cast, or of the MP and Stopspell check if that failed.
+        """
+        player, enemy, engine = self.player, self.enemy, self.combat_engine
+        check = engine.resolve_player_magic(spell, player.current_mp, player.is_spellstopped)
+        if not check & RESULT_SUCCESS:
+            if check >> REASON_SHIFT & REASON_MASK == PLAYER_SPELLSTOPPED:
+                player.current_mp -= spell.value.mp_cost
+            return check
+        player.current_mp -= spell.value.mp_cost
+
+        if spell is SpellType.HEAL or spell is SpellType.HEALMORE:
+            result = engine.player_casts_heal(spell, player.max_hp - player.current_hp)
+            if result & RESULT_SUCCESS:
+                player.raise_hp(result >> AMOUNT_SHIFT)
+        elif spell is SpellType.HURT or spell is SpellType.HURTMORE:
+            result = engine.player_casts_hurt(spell, enemy.hurt_resist)
+            if result & RESULT_SUCCESS:
+                enemy.take_damage(result >> AMOUNT_SHIFT)
+        elif spell is SpellType.SLEEP:
+            result = engine.player_casts_sleep(spell, enemy.enemy_sleep_count, enemy.sleep_resist)
+            if result & RESULT_SUCCESS:
+                enemy.set_sleep(result >> AMOUNT_SHIFT)
+        else:
+            result = engine.player_casts_stopspell(spell, enemy.enemy_spell_stopped, enemy.stopspell_resist)
+            if result & RESULT_SUCCESS:
+                enemy.enemy_spell_stopped = True
+        return result
+
+    def enemy_turn(self):
+        """ Runs the enemy's half of a round. Returns a FightOutcome if the fight ended, otherwise None """
+        player, enemy = self.player, self.enemy
+        sleep = enemy.process_enemy_sleep()
+        if self.publishing and sleep is not ENEMY_NOT_ASLEEP:
+            self.events.publish(EnemySleepChecked(sleep, enemy.name))
+        if sleep.success:
+            return None
+        if enemy.does_flee(player.strength):
+            if self.publishing:
+                self.events.publish(EnemyFled(enemy.name))
+            return FightOutcome.ENEMY_FLED
+
+        # Enemy.perform_enemy_action on packed results. Sleep and Stopspell are applied to the player by the engine
+        engine = self.combat_engine
+        action = enemy.choose_enemy_action(player)
+        if action is EnemyActions.ATTACK:
+            result = engine.resolve_enemy_attack(enemy.strength, player.defense())
+            player.lower_hp(result >> AMOUNT_SHIFT)
+        elif action in ENEMY_HURT_SPELLS:
+            result = engine.enemy_casts_hurt(action, player.armor.reduce_hurt_damage, enemy.enemy_spell_stopped)
+            if result & RESULT_SUCCESS:
+                player.lower_hp(result >> AMOUNT_SHIFT)
+        elif action in ENEMY_FIRE_ACTIONS:
+            result = engine.enemy_breathes_fire(action, player.armor.reduce_fire_damage)
+            player.lower_hp(result >> AMOUNT_SHIFT)
+        elif action in ENEMY_HEAL_SPELLS:
+            result = engine.enemy_casts_heal(action, enemy.enemy_spell_stopped, enemy.max_hp - enemy.current_hp)
+            if result & RESULT_SUCCESS:
+                enemy.gain_hp(result >> AMOUNT_SHIFT)
+        elif action is EnemyActions.SLEEP:
+            result = engine.enemy_casts_sleep(action, player, enemy.enemy_spell_stopped)
+        elif action is EnemyActions.STOPSPELL:
+            result = engine.enemy_casts_stopspell(action, player, enemy.enemy_spell_stopped)
+        else:
+            enemy.handle_unknown_action()
+        if self.publishing:
+            unpacked = unpack_attack(result) if action is EnemyActions.ATTACK else unpack_spell(action, result)
+            self.events.publish(EnemyActed(action, unpacked, enemy.name, player.name))
+
+        if player.is_defeated():
+            return FightOutcome.PLAYER_LOSES
+        return None
+
+
+def _run_chunk(job):
+    """ Worker entry point. Builds a fresh simulator from the job and plays its share of fights. """
+    player_config, enemy_key, policy, constants, max_rounds, root, first_block, fights = job
+    simulator = BattleSimulator(player_config, enemy_key, policy=policy, constants=constants, max_rounds=max_rounds)
+    return simulator.run_blocks(root, first_block, fights)
@@ -0,0 +1,364 @@
+"""
+Sweeps of every level, equipment combination and enemy.
+
+A SweepGrid lists the levels, weapons, armors, shields and enemies to cover; every combination is one cell. Each
+cell gets a content key hashed from what decides its fights: the player's stats and spells, the equipment
+modifiers, the enemy record (without its name) and the simulation settings. Cells with the same key are only
+simulated once, and each key's fights run on a random stream seeded by the key, so a cell's tally never depends on
+which unit or worker played it.
+
+With a Precision, each cell is sampled adaptively instead: fights becomes a cap, and a cell stops as soon as its
+win rate interval is narrow enough (see sim.adaptive). Reports give the win rate interval either way.
+
+Pending keys are cut into work units of unit_size cells and run on a process pool. Every finished unit is appended
+to a results journal in the sweep directory and flushed to disk before the next one is recorded. Running the same
+sweep again skips every key already in the journal, so an interrupted sweep resumes where it stopped.
+
+With screen set, cells whose outcome is a foregone conclusion are not simulated at all. These are cells where
+analysis.kill_counts can give the exact win chance of an attacking player, and that chance is within screen of 0 or
+1. Screened cells are reported with that chance and no fights, and are worked out again on every run rather than
+journaled.
+
+Run with: python -m fightsim.sim.sweep DIRECTORY [--levels 1-30] [--enemies slime,drakee] [--fights 1000]
+                                            [--precision 0.005 --confidence 0.95] [--screen 1e-6]
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from ..common.randomizer import Randomizer
+from ..models.combat_engine import CombatEngine
+from ..models.enemy_data import enemy_dict
+from ..models.game_constants import GameConstants
+from ..models.items import item_data
+from .adaptive import INTERVALS, Precision, sample_until
+from .policies import POLICIES, AttackPolicy
+from .simulator import MAX_ROUNDS, BattleSimulator, BattleTally, PlayerConfig
+
+SWEEP_FORMAT = 1  # Bump when the key or journal layout changes
+FIGHTS_PER_CELL = 1000
+UNIT_SIZE = 64
+JOURNAL_NAME = "results.jsonl"
+
+
+@dataclass(frozen=True)
+class SweepCell:
+    level: int
+    weapon: str
+    armor: str
+    shield: str
+    enemy_key: str
+
+
+@dataclass
+class SweepGrid:
+    """ The axes of a sweep. The defaults cover all 30 levels, every item and every enemy """
+    levels: tuple = tuple(range(1, 31))
+    weapons: tuple = tuple(item_data["weapons"])
+    armors: tuple = tuple(item_data["armors"])
+    shields: tuple = tuple(item_data["shields"])
+    enemies: tuple = tuple(enemy_dict)
+    name: str = "Rollo"
+    herbs: int = 0
+
+    def __len__(self):
+        return len(self.levels) * len(self.weapons) * len(self.armors) * len(self.shields) * len(self.enemies)
+
+    def player_configs(self):
+        for level in self.levels:
+            for weapon in self.weapons:
+                for armor in self.armors:
+                    for shield in self.shields:
+                        yield PlayerConfig(name=self.name, level=level, weapon=weapon, armor=armor, shield=shield,
+                                           herbs=self.herbs)
+
+    def cells(self):
+        """ (SweepCell, PlayerConfig) for every cell, enemies varying fastest """
+        for config in self.player_configs():
+            for enemy_key in self.enemies:
+                yield SweepCell(config.level, config.weapon, config.armor, config.shield, enemy_key), config
+
+
+@dataclass
+class SweepRow:
+    cell: SweepCell
+    key: str
+    tally: BattleTally = field(repr=False)
+    screened: Optional[float] = None  # The exact win chance of a cell that was screened instead of simulated
+
+
+def player_identity(config):
+    """ Everything about a built player that can change a fight """
+    player = config.build(CombatEngine(Randomizer(0)))
+    spells = tuple(spell.name for spell in player.player_magic if not isinstance(spell, str))
+    return (player.strength, player.agility, player.max_hp, player.max_mp, player.herb_count, spells,
+            player.weapon.modifier,
+            (player.armor.modifier, player.armor.reduce_hurt_damage, player.armor.reduce_fire_damage),
+            (player.shield.modifier, player.shield.reduce_hurt_damage, player.shield.reduce_fire_damage))
+
+
+def enemy_identity(enemy_key):
+    """ The enemy record without its display name, so identical monsters share results """
+    record = enemy_dict[enemy_key]
+    return tuple(sorted((stat, repr(value)) for stat, value in record.items() if stat != "name"))
+
+
+def cell_key(player_id, enemy_id, settings):
+    identity_text = f"{SWEEP_FORMAT}|{player_id!r}|{enemy_id!r}|{settings}"
+    return hashlib.sha256(identity_text.encode("utf-8")).hexdigest()[:24]
+
+
+class Sweep:
+    """
+    A resumable sweep over grid, journaled in directory. run() plays every pending unit, rows() matches the
+    journaled tallies back to the grid cells.
+    """
+
+    def __init__(self, grid, directory, fights=FIGHTS_PER_CELL, policy=None, constants=None, seed=0,
+                 max_rounds=MAX_ROUNDS, unit_size=UNIT_SIZE, precision=None, screen=None):
+        if screen is not None and type(policy or AttackPolicy()) is not AttackPolicy:
+            raise ValueError("Screening only applies to the attack policy")
+        self.grid = grid
+        self.directory = directory
+        self.fights = fights
+        self.precision = precision
+        self.policy = policy or AttackPolicy()
+        self.constants = constants
+        self.seed = seed
+        self.max_rounds = max_rounds
+        self.unit_size = unit_size
+        self.screen = screen
+        self.journal_path = os.path.join(directory, JOURNAL_NAME)
+        self._keyed_cells = None
+        self._screened = None
+
+    def settings(self):
+        return (f"{self.policy!r}|{self.constants or GameConstants()!r}|{self.fights}|{self.seed}|{self.max_rounds}"
+                f"|{self.precision!r}")
+
+    def keyed_cells(self):
+        """ [(SweepCell, PlayerConfig, key)] for the whole grid, computed once """
+        if self._keyed_cells is None:
+            settings = self.settings()
+            enemy_ids = {enemy_key: enemy_identity(enemy_key) for enemy_key in self.grid.enemies}
+            player_ids = {}
+            keyed = []
+            for cell, config in self.grid.cells():
+                loadout = (cell.level, cell.weapon, cell.armor, cell.shield)
+                if loadout not in player_ids:
+                    player_ids[loadout] = player_identity(config)
+                keyed.append((cell, config, cell_key(player_ids[loadout], enemy_ids[cell.enemy_key], settings)))
+            self._keyed_cells = keyed
+        return self._keyed_cells
+
+    def screened(self):
+        """ {key: exact win chance} of the cells screen leaves out, computed once """
+        if self._screened is None:
+            self._screened = {}
+            if self.screen is not None:
+                from ..analysis.kill_counts import attack_win_chance
+
+                checked = set()
+                for cell, config, key in self.keyed_cells():
+                    if key in checked:
+                        continue
+                    checked.add(key)
+                    chance = attack_win_chance(config, cell.enemy_key, self.constants)
+                    if chance is not None and (chance <= self.screen or chance >= 1 - self.screen):
+                        self._screened[key] = chance
+        return self._screened
+
+    def load(self):
+        """ Tallies already in the journal, by key. A line cut short by an interruption is ignored """
+        done = {}
+        if not os.path.exists(self.journal_path):
+            return done
+        with open(self.journal_path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                done[entry["key"]] = BattleTally(**entry["tally"])
+        return done
+
+    def pending_units(self, done=None):
+        """ The work units still to play. Each unit is a list of (key, PlayerConfig, enemy_key) """
+        done = self.load() if done is None else done
+        screened = self.screened()
+        pending = {}
+        for cell, config, key in self.keyed_cells():
+            if key not in done and key not in screened and key not in pending:
+                pending[key] = (key, config, cell.enemy_key)
+        work = list(pending.values())
+        return [work[start:start + self.unit_size] for start in range(0, len(work), self.unit_size)]
+
+    def record(self, results):
+        """ Appends one unit's results to the journal and forces them to disk """
+        lines = "".join(json.dumps({"key": key, "tally": asdict(tally)}) + "\n" for key, tally in results)
+        with open(self.journal_path, "a+b") as journal:
+            if journal.tell() > 0:
+                journal.seek(-1, os.SEEK_END)
+                if journal.read(1) != b"\n":
+                    lines = "\n" + lines  # Start clear of a line an interrupted write left unfinished
+            journal.write(lines.encode("utf-8"))
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def run(self, workers=None, executor=None, progress=None):
+        """
+        Plays every pending unit and returns the number of units played. Pass executor to reuse a pool; with one
+        worker and no executor the units run in this process. progress, if given, is called with (units done,
+        units total) after each unit is journaled.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        units = self.pending_units()
+        jobs = [(unit, self.policy, self.constants, self.fights, self.seed, self.max_rounds, self.precision)
+                for unit in units]
+        workers = workers or os.cpu_count() or 1
+
+        if executor is None and workers == 1:
+            for finished, job in enumerate(jobs, start=1):
+                self.record(_run_unit(job))
+                if progress:
+                    progress(finished, len(jobs))
+            return len(jobs)
+
+        pool = executor or ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = [pool.submit(_run_unit, job) for job in jobs]
+            for finished, future in enumerate(as_completed(futures), start=1):
+                self.record(future.result())
+                if progress:
+                    progress(finished, len(jobs))
+        finally:
+            if executor is None:
+                pool.shutdown(cancel_futures=True)
+        return len(jobs)
+
+    def rows(self):
+        """ A SweepRow for every cell with a journaled result or screened out, in grid order """
+        done = self.load()
+        screened = self.screened()
+        rows = []
+        for cell, config, key in self.keyed_cells():
+            if key in done:
+                rows.append(SweepRow(cell, key, done[key]))
+            elif key in screened:
+                rows.append(SweepRow(cell, key, BattleTally(), screened=screened[key]))
+        return rows
+
+    def write_csv(self, path):
+        """ Writes rows() as a CSV report. Returns the number of rows written """
+        rows = self.rows()
+        precision = self.precision or Precision()
+        with open(path, "w", newline="", encoding="utf-8") as report:
+            writer = csv.writer(report)
+            writer.writerow(["level", "weapon", "armor", "shield", "enemy", "fights", "win_rate", "win_low",
+                             "win_high", "loss_rate", "flee_rate", "enemy_flee_rate", "mean_rounds", "screened"])
+            for row in rows:
+                cell, tally = row.cell, row.tally
+                if row.screened is not None:
+                    win = f"{row.screened:.4f}"
+                    writer.writerow([cell.level, cell.weapon, cell.armor, cell.shield, cell.enemy_key, 0, win, win,
+                                     win, f"{1 - row.screened:.4f}", "0.0000", "0.0000", "", 1])
+                    continue
+                low, high = precision.bounds(tally.wins, tally.fights)
+                writer.writerow([cell.level, cell.weapon, cell.armor, cell.shield, cell.enemy_key, tally.fights,
+                                 f"{tally.win_rate:.4f}", f"{low:.4f}", f"{high:.4f}", f"{tally.loss_rate:.4f}",
+                                 f"{tally.flee_rate:.4f}",
+                                 f"{tally.enemy_flees / tally.fights if tally.fights else 0.0:.4f}",
+                                 f"{tally.mean_rounds:.3f}", 0])
+        return len(rows)
+
+
+def _run_unit(job):
+    """ Worker entry point. Plays every cell of one unit, each on the stream seeded by its key """
+    unit, policy, constants, fights, seed, max_rounds, precision = job
+    results = []
+    for key, config, enemy_key in unit:
+        simulator = BattleSimulator(config, enemy_key, policy=policy, constants=constants, max_rounds=max_rounds,
+                                    seed=(seed, key))
+        if precision is None:
+            results.append((key, simulator.run(fights)))
+        else:
+            results.append((key, sample_until(simulator, precision, max_fights=fights).tally))
+    return results
+
+
+def parse_levels(text):
+    """ "1-30" or "1,5,10-12" into a tuple of levels """
+    levels = []
+    for part in text.split(","):
+        low, _, high = part.partition("-")
+        levels.extend(range(int(low), int(high or low) + 1))
+    return tuple(levels)
+
+
+def parse_names(text, known, what):
+    if text is None:
+        return tuple(known)
+    names = tuple(name.strip() for name in text.split(","))
+    for name in names:
+        if name not in known:
+            raise SystemExit(f"Unknown {what}: {name}")
+    return names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep levels x equipment x enemies and report win rates.")
+    parser.add_argument("directory", help="Where the results journal and report are kept")
+    parser.add_argument("--levels", default="1-30")
+    parser.add_argument("--weapons")
+    parser.add_argument("--armors")
+    parser.add_argument("--shields")
+    parser.add_argument("--enemies")
+    parser.add_argument("--herbs", type=int, default=0)
+    parser.add_argument("--fights", type=int, default=FIGHTS_PER_CELL,
+                        help="Fights per cell, or the most per cell with --precision")
+    parser.add_argument("--precision", type=float, help="Stop each cell once its win rate is known to +- this")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--interval", choices=INTERVALS, default="wilson")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="attack")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--unit-size", type=int, default=UNIT_SIZE)
+    parser.add_argument("--screen", type=float, metavar="TOLERANCE",
+                        help="Don't simulate cells an attacking player wins or loses all but this often")
+    args = parser.parse_args(argv)
+    if args.screen is not None and args.policy != "attack":
+        parser.error("--screen only applies to --policy attack")
+
+    grid = SweepGrid(levels=parse_levels(args.levels),
+                     weapons=parse_names(args.weapons, item_data["weapons"], "weapon"),
+                     armors=parse_names(args.armors, item_data["armors"], "armor"),
+                     shields=parse_names(args.shields, item_data["shields"], "shield"),
+                     enemies=parse_names(args.enemies, enemy_dict, "enemy"), herbs=args.herbs)
+    precision = Precision(args.precision, args.confidence, args.interval) if args.precision else None
+    sweep = Sweep(grid, args.directory, fights=args.fights, policy=POLICIES[args.policy](), seed=args.seed,
+                  unit_size=args.unit_size, precision=precision, screen=args.screen)
+    unique = len({key for _, _, key in sweep.keyed_cells()})
+    print(f"{len(grid):,} cells, {unique:,} distinct matchups")
+    if args.screen is not None:
+        print(f"{len(sweep.screened()):,} matchups screened out as one-sided")
+
+    def progress(done, total):
+        print(f"\runits {done:,}/{total:,}", end="", flush=True)
+
+    played = sweep.run(workers=args.workers, progress=progress)
+    if played:
+        print()
+    rows = sweep.rows()
+    print(f"{sum(row.tally.fights for row in rows):,} fights played across {len(rows):,} cells")
+    report = os.path.join(args.directory, "sweep.csv")
+    print(f"Wrote {sweep.write_csv(report):,} rows to {report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import unittest
+from ..common.messages import FightOutcome
+from ..sim.adaptive import Precision, clopper_pearson_interval, sample_until, wilson_interval
+from ..sim.simulator import BattleSimulator, PlayerConfig
+
+
+class TestIntervals(unittest.TestCase):
+    def test_wilson_known_value(self):
+        low, high = wilson_interval(50, 100, 0.95)
+
+        assert abs(low - 0.4038) < 1e-4
+        assert abs(high - 0.5962) < 1e-4
+
+    def test_clopper_pearson_known_value(self):
+        low, high = clopper_pearson_interval(50, 100, 0.95)
+
+        assert abs(low - 0.3983) < 1e-4
+        assert abs(high - 0.6017) < 1e-4
+
+    def test_edges(self):
+        assert wilson_interval(0, 0) == (0.0, 1.0)
+        assert clopper_pearson_interval(0, 20)[0] == 0.0
+        assert clopper_pearson_interval(20, 20)[1] == 1.0
+        assert wilson_interval(20, 20)[1] == 1.0
+
+    def test_bad_precision(self):
+        with self.assertRaises(ValueError):
+            Precision(interval="bayes")
+        with self.assertRaises(ValueError):
+            Precision(half_width=0)
+
+
+class TestSampleUntil(unittest.TestCase):
+    def test_one_sided_matchup_stops_early(self):
+        simulator = BattleSimulator(PlayerConfig(level=1), 'dragonlord_second', seed=1)
+        estimate = sample_until(simulator, Precision(0.01), max_fights=100_000)
+
+        assert estimate.converged
+        assert estimate.tally.fights < 1000
+        assert estimate.rate == 0.0
+        assert estimate.high - estimate.low <= 0.02
+
+    def test_interval_covers_the_rate_and_is_repeatable(self):
+        config = PlayerConfig(level=5, weapon="Copper Sword")
+        first = sample_until(BattleSimulator(config, 'skeleton', seed=2), Precision(0.02, interval="clopper-pearson"))
+        second = sample_until(BattleSimulator(config, 'skeleton', seed=2), Precision(0.02, interval="clopper-pearson"))
+
+        assert first.converged
+        assert first.low <= first.rate <= first.high
+        assert first.tally == second.tally
+
+    def test_max_fights_caps_sampling(self):
+        simulator = BattleSimulator(PlayerConfig(level=5, weapon="Copper Sword"), 'skeleton', seed=3)
+        estimate = sample_until(simulator, Precision(0.001), outcome=FightOutcome.PLAYER_LOSES, max_fights=300)
+
+        assert not estimate.converged
+        assert estimate.tally.fights == 300
+        assert estimate.rate == estimate.tally.loss_rate
+
+    def test_chunk_must_divide_seed_block(self):
+        simulator = BattleSimulator(PlayerConfig(level=5), 'slime', seed=3)
+        with self.assertRaises(ValueError):
+            sample_until(simulator, Precision(), chunk=100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import time
+import unittest
+from concurrent.futures import Future
+from ..sim.background import BackgroundBatch, SimulationPool
+from ..sim.simulator import BattleSimulator, PlayerConfig
+
+
+def wait_for(batch, timeout=60):
+    deadline = time.monotonic() + timeout
+    while not batch.poll():
+        assert time.monotonic() < deadline, "background batch did not finish"
+        time.sleep(0.01)
+
+
+class TestSimulationPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = SimulationPool(workers=1).warm_up()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+
+    def simulator(self):
+        return BattleSimulator(PlayerConfig(level=10, weapon="Copper Sword"), "skeleton", seed=5)
+
+    def test_batch_matches_run_parallel(self):
+        batch = self.pool.submit(self.simulator(), 3000)
+        assert not batch.cancelled
+        wait_for(batch)
+        assert batch.played == 3000
+        assert batch.tally == self.simulator().run_parallel(3000, workers=1)
+
+    def test_cancel_stops_counting(self):
+        batch = self.pool.submit(self.simulator(), 50_000)
+        batch.cancel()
+        assert batch.done and batch.cancelled
+        assert batch.played < 50_000
+        assert batch.poll()
+
+
+class TestBackgroundBatch(unittest.TestCase):
+    def test_failed_chunk_ends_the_batch(self):
+        failed, waiting = Future(), Future()
+        failed.set_exception(RuntimeError("worker died"))
+        batch = BackgroundBatch(2048, [failed, waiting])
+
+        assert batch.poll()
+        assert isinstance(batch.error, RuntimeError)
+        assert waiting.cancelled()
+        assert batch.played == 0 and not batch.cancelled
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import numpy as np
+from ..models.batch_engine import BatchCombatEngine, NO_REASON
+from ..models.combat_engine import CombatEngine
+from ..models.spells import SpellType
+from ..common.messages import SpellFailureReason, HerbFailureReason, EnemyActions
+
+N = 20_000
+
+
+class TestBatchCombatEngine(unittest.TestCase):
+    def setUp(self):
+        self.batch_engine = BatchCombatEngine()
+        self.combat_engine = CombatEngine(None)
+        self.rng = np.random.default_rng(1234)
+
+    def test_damage_ranges_match_scalar_engine(self):
+        attacks = np.arange(0, 200)
+        for agility in (0, 3, 60, 200, 255):
+            low, high = self.batch_engine.player_damage_range(attacks, agility)
+            expected = [self.combat_engine.player_damage_range(a, agility) for a in attacks]
+            assert list(zip(low.tolist(), high.tolist())) == expected
+
+        low, high = self.batch_engine.player_crit_range(attacks)
+        assert list(zip(low.tolist(), high.tolist())) == [self.combat_engine.player_crit_range(a) for a in attacks]
+
+    def test_player_attack_damage_stays_in_range(self):
+        strength = np.full(N, 30)
+        result = self.batch_engine.resolve_player_attack_batch(strength, 10, 40, 1, False, self.rng)
+        normal_low, normal_high = self.combat_engine.player_damage_range(40, 40)
+        crit_low, crit_high = self.combat_engine.player_crit_range(40)
+
+        normal = result.damage[~result.crit]
+        crits = result.damage[result.crit]
+        assert normal.min() == normal_low and normal.max() == normal_high
+        assert crits.min() >= crit_low and crits.max() <= crit_high
+        assert abs(result.crit.mean() - 1 / 32) < 0.01
+        assert np.array_equal(result.hit, ~(result.dodge & ~result.crit))
+
+    def test_player_attack_blocked_crits_and_certain_dodge(self):
+        result = self.batch_engine.resolve_player_attack_batch(np.full(N, 30), 10, 40, 64, True, self.rng)
+
+        assert not result.crit.any()
+        assert result.dodge.all()
+        assert not result.hit.any()
+
+    def test_enemy_attack_uses_weak_and_normal_ranges(self):
+        defense = np.array([5, 21] * (N // 2))
+        damage = self.batch_engine.resolve_enemy_attack_batch(20, defense, self.rng)
+
+        normal = damage[defense == 5]
+        assert (normal.min(), normal.max()) == self.combat_engine.normal_damage_range(20, 5)
+        weak = damage[defense == 21]
+        assert weak.min() == 0 and weak.max() == 4
+
+    def test_player_hurt_resisted(self):
+        result = self.batch_engine.player_casts_hurt_batch(SpellType.HURT, np.array([0, 16] * (N // 2)), self.rng)
+
+        assert result.success[0::2].all()
+        assert result.amount[0::2].min() == 5 and result.amount[0::2].max() == 12
+        assert not result.success[1::2].any()
+        assert (result.amount[1::2] == 0).all()
+        assert (result.reason[1::2] == SpellFailureReason.ENEMY_RESISTED_HURT.value).all()
+
+    def test_player_heal_capped_and_at_max_hp(self):
+        result = self.batch_engine.player_casts_heal_batch(SpellType.HEAL, np.array([0, 5, 50]), self.rng)
+
+        assert result.success.tolist() == [False, True, True]
+        assert result.amount[1] == 5
+        assert 10 <= result.amount[2] <= 17
+        assert result.reason[0] == SpellFailureReason.HEALED_AT_MAX_HP.value
+
+    def test_player_sleep_and_stopspell(self):
+        sleep = self.batch_engine.player_casts_sleep_batch(SpellType.SLEEP, np.array([1, 0, 0]),
+                                                           np.array([0, 16, 0]), self.rng)
+        assert sleep.success.tolist() == [False, False, True]
+        assert sleep.reason.tolist() == [SpellFailureReason.ENEMY_ALREADY_ASLEEP.value,
+                                         SpellFailureReason.ENEMY_RESISTED_SLEEP.value, NO_REASON]
+        assert sleep.amount[2] == 2
+
+        stop = self.batch_engine.player_casts_stopspell_batch(SpellType.STOPSPELL, np.array([True, False, False]),
+                                                              np.array([0, 16, 0]), self.rng)
+        assert stop.success.tolist() == [False, False, True]
+
+    def test_herb_healing(self):
+        result = self.batch_engine.resolve_herb_healing_batch(np.array([999, 996, 10]), 999, self.rng)
+
+        assert result.success.tolist() == [False, True, True]
+        assert result.healing[0] == 0 and result.reason[0] == HerbFailureReason.MAX_HP.value
+        assert result.healing[1] == 3
+        assert 23 <= result.healing[2] <= 30
+
+    def test_enemy_spells(self):
+        hurt = self.batch_engine.enemy_casts_hurt_batch(EnemyActions.HURT, np.array([False, True] * (N // 2)),
+                                                        False, self.rng)
+        assert hurt.amount[0::2].min() == 3 and hurt.amount[0::2].max() == 10
+        assert hurt.amount[1::2].min() == 2 and hurt.amount[1::2].max() == 6
+
+        stopped = self.batch_engine.enemy_casts_hurt_batch(EnemyActions.HURT, False, np.ones(10, dtype=bool),
+                                                           self.rng)
+        assert not stopped.success.any()
+
+        fire = self.batch_engine.enemy_breathes_fire_batch(EnemyActions.STRONGFIRE, np.ones(N, dtype=bool), self.rng)
+        assert fire.amount.min() == 42 and fire.amount.max() == 48
+
+        heal = self.batch_engine.enemy_casts_heal_batch(EnemyActions.HEAL, np.array([False, False, True]),
+                                                        np.array([5, 100, 100]), self.rng)
+        assert heal.amount[0] == 5 and 20 <= heal.amount[1] <= 27 and heal.amount[2] == 0
+
+    def test_enemy_flees_only_from_strong_players(self):
+        flees = self.batch_engine.enemy_flees_batch(10, np.array([20, 21] * (N // 2)), self.rng)
+
+        assert not flees[0::2].any()
+        assert abs(flees[1::2].mean() - 0.25) < 0.02
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import sys
+import unittest
+
+from ..common.events import FightEnded, TurnEnded
+from ..common.messages import PlayerActions
+from ..common.randomizer import Randomizer
+from ..controllers.battle_controller import BattleController, BattlePhase
+from ..models.combat_engine import CombatEngine
+from ..models.enemy import create_enemy
+from ..models.game_constants import GameConstants
+from ..models.game_state import GameState
+from ..models.spells import SpellType
+from ..sim.simulator import PlayerConfig
+
+
+def stack_depth():
+    frame, depth = sys._getframe(), 0
+    while frame is not None:
+        frame, depth = frame.f_back, depth + 1
+    return depth
+
+
+class TestBattleController(unittest.TestCase):
+    def setUp(self):
+        engine = CombatEngine(Randomizer(seed=7), GameConstants())
+        player = PlayerConfig(level=1).build(engine)
+        player.max_hp = player.current_hp = 10 ** 7  # Outlasts any golem, so only the test decides when fights end
+        self.game_state = GameState(player=player, combat_engine=engine, enemy=create_enemy("golem", engine))
+        self.controller = BattleController(self.game_state, None)
+
+    def test_fight_waits_for_player_input(self):
+        self.controller.start_battle()
+        assert self.controller.phase is BattlePhase.AWAITING_INPUT
+        assert self.controller.outcome is None
+
+    def test_long_fight_keeps_constant_stack_depth(self):
+        depths = set()
+        self.controller.events.subscribe(lambda event: depths.add(stack_depth()), TurnEnded)
+        self.controller.start_battle()
+        turns = 0
+        while self.controller.phase is BattlePhase.AWAITING_INPUT and turns < 5000:
+            # A level 1 player has no MP, so every cast fails and the fight never ends on its own
+            self.controller.act(SpellType.HURT)
+            turns += 1
+        assert turns == 5000
+        assert self.controller.rounds >= 5000
+        assert max(depths) - min(depths) < 10  # Mutually recursive turns would be thousands of frames deep by now
+
+    def test_nothing_runs_after_the_fight_ends(self):
+        ended = []
+        self.controller.events.subscribe(ended.append, FightEnded)
+        self.game_state.player.current_hp = 1
+        self.controller.start_battle()
+        while self.controller.phase is not BattlePhase.FIGHT_OVER:
+            self.controller.act(PlayerActions.ATTACK)
+        assert len(ended) == 1
+        assert ended[0].outcome is self.controller.outcome
+        assert ended[0].rounds == self.controller.rounds
+        assert self.controller.act(PlayerActions.ATTACK) is BattlePhase.FIGHT_OVER
+        assert len(ended) == 1
+
+    def test_sleeping_enemy_skips_its_turn(self):
+        self.controller.start_battle()
+        self.game_state.enemy.enemy_sleep_count = 2
+        hp = self.game_state.player.current_hp
+        rounds = self.controller.rounds
+        assert self.controller.act(SpellType.HURT) is BattlePhase.AWAITING_INPUT
+        assert self.game_state.player.current_hp == hp
+        assert self.controller.rounds == rounds + 1
+
+    def test_unselected_spell_does_not_cost_the_turn(self):
+        self.controller.start_battle()
+        rounds = self.controller.rounds
+        assert self.controller.act("No Magic Available") is BattlePhase.AWAITING_INPUT
+        assert self.controller.rounds == rounds
+
+
+if __name__ == '__main__':
+    unittest.main()
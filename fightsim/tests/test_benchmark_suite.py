@@ -0,0 +1,36 @@
+import unittest
+from ..benchmarks.suite import calls_per_second, compare, fight_benchmarks, FIGHT_MATCHUPS
+
+
+def report(**rates):
+    return {"results": {name: {"rate": rate, "peak_rss_kib": 1000} for name, rate in rates.items()}}
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_compare_flags_slowdowns_beyond_threshold(self):
+        baseline = report(fast=100.0, slow=100.0, gone=100.0)
+        current = report(fast=95.0, slow=80.0, new=1.0)
+        regressions = compare(baseline, current, threshold=0.1)
+        assert [(regression.name, regression.measure) for regression in regressions] == [("slow", "rate")]
+        assert abs(regressions[0].change + 0.2) < 1e-12
+
+    def test_compare_flags_memory_growth(self):
+        baseline = report(fights=100.0)
+        current = report(fights=100.0)
+        current["results"]["fights"]["peak_rss_kib"] = 2000
+        assert [regression.measure for regression in compare(baseline, current)] == ["peak_rss_kib"]
+
+    def test_calls_per_second(self):
+        calls = []
+        rate = calls_per_second(lambda: calls.append(None), min_seconds=0.001, repeats=2)
+        assert rate > 0
+        assert len(calls) >= 128
+
+    def test_fight_benchmarks_cover_every_matchup(self):
+        results = fight_benchmarks(fights=20)
+        assert len(results) == len(FIGHT_MATCHUPS)
+        assert all(result.unit == "fights/s" and result.rate > 0 for result in results)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from collections import Counter
+from ..common.buffered_randomizer import BufferedRandomizer
+from ..models.combat_engine import CombatEngine
+from ..models.player import player_factory
+from ..sim.simulator import BattleSimulator, PlayerConfig
+
+
+class TestBufferedRandomizer(unittest.TestCase):
+    def test_randint_is_uniform_over_the_range(self):
+        randomizer = BufferedRandomizer(seed=1, block_size=256)
+        counts = Counter(randomizer.randint(3, 7) for _ in range(50_000))
+
+        assert set(counts) == {3, 4, 5, 6, 7}
+        assert all(abs(count / 50_000 - 0.2) < 0.01 for count in counts.values())
+
+    def test_empty_range_raises(self):
+        with self.assertRaises(ValueError):
+            BufferedRandomizer(seed=1).randint(5, 4)
+        with self.assertRaises(IndexError):
+            BufferedRandomizer(seed=1).choice([])
+
+    def test_seeded_and_spawned_streams(self):
+        first = BufferedRandomizer(seed=9)
+        second = BufferedRandomizer(seed=9)
+        assert [first.randint(1, 100) for _ in range(10)] == [second.randint(1, 100) for _ in range(10)]
+
+        child = first.spawn(1)[0]
+        assert isinstance(child, BufferedRandomizer)
+        assert [child.randint(1, 100) for _ in range(10)] != [second.randint(1, 100) for _ in range(10)]
+
+    def test_drop_in_for_engine_and_simulator(self):
+        player = player_factory(CombatEngine(BufferedRandomizer(seed=2)))
+        player.is_asleep = True
+        assert player.handle_sleep() is not None
+
+        config = PlayerConfig(level=10, weapon="Copper Sword")
+        serial = BattleSimulator(config, 'skeleton', seed=4, randomizer_class=BufferedRandomizer)
+        pooled = BattleSimulator(config, 'skeleton', seed=4, randomizer_class=BufferedRandomizer)
+        assert serial.run_parallel(3000, workers=1) == pooled.run_parallel(3000, workers=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
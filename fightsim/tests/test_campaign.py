@@ -0,0 +1,83 @@
+import unittest
+from ..sim.campaign import Campaign, CampaignSimulator, CampaignTally
+from ..sim.policies import CautiousPolicy
+from ..sim.simulator import PlayerConfig
+
+
+class ResultLog:
+    def __init__(self):
+        self.results = []
+
+    def record(self, result):
+        self.results.append(result)
+
+
+class TestCampaign(unittest.TestCase):
+    config = PlayerConfig(level=3, herbs=2)
+    campaign = Campaign({"slime": 3, "drakee": 2, "ghost": 1}, length=12, rest_after=(6,))
+
+    def simulator(self, campaign=None, seed=5):
+        return CampaignSimulator(self.config, campaign or self.campaign, policy=CautiousPolicy(), seed=seed)
+
+    def test_hp_carries_over_between_fights(self):
+        simulator = self.simulator(Campaign({"ghost": 1}, length=2))
+        simulator.rest()
+        simulator.draw_encounter()
+        simulator.fight()
+        hp = simulator.player.current_hp
+        assert hp < simulator.player.max_hp
+        simulator.reset()
+        assert simulator.player.current_hp == hp
+
+    def test_rest_restores_hp_mp_and_herbs(self):
+        simulator = self.simulator()
+        player = simulator.player
+        player.current_hp, player.current_mp, player.herb_count = 1, 0, 0
+        simulator.rest()
+        assert (player.current_hp, player.current_mp, player.herb_count) == (player.max_hp, player.max_mp, 2)
+
+    def test_tally_accounts_for_every_trip(self):
+        tally = self.simulator().run(500)
+        assert tally.trips == 500
+        assert tally.survived + sum(tally.deaths) + tally.stalled == 500
+        assert sum(tally.deaths_by_enemy.values()) == sum(tally.deaths)
+        assert sum(tally.fights_by_enemy.values()) == tally.encounters
+        curve = tally.survival_curve()
+        assert all(later <= earlier for earlier, later in zip(curve, curve[1:]))
+        assert curve[-1] == tally.survival_rate
+
+    def test_rest_refills_the_means(self):
+        hp = self.simulator().run(500).mean_curve("hp")
+        assert hp[6] > hp[5]
+        assert max(hp) <= self.config.build(self.simulator().combat_engine).max_hp
+
+    def test_trips_are_reproducible_and_logged(self):
+        log = ResultLog()
+        tally = self.simulator().run(50, log)
+        assert tally == self.simulator().run(50)
+        assert len(log.results) == tally.encounters
+
+    def test_parallel_matches_for_any_worker_count(self):
+        serial = self.simulator().run_parallel(2500, workers=1, chunk_size=1)
+        pooled = self.simulator().run_parallel(2500, workers=2, chunk_size=2000)
+        assert serial == pooled
+        assert serial.trips == 2500
+
+    def test_merge_adds_counts(self):
+        first, second = self.simulator(seed=1).run(100), self.simulator(seed=2).run(100)
+        merged = CampaignTally(self.campaign.length).merge(first).merge(second)
+        assert merged.trips == 200
+        assert merged.alive == [a + b for a, b in zip(first.alive, second.alive)]
+        assert merged.deaths_by_enemy == first.deaths_by_enemy + second.deaths_by_enemy
+
+    def test_bad_campaigns_raise(self):
+        with self.assertRaises(ValueError):
+            Campaign({}, length=5)
+        with self.assertRaises(ValueError):
+            Campaign({"slime": 0}, length=5)
+        with self.assertRaises(ValueError):
+            Campaign({"slime": 1}, length=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from ..benchmarks.startup_bench import loaded_forbidden_modules
+from ..cli import main
+
+
+def run(*argv):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        assert main(list(argv)) == 0
+    return output.getvalue()
+
+
+class TestCli(unittest.TestCase):
+    def test_simulate_json(self):
+        report = json.loads(run("simulate", "--level", "12", "--weapon", "Broad Sword", "--enemy", "golem",
+                                "-n", "500", "--seed", "3", "--json"))
+        assert report["enemy"] == "golem"
+        assert report["player"]["weapon"] == "Broad Sword"
+        assert report["fights"] == 500
+        assert report["wins"] + report["losses"] + report["flees"] + report["enemy_flees"] + report["timeouts"] == 500
+        assert report["win_rate"] == report["wins"] / 500
+
+    def test_simulate_is_seeded(self):
+        arguments = ("simulate", "--enemy", "Slime", "-n", "200", "--seed", "9", "--json")
+        assert run(*arguments) == run(*arguments)
+
+    def test_simulate_ignores_worker_count(self):
+        arguments = ("simulate", "--level", "10", "--enemy", "skeleton", "-n", "3000", "--seed", "3", "--json")
+        assert run(*arguments, "--workers", "1") == run(*arguments, "--workers", "2")
+
+    def test_solve_json(self):
+        report = json.loads(run("solve", "--level", "5", "--enemy", "slime", "--json"))
+        assert 0.9 < report["win"] <= 1.0
+        assert abs(report["win"] + report["loss"] + report["player_fled"] + report["enemy_fled"] - 1) < 1e-9
+
+    def test_solve_optimal_with_limited_actions(self):
+        arguments = ("solve", "--level", "3", "--weapon", "Club", "--enemy", "drakee", "--optimal", "--no-cache")
+        attack_only = json.loads(run(*arguments, "--actions", "attack", "--json"))
+        with_herbs = json.loads(run(*arguments, "--herbs", "1", "--actions", "attack,herb", "--json"))
+        assert 0 < attack_only["win"] <= with_herbs["win"] <= 1
+        with self.assertRaises(SystemExit):
+            run(*arguments, "--actions", "attack,teleport")
+
+    def test_sweep_passes_arguments_through(self):
+        with tempfile.TemporaryDirectory() as directory:
+            run("sweep", directory, "--levels", "3", "--weapons", "Club", "--armors", "Naked",
+                "--shields", "No Shield", "--enemies", "slime", "--fights", "50", "--workers", "1")
+            assert os.path.exists(os.path.join(directory, "sweep.csv"))
+
+    def test_record_and_replay(self):
+        with tempfile.TemporaryDirectory() as directory:
+            arguments = ("simulate", "--level", "8", "--enemy", "skeleton", "-n", "40", "--seed", "5", "--json")
+            recorded = json.loads(run(*arguments, "--record", directory))
+            assert recorded == json.loads(run(*arguments))
+            replayed = json.loads(run("replay", directory, "--fight", "39", "--json"))
+            assert replayed["fight"] == 39 and replayed["draws"] > 0
+            assert replayed["events"][-1].startswith("FightEnded")
+            with self.assertRaises(SystemExit):
+                run("replay", directory, "--fight", "40")
+
+    def test_loadout_json(self):
+        report = json.loads(run("loadout", "--level", "2", "--enemy", "ghost", "--enemy", "Magician:3",
+                                "--no-edricks", "--budget", "1000", "--json"))
+        assert report["enemies"] == {"ghost": 1.0, "magician": 3.0}
+        assert report["solved"] <= report["classes"] < report["permitted"]
+        assert all(entry["price"] <= 1000 for entry in report["ranking"])
+
+    def test_campaign_json(self):
+        report = json.loads(run("campaign", "--level", "3", "--herbs", "2", "--encounter", "slime:3",
+                                "--encounter", "ghost", "--length", "8", "--rest-after", "4", "-n", "200",
+                                "--seed", "1", "--json"))
+        assert report["encounters"] == {"slime": 3, "ghost": 1}
+        assert report["trips"] == 200
+        assert len(report["survival_curve"]) == 8
+        assert abs(report["survival_rate"] + report["death_rate"] + report["stalled"] / 200 - 1) < 1e-9
+        with self.assertRaises(SystemExit):
+            run("campaign", "--encounter", "slime:0.5")
+
+    def test_campaign_ignores_worker_count(self):
+        arguments = ("campaign", "--level", "8", "--weapon", "Copper Sword", "--encounter", "skeleton:2",
+                     "--encounter", "ghost", "--length", "10", "-n", "1500", "--seed", "2", "--json")
+        assert run(*arguments, "--workers", "1") == run(*arguments, "--workers", "2")
+
+    def test_bad_arguments_exit(self):
+        with self.assertRaises(SystemExit):
+            run("simulate", "--enemy", "no such enemy")
+        with self.assertRaises(SystemExit):
+            run("simulate", "--enemy", "slime", "--weapon", "Spoon")
+
+    def test_cli_never_loads_the_gui(self):
+        assert loaded_forbidden_modules() == []
+
+
+if __name__ == '__main__':
+    unittest.main()
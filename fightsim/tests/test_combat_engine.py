@@ -1,7 +1,9 @@
 import unittest
-from ..models.combat_engine import CombatEngine
+from types import SimpleNamespace
+from ..models.combat_engine import CombatEngine, PackedCombatEngine
 from ..models.spells import SpellType, SpellFailureReason
-from ..common.messages import HerbFailureReason, HerbResult, EnemyActions
+from ..common.messages import (HerbFailureReason, HerbResult, EnemyActions, unpack_attack, unpack_herb,
+                               unpack_spell)
 
 class FakeRandomizer:
     """A deterministic randomizer for testing"""
@@ -276,4 +278,65 @@ class TestCombatEngine(unittest.TestCase):
 
         assert result.success == True
         assert result.amount >= 0
-        assert result.reason == None
\ No newline at end of file
+        assert result.reason == None
+
+
+class TestPackedCombatEngine(unittest.TestCase):
+    """ The packed engine must agree with CombatEngine when fed the same draws """
+
+    def engines(self, sequence):
+        return CombatEngine(FakeRandomizer(sequence=sequence)), PackedCombatEngine(FakeRandomizer(sequence=sequence))
+
+    def test_attacks_match(self):
+        for sequence in ([2, 10, 20], [1, 10], [2, 1], [1, 1, 7]):
+            with self.subTest(sequence=sequence):
+                engine, packed = self.engines(sequence)
+                args = dict(player_strength=50, player_weapon=10, enemy_agility=30, enemy_dodge_chance=5,
+                            enemy_blocks_crits=False)
+                assert unpack_attack(packed.resolve_player_attack(**args)) == engine.resolve_player_attack(**args)
+
+        engine, packed = self.engines([5])
+        assert unpack_attack(packed.resolve_enemy_attack(20, 10)) == engine.resolve_enemy_attack(20, 10)
+
+    def test_spells_match(self):
+        calls = [
+            ("resolve_player_magic", (SpellType.HEAL, 2, False)),
+            ("resolve_player_magic", (SpellType.HEAL, 10, True)),
+            ("player_casts_heal", (SpellType.HEAL, 0)),
+            ("player_casts_heal", (SpellType.HEALMORE, 40)),
+            ("player_casts_hurt", (SpellType.HURT, 15)),
+            ("player_casts_sleep", (SpellType.SLEEP, 0, 15)),
+            ("player_casts_sleep", (SpellType.SLEEP, 2, 0)),
+            ("player_casts_stopspell", (SpellType.STOPSPELL, False, 15)),
+            ("enemy_casts_hurt", (EnemyActions.HURTMORE, True, False)),
+            ("enemy_casts_heal", (EnemyActions.HEAL, False, 10)),
+            ("enemy_casts_heal", (EnemyActions.HEAL, True, 10)),
+        ]
+        for method, args in calls:
+            with self.subTest(method=method, args=args):
+                engine, packed = self.engines([9, 3])
+                expected = getattr(engine, method)(*args)
+                assert unpack_spell(args[0], getattr(packed, method)(*args)) == expected
+
+    def test_stopspell_failures_name_stopspell(self):
+        engine, _ = self.engines([1])
+        result = engine.player_casts_stopspell(SpellType.STOPSPELL, False, 15)
+
+        assert result.reason == SpellFailureReason.ENEMY_RESISTED_SPELLSTOP
+        assert result.spell_name == "Stopspell"
+
+    def test_herbs_match(self):
+        for current_hp in (10, 30):
+            with self.subTest(current_hp=current_hp):
+                engine, packed = self.engines([25])
+                expected = engine.resolve_herb_healing(current_hp, 30)
+                assert unpack_herb(packed.resolve_herb_healing(current_hp, 30)) == expected
+
+    def test_enemy_status_spells_change_player(self):
+        player = SimpleNamespace(is_asleep=False, is_spellstopped=False)
+        _, packed = self.engines([2])
+
+        packed.enemy_casts_sleep(EnemyActions.SLEEP, player, False)
+        packed.enemy_casts_stopspell(EnemyActions.STOPSPELL, player, False)
+
+        assert player.is_asleep and player.is_spellstopped
@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+import unittest
+from ..common.buffered_randomizer import BufferedRandomizer
+from ..sim.draw_log import DrawLog, DrawLogWriter, ReplayRandomizer, decode_draws
+from ..sim.policies import CautiousPolicy
+from ..sim.simulator import BattleSimulator, PlayerConfig
+
+
+class TestDrawLog(unittest.TestCase):
+    config = PlayerConfig(level=12, weapon="Broad Sword", armor="Chain Mail", herbs=2)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def simulator(self, **kwargs):
+        return BattleSimulator(self.config, "wizard", policy=CautiousPolicy(), **kwargs)
+
+    def record(self, fights, **kwargs):
+        with DrawLogWriter(self.directory.name, metadata={"enemy": "wizard"}, flush_bytes=64) as writer:
+            return writer.write_simulation(self.simulator(seed=7, **kwargs), fights)
+
+    def test_recording_does_not_change_the_fights(self):
+        assert self.record(300) == self.simulator(seed=7).run(300)
+
+    def test_seed_blocks_match_run_parallel(self):
+        with DrawLogWriter(self.directory.name, flush_bytes=64) as writer:
+            tally = writer.write_simulation(self.simulator(seed=7), 1100, seed_blocks=True)
+        assert tally == self.simulator(seed=7).run_parallel(1100, workers=1)
+        assert tally != self.simulator(seed=7).run(1100)
+
+    def test_replay_reproduces_every_fight(self):
+        original = self.simulator(seed=7)
+        results = [original.fight() for _ in range(200)]
+        self.record(200)
+        with DrawLog(self.directory.name) as log:
+            assert len(log) == 200
+            assert log.metadata == {"enemy": "wizard"}
+            replayer = self.simulator()
+            for fight in (0, 150, 17, 199, 17):
+                assert log.replay(replayer, fight) == results[fight]
+
+    def test_replay_refuses_other_code_versions(self):
+        self.record(5)
+        header_path = os.path.join(self.directory.name, "header.json")
+        with open(header_path, encoding="utf-8") as header_file:
+            header = json.load(header_file)
+        header["code_version"] = "0" * 16
+        with open(header_path, "w", encoding="utf-8") as header_file:
+            json.dump(header, header_file)
+        with DrawLog(self.directory.name) as log:
+            with self.assertRaisesRegex(ValueError, "code version"):
+                log.replay(self.simulator(), 0)
+            assert log.replay(self.simulator(), 0, check_version=False).rounds > 0
+
+    def test_buffered_randomizer_replays_too(self):
+        original = self.simulator(seed=7, randomizer_class=BufferedRandomizer)
+        results = [original.fight() for _ in range(50)]
+        self.record(50, randomizer_class=BufferedRandomizer)
+        with DrawLog(self.directory.name) as log:
+            assert [log.replay(self.simulator(), fight) for fight in range(50)] == results
+
+    def test_index_spans_cover_the_file(self):
+        self.record(100)
+        with DrawLog(self.directory.name) as log:
+            spans = [log.span(fight) for fight in range(len(log))]
+            assert spans[0][0] == 8
+            assert all(stop == start for (_, stop), (start, _) in zip(spans, spans[1:]))
+            assert spans[-1][1] == os.path.getsize(os.path.join(self.directory.name, "draws.bin"))
+            with self.assertRaises(IndexError):
+                log.span(100)
+
+    def test_draw_encoding(self):
+        writer = DrawLogWriter(self.directory.name)
+        draws = [(1, 255, 200), (0, 0, 0), (-3, 2, -1), (1, 100_000, 99_999)]
+        writer.begin_fight()
+        for draw in draws:
+            writer.record(*draw)
+        writer.close()
+        with DrawLog(self.directory.name) as log:
+            assert log.draws(0) == draws
+        with self.assertRaises(ValueError):
+            decode_draws(b"\x02\x80")
+
+    def test_replay_detects_divergence(self):
+        replayed = ReplayRandomizer([(1, 255, 9), (1, 64, 3)])
+        assert replayed.agility_roll(10, 0.5) == 45
+        with self.assertRaises(ValueError):
+            replayed.randint(1, 32)
+        replayed.randint(1, 64)
+        with self.assertRaises(ValueError):
+            replayed.randint(1, 64)
+
+    def test_replay_against_another_matchup_fails(self):
+        self.record(20)
+        with DrawLog(self.directory.name) as log:
+            with self.assertRaises(ValueError):
+                for fight in range(len(log)):
+                    log.replay(BattleSimulator(PlayerConfig(level=1), "dragonlord_second"), fight)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+from ..analysis.pmf import action_choice_odds, pattern_key
+from ..common.messages import EnemyActions
+from ..models.combat_engine import CombatEngine
+from ..models.enemy import create_enemy
+from ..models.enemy_data import enemy_dict
+from ..models.enemy_roster import compile_roster, default_roster
+
+
+class TestEnemyRoster(unittest.TestCase):
+    def setUp(self):
+        self.roster = default_roster()
+        self.combat_engine = CombatEngine(None)
+
+    def test_rows_match_create_enemy(self):
+        assert len(self.roster) == len(enemy_dict)
+        for enemy_id, key in enumerate(self.roster.keys):
+            enemy = create_enemy(key, self.combat_engine)
+            assert self.roster.names[enemy_id] == enemy.name
+            assert (self.roster.hp_min[enemy_id], self.roster.hp_max[enemy_id]) == tuple(enemy.base_hp)
+            for column in ("strength", "agility", "dodge", "sleep_resist", "stopspell_resist", "hurt_resist", "run",
+                           "void_critical_hit"):
+                assert getattr(self.roster, column)[enemy_id] == getattr(enemy, column), (key, column)
+            actions, weights = self.roster.pattern(enemy_id)
+            assert [(EnemyActions(a), w) for a, w in zip(actions.tolist(), weights.tolist())] == \
+                [(item['id'], item['weight']) for item in enemy.pattern]
+
+    def test_subset_repacks_patterns(self):
+        ids = self.roster.ids(['dragonlord_second', 'slime', 'warlock'])
+        subset = self.roster.subset(ids)
+
+        assert subset.keys == ('dragonlord_second', 'slime', 'warlock')
+        assert subset.strength.tolist() == self.roster.strength[ids].tolist()
+        for row, enemy_id in enumerate(ids):
+            assert subset.pattern(row)[0].tolist() == self.roster.pattern(enemy_id)[0].tolist()
+
+        with self.assertRaises(ValueError):
+            self.roster.index('not_an_enemy')
+
+    def test_compile_custom_dict_uses_enemy_defaults(self):
+        roster = compile_roster({'blob': {'name': "Blob", 'strength': 1, 'agility': 2, 'base_hp': [3, 4],
+                                          'dodge': 0}})
+
+        assert roster.stopspell_resist[0] == 15
+        assert roster.pattern(0)[0].tolist() == [EnemyActions.ATTACK.value]
+
+    def test_choose_actions_matches_exact_odds(self):
+        rng = np.random.default_rng(5)
+        enemy_id = self.roster.index('wizard')
+        draws = 40_000
+        chosen = self.roster.choose_actions(np.full(draws, enemy_id), False, False, False, rng)
+
+        odds = action_choice_odds(pattern_key(create_enemy('wizard', self.combat_engine).pattern), False, False, False)
+        for action, probability in odds.items():
+            assert abs((chosen == action.value).mean() - float(probability)) < 0.01
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from collections import Counter
+from ..common.events import (BattleEvent, EnemyActed, EventBus, FightEnded, FightStarted, PlayerAttacked,
+                             SpellCast, TurnEnded)
+from ..common.messages import AttackResult, EnemyActions, FightOutcome, SpellFailureReason, SpellResult
+from ..models.spells import SpellType
+from ..presenters.battle_presenter import BattlePresenter
+from ..sim.policies import CautiousPolicy
+from ..sim.simulator import BattleSimulator, PlayerConfig
+
+
+class FakeView:
+    def __init__(self):
+        self.messages = []
+
+    def update_output(self, event, message):
+        self.messages.append(message)
+
+
+class TestEventBus(unittest.TestCase):
+    def test_dispatch_by_type_then_catch_all(self):
+        bus = EventBus()
+        seen = []
+        bus.subscribe(lambda event: seen.append(("started", event)), FightStarted)
+        bus.subscribe(lambda event: seen.append(("any", event)))
+
+        bus.publish(FightStarted("Slime"))
+        bus.publish(TurnEnded("player", 10, 3))
+
+        assert [tag for tag, _ in seen] == ["started", "any", "any"]
+        assert bus.wants(PlayerAttacked)
+
+    def test_unsubscribe_stops_listening(self):
+        bus = EventBus()
+        handler = bus.subscribe(lambda event: None, FightStarted, FightEnded)
+        assert bus.listening
+
+        bus.unsubscribe(handler, FightStarted)
+        assert bus.listening and not bus.wants(FightStarted)
+        bus.unsubscribe(handler)
+        assert not bus.listening
+
+
+class TestSimulatorEvents(unittest.TestCase):
+    def test_events_follow_the_tally(self):
+        bus = EventBus()
+        counts = Counter()
+        outcomes = Counter()
+        bus.subscribe(lambda event: counts.update([type(event).__name__]))
+        bus.subscribe(lambda event: outcomes.update([event.outcome]), FightEnded)
+        simulator = BattleSimulator(PlayerConfig(level=8, weapon="Copper Sword", herbs=2), 'skeleton',
+                                    CautiousPolicy(), seed=5, events=bus)
+
+        tally = simulator.run(200)
+
+        assert counts["FightStarted"] == counts["FightEnded"] == 200
+        assert outcomes[FightOutcome.PLAYER_WINS] == tally.wins
+        assert outcomes[FightOutcome.PLAYER_LOSES] == tally.losses
+        assert counts["PlayerAttacked"] > 0 and counts["EnemyActed"] > 0
+
+    def test_events_do_not_change_fights(self):
+        config = PlayerConfig(level=8, weapon="Copper Sword", herbs=2)
+        bus = EventBus()
+        bus.subscribe(lambda event: None, BattleEvent)
+
+        quiet = BattleSimulator(config, 'skeleton', CautiousPolicy(), seed=5).run(200)
+        watched = BattleSimulator(config, 'skeleton', CautiousPolicy(), seed=5, events=bus).run(200)
+
+        assert quiet == watched
+
+
+class TestPresenterSubscriber(unittest.TestCase):
+    def setUp(self):
+        self.view = FakeView()
+        self.bus = EventBus()
+        BattlePresenter(self.view).subscribe(self.bus)
+
+    def test_formats_events(self):
+        self.bus.publish(PlayerAttacked(AttackResult(damage=4), "Slime"))
+        self.bus.publish(SpellCast(SpellResult(SpellType.HURT, False, 0, SpellFailureReason.ENEMY_RESISTED_HURT),
+                                   "Slime"))
+        self.bus.publish(EnemyActed(EnemyActions.HEAL, SpellResult(EnemyActions.HEAL, True, 20), "Slime", "Rollo"))
+        self.bus.publish(FightEnded(FightOutcome.PLAYER_WINS, "Slime"))
+
+        assert "You hit Slime for 4 points of damage!" in self.view.messages[0]
+        assert self.view.messages[1] == "Player casts Hurt, but the enemy resisted!\n"
+        assert self.view.messages[2] == "The Slime casts Heal! Slime is healed 20 hit points!"
+        assert self.view.messages[3] == "You have defeated the Slime!\n"
+
+
+if __name__ == '__main__':
+    unittest.main()
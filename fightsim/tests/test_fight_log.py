@@ -0,0 +1,69 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from ..common.messages import FightOutcome
+from ..models.game_constants import GameConstants
+from ..sim.fight_log import FightLog, FightLogWriter
+from ..sim.simulator import BattleSimulator, PlayerConfig
+
+
+class TestFightLog(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_log(self):
+        tallies = {}
+        with FightLogWriter(self.directory.name, chunk_rows=100, metadata={"note": "test"}) as writer:
+            for enemy_key in ("slime", "drakee"):
+                for level in (1, 3):
+                    simulator = BattleSimulator(PlayerConfig(level=level), enemy_key, seed=level)
+                    tallies[enemy_key, level] = writer.write_simulation(simulator, 250)
+        return tallies
+
+    def test_round_trip(self):
+        tallies = self.write_log()
+        log = FightLog(self.directory.name)
+
+        assert len(log) == 1000
+        assert isinstance(log["rounds"], np.memmap)
+        assert log.header["metadata"] == {"note": "test"}
+        assert log.constants["crit_chance"] == GameConstants().crit_chance
+        assert log.constants["heal_ranges"] == {"HEAL": [10, 17], "HEALMORE": [58, 85]}
+        for (enemy_key, level), tally in tallies.items():
+            selected = log.select(enemy=enemy_key, level=level)
+            counts = log.outcome_counts(enemy=enemy_key, level=level)
+            assert counts[FightOutcome.PLAYER_WINS] == tally.wins
+            assert counts[FightOutcome.PLAYER_LOSES] == tally.losses
+            assert int(selected["rounds"].sum()) == tally.rounds
+            assert int(selected["damage_taken"].sum()) == tally.damage_taken
+
+    def test_contiguous_selection_is_a_view(self):
+        self.write_log()
+        log = FightLog(self.directory.name)
+
+        one_enemy = log.select(enemy="slime")["rounds"]
+        assert len(one_enemy) == 500
+        assert np.shares_memory(one_enemy, log["rounds"])
+
+        one_level = log.select(level=3)["rounds"]
+        assert len(one_level) == 500
+        assert len(log.select(enemy="golem")["rounds"]) == 0
+
+    def test_files_are_plain_npy(self):
+        self.write_log()
+
+        outcomes = np.load(f"{self.directory.name}/outcome.npy")
+        assert outcomes.shape == (1000,)
+        assert outcomes.dtype == np.uint8
+
+    def test_record_needs_a_segment(self):
+        with FightLogWriter(self.directory.name) as writer:
+            with self.assertRaises(ValueError):
+                writer.record(None)
+
+
+if __name__ == '__main__':
+    unittest.main()
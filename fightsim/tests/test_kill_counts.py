@@ -0,0 +1,74 @@
+import unittest
+
+import numpy as np
+
+from ..analysis.kill_counts import (action_counts, attack_win_chance, hits_to_kill, matchup_counts, race_win_chance,
+                                    turns_to_kill)
+from ..analysis.markov import solve_fight
+from ..analysis.pmf import Pmf
+from ..common.randomizer import Randomizer
+from ..models.combat_engine import CombatEngine
+from ..models.enemy import create_enemy
+from ..sim.simulator import PlayerConfig
+
+
+def brute_force_counts(damage, hp, actions):
+    """ cdf of actions to deal hp damage, by convolving exact Pmfs one action at a time """
+    cdf, total = [0.0], Pmf.point(0)
+    for _ in range(actions):
+        total = total.convolve(damage).map(lambda value: min(value, hp))
+        cdf.append(float(total[hp]))
+    return cdf
+
+
+class TestKillCounts(unittest.TestCase):
+    def test_matches_pmf_convolution(self):
+        damage = Pmf.mixture([(0.25, Pmf.uniform(3, 9)), (0.5, Pmf.uniform(1, 4)), (0.25, Pmf.point(0))])
+        components = [(0.25, 3, 9), (0.5, 1, 4), (0.25, 0, 0)]
+        for hp in (1, 7, 20):
+            counts = action_counts(components, hp, hp, max_actions=12)
+            np.testing.assert_allclose(counts.cdf, brute_force_counts(damage, hp, 12), atol=1e-12)
+
+    def test_hp_range_is_averaged(self):
+        components = [(1.0, 2, 5)]
+        combined = action_counts(components, 6, 10)
+        singles = [action_counts(components, hp, hp).cdf for hp in range(6, 11)]
+        singles = [np.pad(cdf, (0, len(combined.cdf) - len(cdf)), mode="edge") for cdf in singles]
+        np.testing.assert_allclose(combined.cdf, np.mean(singles, axis=0), atol=1e-12)
+        assert (combined.fewest, combined.most) == (2, 5)
+        assert combined.quantile(0.01) == 2 and combined.quantile(1) == 5
+        self.assertAlmostEqual(float(combined.pmf.sum()), 1.0)
+
+    def test_bounds(self):
+        engine = CombatEngine(Randomizer(0))
+        player = PlayerConfig(level=20, weapon="Flame Sword").build(engine)
+        dragonlord = create_enemy("dragonlord_second", engine)
+        hits = hits_to_kill(player, dragonlord)
+        assert hits.cdf[hits.fewest - 1] == 0 < hits.cdf[hits.fewest]
+        assert hits.most is not None and hits.within(hits.most) > 1 - 1e-9
+        assert "median" in hits.describe()
+        never = action_counts([(1.0, 0, 0)], 5, 5)
+        assert never.fewest is None and never.unresolved == 1.0 and never.describe() == "never"
+
+    def test_race_matches_the_markov_chain(self):
+        for config, enemy_key in ((PlayerConfig(level=1), "slime"), (PlayerConfig(level=3), "magician"),
+                                  (PlayerConfig(level=8, weapon="Copper Sword"), "skeleton"),
+                                  (PlayerConfig(level=6, armor="Magic Armor"), "magidrakee")):
+            self.assertAlmostEqual(attack_win_chance(config, enemy_key), solve_fight(config, enemy_key).win,
+                                   places=10)
+
+    def test_race_needs_a_damage_only_fight(self):
+        assert attack_win_chance(PlayerConfig(level=5), "warlock") is None  # Casts Sleep
+        assert attack_win_chance(PlayerConfig(level=30, weapon="Edrick's Sword"), "slime") is None  # Slime flees
+
+    def test_going_first_helps(self):
+        hits, turns = matchup_counts(PlayerConfig(level=3), "magician")
+        assert race_win_chance(hits, turns) > race_win_chance(hits, turns, enemy_first=True)
+        engine = CombatEngine(Randomizer(0))
+        turns = turns_to_kill(create_enemy("magician", engine), PlayerConfig(level=3).build(engine))
+        assert turns.most == 12  # 24 HP at no less than 2 damage a turn
+        assert turns.within(turns.most) > 1 - 1e-9
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from ..analysis.loadouts import (EDRICKS_GEAR, Loadout, LoadoutConstraints, best_loadouts, candidate_loadouts,
+                                 collapse, prune_dominated)
+from ..analysis.markov import solve_fight
+
+
+class TestLoadouts(unittest.TestCase):
+    constraints = LoadoutConstraints(exclude=EDRICKS_GEAR, budget=1000)
+
+    def test_constraints(self):
+        assert len(candidate_loadouts()) == 8 * 8 * 4
+        assert len(candidate_loadouts(LoadoutConstraints(exclude=EDRICKS_GEAR))) == 7 * 7 * 4
+        cheap = candidate_loadouts(self.constraints)
+        assert cheap and all(loadout.price <= 1000 for loadout in cheap)
+        assert Loadout("Edrick's Sword", "Naked", "No Shield").price is None
+        only_clubs = LoadoutConstraints(allowed=lambda loadout: loadout.weapon == "Club")
+        assert {loadout.weapon for loadout in candidate_loadouts(only_clubs)} == {"Club"}
+
+    def test_equivalent_loadouts_fight_the_same(self):
+        classes = collapse(candidate_loadouts(self.constraints), 1, ["ghost"])
+        assert len(classes) < len(candidate_loadouts(self.constraints))
+        merged = next(loadout_class for loadout_class in classes if len(loadout_class.loadouts) > 1)
+        prices = [loadout.price for loadout in merged.loadouts]
+        assert prices == sorted(prices)
+        wins = {solve_fight(loadout.config(level=1), "ghost").win for loadout in merged.loadouts}
+        assert len(wins) == 1
+
+    def test_pruning_keeps_the_best(self):
+        search = best_loadouts(1, "ghost", constraints=self.constraints)
+        assert search.solved <= search.classes < search.permitted
+        brute_force = max(solve_fight(loadout.config(level=1), "ghost").win
+                          for loadout in candidate_loadouts(self.constraints))
+        self.assertAlmostEqual(search.best.score, brute_force, places=12)
+        classes = collapse(candidate_loadouts(self.constraints), 1, ["ghost"])
+        survivors = prune_dominated(classes)
+        for loadout_class in classes:
+            if loadout_class not in survivors:
+                assert any(all(mine.dominates(theirs) for mine, theirs in zip(other.effects, loadout_class.effects))
+                           for other in survivors)
+
+    def test_ties_go_to_the_cheaper_loadout(self):
+        search = best_loadouts(30, "slime")
+        assert len(prune_dominated(collapse(candidate_loadouts(), 30, ["slime"]))) == 1
+        assert search.best.loadout == Loadout("Unarmed", "Naked", "No Shield")
+        dearest = Loadout("Edrick's Sword", "Naked", "No Shield").config(level=30)
+        self.assertAlmostEqual(search.best.score, solve_fight(dearest, "slime").win, places=12)
+        assert len(search.ranking) > 1
+
+    def test_armor_flags_only_count_against_casters(self):
+        plain = Loadout("Club", "Clothes", "No Shield")
+        magic = Loadout("Club", "Magic Armor", "No Shield")
+        assert len(collapse([plain, magic], 5, ["ghost"])) == 1
+        assert len(collapse([plain, magic], 5, ["magician"])) == 2
+        assert prune_dominated(collapse([plain, magic], 5, ["magician"]))[0].representative == magic
+
+    def test_weighted_enemies(self):
+        search = best_loadouts(2, {"ghost": 1, "magician": 3}, constraints=self.constraints)
+        best = search.best
+        assert set(best.wins) == {"ghost", "magician"}
+        self.assertAlmostEqual(best.score, (best.wins["ghost"] + 3 * best.wins["magician"]) / 4)
+        assert [ranked.score for ranked in search.ranking] == sorted((ranked.score for ranked in search.ranking),
+                                                                     reverse=True)
+
+    def test_simulated_scores(self):
+        search = best_loadouts(1, "ghost", constraints=self.constraints, method="simulate", fights=500)
+        assert 0 < search.best.score <= 1
+        with self.assertRaises(ValueError):
+            best_loadouts(1, "ghost", method="guess")
+        assert best_loadouts(1, "ghost", constraints=LoadoutConstraints(budget=-1)).best is None
+
+
+if __name__ == '__main__':
+    unittest.main()
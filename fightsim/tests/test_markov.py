@@ -0,0 +1,64 @@
+import unittest
+from ..analysis.markov import FightChain, StateCodec, solve_fight, PLAYER_NODE, ENEMY_NODE
+from ..common.messages import FightOutcome
+from ..sim.policies import CautiousPolicy, FleePolicy
+from ..sim.simulator import BattleSimulator, PlayerConfig
+
+
+class TestStateCodec(unittest.TestCase):
+    def test_round_trip(self):
+        codec = StateCodec(max_hp=30, max_mp=12, herbs=3, enemy_max_hp=47, enemy_sleep_rounds=2)
+        state = (ENEMY_NODE, 17, 8, 2, 4, True, 33, 1, False, 45)
+
+        assert codec.decode(codec.encode(*state)) == state
+
+    def test_keys_sort_in_fight_order(self):
+        codec = StateCodec(max_hp=30, max_mp=12, herbs=3, enemy_max_hp=47, enemy_sleep_rounds=2)
+        start = codec.encode(PLAYER_NODE, 30, 12, 3, 0, False, 47, 0, False, 47)
+        hurt = codec.encode(PLAYER_NODE, 20, 12, 3, 0, False, 47, 0, False, 47)
+        spent = codec.encode(PLAYER_NODE, 30, 10, 3, 0, False, 47, 0, False, 47)
+
+        assert start < hurt < spent
+
+
+class TestFightChain(unittest.TestCase):
+    def test_outcomes_sum_to_one(self):
+        solution = solve_fight(PlayerConfig(level=5, weapon="Club", herbs=2), 'ghost', CautiousPolicy())
+
+        assert abs(solution.win + solution.loss + solution.player_fled + solution.enemy_fled - 1) < 1e-9
+        assert solution.probability(FightOutcome.PLAYER_WINS) == solution.win
+        assert solution.probability(FightOutcome.TIMED_OUT) == 0.0
+
+    def test_hopeless_fight(self):
+        solution = solve_fight(PlayerConfig(level=1), 'dragonlord_second')
+
+        assert solution.loss > 0.999999
+
+    def test_flee_policy_never_wins(self):
+        solution = solve_fight(PlayerConfig(level=3), 'drakee', FleePolicy())
+
+        assert solution.win == 0
+        assert solution.player_fled > 0.9
+
+    def test_strong_player_scares_enemy(self):
+        solution = solve_fight(PlayerConfig(level=30, weapon="Edrick's Sword"), 'slime')
+
+        assert solution.loss == 0
+        assert solution.enemy_fled > 0
+
+    def test_state_limit(self):
+        with self.assertRaises(ValueError):
+            solve_fight(PlayerConfig(level=6, weapon="Copper Sword", herbs=1), 'skeleton', CautiousPolicy(),
+                        max_states=100)
+
+    def test_matches_simulation(self):
+        config = PlayerConfig(level=6, weapon="Copper Sword", herbs=1)
+        solution = FightChain(config, 'skeleton', CautiousPolicy()).solve()
+        tally = BattleSimulator(config, 'skeleton', CautiousPolicy(), seed=11).run(20_000)
+
+        assert abs(solution.win - tally.win_rate) < 0.015
+        assert abs(solution.expected_rounds - tally.mean_rounds) < 0.1 * solution.expected_rounds
+
+
+if __name__ == '__main__':
+    unittest.main()
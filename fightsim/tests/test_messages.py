@@ -1,5 +1,8 @@
 import unittest
-from ..common.messages import EnemyActions
+from dataclasses import FrozenInstanceError
+from ..common.messages import (EnemyActions, SpellFailureReason, SpellResult, AttackResult, PLAYER_AWAKE,
+                               pack_result, unpack_attack, unpack_spell, RESULT_CRIT, RESULT_SUCCESS)
+from ..models.spells import SpellType
 
 
 class TestEnemyActionsEnum(unittest.TestCase):
@@ -25,6 +28,29 @@ class TestEnemyActionsEnum(unittest.TestCase):
                 self.assertNotEqual(description, "No description available.",
                                     f"{member.name} should have a custom description.")
 
+
+class TestResults(unittest.TestCase):
+    def test_results_are_frozen_and_slotted(self):
+        result = AttackResult(damage=5)
+
+        assert not hasattr(result, "__dict__")
+        with self.assertRaises(FrozenInstanceError):
+            result.damage = 6
+        with self.assertRaises(FrozenInstanceError):
+            PLAYER_AWAKE.still_asleep = True
+
+    def test_spell_names(self):
+        assert SpellResult(SpellType.STOPSPELL, False).spell_name == "Stopspell"
+        assert SpellResult(EnemyActions.HURTMORE, True, 30).spell_name == "Hurtmore"
+
+    def test_pack_round_trip(self):
+        packed = pack_result(12, RESULT_SUCCESS | RESULT_CRIT)
+        assert unpack_attack(packed) == AttackResult(damage=12, crit=True, dodge=False, hit=True)
+
+        packed = pack_result(reason=SpellFailureReason.ENEMY_SPELLSTOPPED)
+        assert unpack_spell(SpellType.HEAL, packed) == SpellResult(SpellType.HEAL, False, 0,
+                                                                   SpellFailureReason.ENEMY_SPELLSTOPPED)
+
 # Add more tests as needed for specific logic or value checks if values are manually assigned.
 
 if __name__ == '__main__':
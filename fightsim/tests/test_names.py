@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+from ..analysis.names import (prefix_sums, prefix_name, rank_names, score_prefixes, stat_objective,
+                              win_rate_objective, LETTERS)
+from ..models.player_leveling import _Levelling, name_sum
+
+
+class TestNameSearch(unittest.TestCase):
+    def test_prefix_sums_match_name_sums(self):
+        sums = prefix_sums()
+
+        assert len(sums) == len(LETTERS) ** 4
+        for index in np.random.default_rng(3).integers(0, len(sums), size=200):
+            assert sums[index] == name_sum(prefix_name(index))
+
+    def test_rank_by_stat(self):
+        leveler = _Levelling()
+        best = max(leveler.adjust_stats(10, prefix_name(index))[0] for index in range(0, len(LETTERS) ** 4, 9973))
+        ranked = rank_names(stat_objective("strength", 10), top=5)
+
+        assert len(ranked) == 5
+        assert ranked[0].score >= best
+        assert all(leveler.adjust_stats(10, entry.name)[0] == ranked[0].score for entry in ranked)
+
+    def test_score_every_prefix(self):
+        scores = score_prefixes(stat_objective("max_mp", 3))
+        leveler = _Levelling()
+
+        assert not np.isnan(scores).any()
+        assert scores[1234] == leveler.adjust_stats(3, prefix_name(1234))[3]
+
+    def test_rank_by_win_rate(self):
+        ranked = rank_names(win_rate_objective('slime', 1), top=3)
+
+        assert 0 < ranked[0].score <= 1
+        assert ranked[0].score >= ranked[-1].score
+
+        with self.assertRaises(ValueError):
+            win_rate_objective('slime', 1, method="guess")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from ..views.output_buffer import OutputBuffer
+
+
+class TestOutputBuffer(unittest.TestCase):
+    def test_only_first_message_schedules_a_flush(self):
+        buffer = OutputBuffer()
+        assert buffer.add("one")
+        assert not buffer.add("two")
+        assert buffer.take() == "one\ntwo\n"
+        assert buffer.take() == ""
+        assert buffer.add("three")
+
+    def test_overflow_counts_lines_past_the_cap(self):
+        buffer = OutputBuffer(max_lines=3)
+        buffer.add("one")
+        buffer.add("two\nthree")
+        buffer.take()
+        assert buffer.overflow() == 0
+        buffer.add("four")
+        buffer.take()
+        assert buffer.overflow() == 1
+        buffer.trimmed(1, "one\n")
+        assert buffer.lines == 3
+        assert buffer.overflow() == 0
+
+    def test_trimmed_lines_spill_to_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "battle.log")
+            buffer = OutputBuffer(max_lines=1, spill_path=path)
+            buffer.trimmed(1, "one\n")
+            buffer.trimmed(2, "two\nthree\n")
+            with open(path, encoding="utf-8") as spill:
+                assert spill.read() == "one\ntwo\nthree\n"
+
+    def test_clear_drops_pending_messages(self):
+        buffer = OutputBuffer()
+        buffer.add("one")
+        buffer.take()
+        buffer.add("two")
+        buffer.clear()
+        assert buffer.take() == ""
+        assert buffer.lines == 0
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -30,7 +30,7 @@ class TestPlayer(unittest.TestCase):
     def setUp(self):        
         self.player = player_factory(CombatEngine(FakeRandomizer()))
         self.player.equip_weapon("Copper Sword") # Equip copper sword
-        self.enemy = create_enemy('slime', combat_engine=CombatEngine)
+        self.enemy = create_enemy('slime', combat_engine=self.player.combat_engine)
 
     def test_player_attack_normal_hit(self):
         self.player.combat_engine.randomizer.sequence = [2, 10, 20]
@@ -0,0 +1,37 @@
+import unittest
+from ..models.player_leveling import _Levelling, STAT_TABLE, LEVEL_STATS, name_sum
+
+
+class TestLevelling(unittest.TestCase):
+    def setUp(self):
+        self.leveler = _Levelling()
+
+    def test_letter_values(self):
+        assert self.leveler.calculate_letter_stat("g") == 0
+        assert self.leveler.calculate_letter_stat("W") == 10
+        assert self.leveler.calculate_letter_stat("L") == 15
+        assert self.leveler.calculate_letter_stat("!") == 0
+        # Only the first four letters count
+        assert name_sum("Rollo") == name_sum("Roll") == 5 + 8 + 5 + 5
+
+    def test_table_matches_progression_formula(self):
+        for name in ("Rollo", "Erdrick", "", "fvLf"):
+            total = name_sum(name)
+            for level, (strength, agility, max_hp, max_mp) in enumerate(LEVEL_STATS, start=1):
+                expected = (self.leveler.calculate_slow_progression(total, strength),
+                            self.leveler.calculate_slow_progression(total, agility), max_hp, max_mp)
+                assert self.leveler.adjust_stats(level, name) == expected
+        assert len(STAT_TABLE) == 4 and len(STAT_TABLE[0][0]) == 30
+
+    def test_stat_grid(self):
+        names = ["Rollo", "Erdrick", "fvLf"]
+        grid = self.leveler.stat_grid(range(1, 31), names)
+
+        assert grid.shape == (30, 3, 4)
+        for level in (1, 12, 30):
+            for column, name in enumerate(names):
+                assert tuple(grid[level - 1, column]) == self.leveler.adjust_stats(level, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
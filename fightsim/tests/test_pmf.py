@@ -0,0 +1,116 @@
+import unittest
+from fractions import Fraction
+from ..analysis.pmf import (Pmf, player_attack_pmf, player_attack_breakdown, heal_pmf, herb_pmf, player_hurt_pmf,
+                            enemy_action_damage_pmf, enemy_action_choice_pmf, player_flee_chance, surprise_chance,
+                            resist_chance)
+from ..common.messages import EnemyActions
+from ..common.randomizer import Randomizer
+from ..models.combat_engine import CombatEngine
+from ..models.enemy import create_enemy
+from ..models.player import player_factory
+from ..models.spells import SpellType
+
+
+class TestPmf(unittest.TestCase):
+    def test_uniform_statistics(self):
+        pmf = Pmf.uniform(1, 6)
+
+        assert pmf.total() == 1
+        assert pmf.mean() == Fraction(7, 2)
+        assert pmf.variance() == Fraction(35, 12)
+        assert pmf.prob_at_least(5) == Fraction(1, 3)
+
+    def test_convolve(self):
+        two_dice = Pmf.uniform(1, 6).convolve(Pmf.uniform(1, 6))
+
+        assert two_dice[7] == Fraction(1, 6)
+        assert two_dice[2] == Fraction(1, 36)
+        assert two_dice.total() == 1
+
+    def test_empty_range_raises(self):
+        with self.assertRaises(ValueError):
+            Pmf.uniform(10, 4)
+
+
+class TestCombatPmfs(unittest.TestCase):
+    def setUp(self):
+        self.combat_engine = CombatEngine(None)
+        self.player = player_factory(self.combat_engine)
+        self.player.equip_weapon("Copper Sword")
+        self.enemy = create_enemy('skeleton', self.combat_engine)
+
+    def test_player_attack_mixes_crit_dodge_and_normal_ranges(self):
+        pmf = player_attack_pmf(self.player, self.enemy)
+        crit, miss, normal, critical = player_attack_breakdown(self.player, self.enemy)
+
+        assert pmf.total() == 1
+        assert crit == Fraction(1, 32)
+        assert miss == Fraction(31, 32) * Fraction(4, 64)
+        # Attack 14 against agility 22 hits the clamped normal range (0, 1)
+        assert normal == Pmf.uniform(0, 1)
+        assert critical == Pmf.uniform(7, 14)
+        assert pmf[0] == miss + (1 - crit - miss) / 2
+        assert pmf.prob_at_least(7) == crit
+
+    def test_blocked_crits(self):
+        dragonlord = create_enemy('dragonlord_first', self.combat_engine)
+        crit, _, _, _ = player_attack_breakdown(self.player, dragonlord)
+
+        assert crit == 0
+
+    def test_heal_and_herb_are_capped(self):
+        assert heal_pmf(SpellType.HEAL, 5) == Pmf.point(5)
+        assert heal_pmf(SpellType.HEAL, 100) == Pmf.uniform(10, 17)
+        assert herb_pmf(20, 20) == Pmf.point(0)
+        assert herb_pmf(10, 35)[25] == Fraction(6, 8)
+
+    def test_hurt_resist(self):
+        assert player_hurt_pmf(SpellType.HURT, 16) == Pmf.point(0)
+        assert player_hurt_pmf(SpellType.HURT, 4)[0] == Fraction(1, 4)
+        assert resist_chance(15) == Fraction(15, 16)
+
+    def test_enemy_action_damage(self):
+        wizard = create_enemy('wizard', self.combat_engine)
+
+        assert enemy_action_damage_pmf(wizard, EnemyActions.HURTMORE, self.player) == Pmf.uniform(30, 45)
+        self.player.equip_armor("Magic Armor")
+        assert enemy_action_damage_pmf(wizard, EnemyActions.HURTMORE, self.player) == Pmf.uniform(20, 30)
+        wizard.enemy_spell_stopped = True
+        assert enemy_action_damage_pmf(wizard, EnemyActions.HURTMORE, self.player) == Pmf.point(0)
+
+    def test_enemy_action_choice_falls_through(self):
+        drakeema = create_enemy('drakeema', self.combat_engine)
+
+        # Above 25% HP the heal entry never fires, so hurt is 50% of all turns
+        choices = enemy_action_choice_pmf(drakeema, self.player)
+        assert choices == {EnemyActions.HURT: Fraction(1, 2), EnemyActions.ATTACK: Fraction(1, 2)}
+
+        drakeema.current_hp = 1
+        choices = enemy_action_choice_pmf(drakeema, self.player)
+        assert choices[EnemyActions.HEAL] == Fraction(1, 4)
+        assert choices[EnemyActions.HURT] == Fraction(3, 8)
+
+    def test_enemy_action_choice_matches_enemy(self):
+        warlock = create_enemy('warlock', CombatEngine(Randomizer(7)))
+        expected = enemy_action_choice_pmf(warlock, self.player)
+        draws = 20000
+        counts = {}
+        for _ in range(draws):
+            action = warlock.choose_enemy_action(self.player)
+            counts[action] = counts.get(action, 0) + 1
+
+        for action, p in expected.items():
+            assert abs(counts[action] / draws - float(p)) < 0.02
+
+    def test_agility_contests_match_brute_force(self):
+        player_agility, enemy_agility = 10, 22
+        wins = sum(1 for a in range(255) for b in range(255) if player_agility * a > enemy_agility * b * 0.375)
+        assert player_flee_chance(player_agility, enemy_agility, 1) == Fraction(wins, 255 * 255)
+
+        surprised = sum(1 for a in range(1, 256) for b in range(1, 256)
+                        if player_agility * a < enemy_agility * b * 0.25)
+        assert surprise_chance(player_agility, enemy_agility) == Fraction(surprised, 255 * 255)
+
+
+if __name__ == '__main__':
+    unittest.main()
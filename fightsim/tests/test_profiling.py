@@ -0,0 +1,64 @@
+import unittest
+from ..common.randomizer import Randomizer
+from ..models.combat_engine import CombatEngine
+from ..models.enemy import create_enemy
+from ..sim.policies import CautiousPolicy
+from ..sim.profiling import PHASES, FightProfile, ProfiledSimulator, instrument
+from ..sim.simulator import BattleSimulator, PlayerConfig
+
+
+class TestProfiling(unittest.TestCase):
+    config = PlayerConfig(level=15, weapon="Broad Sword", armor="Chain Mail", herbs=3)
+
+    def test_profiling_does_not_change_the_tally(self):
+        plain = BattleSimulator(self.config, "wizard", policy=CautiousPolicy(), seed=4)
+        profiled = ProfiledSimulator(self.config, "wizard", policy=CautiousPolicy(), seed=4)
+        assert profiled.run(2000) == plain.run(2000)
+        assert profiled.run_parallel(2048, workers=1) == plain.run_parallel(2048, workers=1)
+
+    def test_profile_counts(self):
+        simulator = ProfiledSimulator(self.config, "wizard", seed=4)
+        tally = simulator.run(500)
+        profile = simulator.profile
+        assert profile.fights == 500
+        assert profile.draws > 2 * tally.rounds  # At least a surprise roll and one draw per action
+        assert profile.results == 0  # The packed engine allocates no result objects
+        enemy_actions = sum(count for action, count in profile.actions.items() if action.startswith("enemy "))
+        assert 0 < enemy_actions <= tally.rounds
+        assert profile.actions["player ATTACK"] > 0
+        assert all(profile.seconds[phase] > 0 for phase in PHASES)
+
+    def test_parallel_profile_covers_every_fight(self):
+        simulator = ProfiledSimulator(self.config, "golem", seed=1)
+        simulator.run_parallel(3000, workers=1, chunk_size=1024)
+        assert simulator.profile.fights == 3000
+
+    def test_object_engine_results_are_counted(self):
+        engine = CombatEngine(Randomizer(seed=0))
+        player = self.config.build(engine)
+        enemy = create_enemy("golem", engine)
+        profile = instrument(FightProfile(), engine, player, enemy)
+        player.attack(enemy)
+        engine.resolve_herb_healing(player.max_hp, player.max_hp)  # Shared HERB_AT_MAX_HP, not allocated
+        assert profile.results == 1
+        assert profile.actions == {"player ATTACK": 1, "player HERB": 1}
+
+    def test_merge(self):
+        first, second = FightProfile(fights=2, draws=10), FightProfile(fights=3, draws=5, results=1)
+        first.actions["enemy ATTACK"] = 2
+        second.actions["enemy ATTACK"] = 1
+        second.seconds["status"] = 0.5
+        first.merge(second)
+        assert (first.fights, first.draws, first.results) == (5, 15, 1)
+        assert first.actions["enemy ATTACK"] == 3
+        assert first.seconds["status"] == 0.5
+        assert first.per_fight(first.draws) == 3
+
+    def test_unprofiled_simulator_has_no_hooks(self):
+        simulator = BattleSimulator(self.config, "golem")
+        assert "resolve_player_attack" not in vars(simulator.combat_engine)
+        assert "choose_enemy_action" not in vars(simulator.enemy)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,23 +5,44 @@ from ..common.randomizer import Randomizer
 class TestRandomizer(unittest.TestCase):
     """ Unit tests for the Randomizer class. """
 
+    def setUp(self):
+        self.randomizer = Randomizer()
+
     def test_randint(self):
         low, high = 1, 10
-        results = {Randomizer.randint(low, high) for _ in range(1000)}
+        results = {self.randomizer.randint(low, high) for _ in range(1000)}
         self.assertTrue(all(low <= num <= high for num in results))
         self.assertTrue(len(results) > 1)  # Check that we have a range of outputs
 
     def test_chance(self):
-        # Test by patching random.random to control its output
-        with patch('random.random', return_value=0.5):
-            self.assertTrue(Randomizer.chance(0.6))
-            self.assertFalse(Randomizer.chance(0.4))
+        # Test by patching the stream's random() to control its output
+        with patch.object(self.randomizer._random, 'random', return_value=0.5):
+            self.assertTrue(self.randomizer.chance(0.6))
+            self.assertFalse(self.randomizer.chance(0.4))
 
     def test_choice(self):
         seq = [1, 2, 3, 4, 5]
-        chosen = Randomizer.choice(seq)
+        chosen = self.randomizer.choice(seq)
         self.assertIn(chosen, seq)
 
         # Test that it raises an exception with an empty list
         with self.assertRaises(IndexError):
-            Randomizer.choice([])
\ No newline at end of file
+            self.randomizer.choice([])
+
+    def test_seeded_streams_repeat(self):
+        first, second = Randomizer(42), Randomizer(42)
+        first_draws = [first.randint(1, 1000) for _ in range(5)]
+        self.assertEqual(first_draws, [second.randint(1, 1000) for _ in range(5)])
+        self.assertGreater(len(set(first_draws)), 1)
+
+        other = Randomizer(43)
+        self.assertNotEqual([first.randint(1, 1000) for _ in range(20)], [other.randint(1, 1000) for _ in range(20)])
+
+    def test_spawned_children_are_distinct(self):
+        parent = Randomizer(7)
+        children = parent.spawn(2) + parent.spawn(1)
+        self.assertEqual([child.spawn_key for child in children], [(0,), (1,), (2,)])
+
+        sequences = [[child.randint(0, 2 ** 30) for _ in range(5)] for child in children]
+        self.assertEqual(len({tuple(sequence) for sequence in sequences}), 3)
+        self.assertEqual(Randomizer(7).stream(1).randint(0, 2 ** 30), sequences[1][0])
@@ -0,0 +1,106 @@
+import unittest
+from ..common.messages import FightOutcome, PlayerActions
+from ..sim.simulator import BattleSimulator, BattleTally, FightResult, PlayerConfig
+from ..sim.policies import AttackPolicy, CautiousPolicy, FleePolicy
+from ..models.spells import SpellType
+
+
+class TestPlayerConfig(unittest.TestCase):
+    def test_build_sets_level_stats_and_equipment(self):
+        simulator = BattleSimulator(PlayerConfig(level=12, weapon="Broad Sword", armor="Chain Mail"), 'slime')
+        player = simulator.player
+
+        assert player.level == 12
+        assert player.weapon.modifier == 20
+        assert player.armor.modifier == 10
+        assert player.max_mp > 0
+        assert SpellType.HURT in player.player_magic
+
+    def test_unknown_equipment_raises(self):
+        with self.assertRaises(ValueError):
+            BattleSimulator(PlayerConfig(weapon="Laser Sword"), 'slime')
+
+
+class TestBattleTally(unittest.TestCase):
+    def test_record_and_merge(self):
+        first = BattleTally()
+        first.record(FightResult(FightOutcome.PLAYER_WINS, rounds=3, player_hp=10, damage_taken=5))
+        second = BattleTally()
+        second.record(FightResult(FightOutcome.PLAYER_LOSES, rounds=5, player_hp=0, damage_taken=15))
+
+        first.merge(second)
+
+        assert first.fights == 2
+        assert first.wins == 1
+        assert first.losses == 1
+        assert first.win_rate == 0.5
+        assert first.mean_rounds == 4
+        assert first.mean_hp_left == 10
+        assert first.mean_damage_taken == 10
+
+
+class TestBattleSimulator(unittest.TestCase):
+    def test_strong_player_never_loses_to_slime(self):
+        config = PlayerConfig(level=30, weapon="Edrick's Sword")
+        tally = BattleSimulator(config, 'slime', AttackPolicy()).run(200)
+
+        assert tally.fights == 200
+        assert tally.losses == 0
+        assert tally.wins + tally.enemy_flees == 200
+
+    def test_weak_player_never_beats_dragonlord(self):
+        tally = BattleSimulator(PlayerConfig(level=1), 'dragonlord_second').run(200)
+
+        assert tally.wins == 0
+        assert tally.losses == 200
+
+    def test_flee_policy_never_wins(self):
+        tally = BattleSimulator(PlayerConfig(level=5), 'ghost', FleePolicy()).run(200)
+
+        assert tally.wins == 0
+        assert tally.flees > 0
+
+    def test_cautious_policy_heals_when_low(self):
+        config = PlayerConfig(level=20, weapon="Broad Sword", herbs=2)
+        simulator = BattleSimulator(config, 'werewolf', CautiousPolicy(heal_below=0.5))
+        player, enemy = simulator.player, simulator.enemy
+        policy = simulator.policy
+
+        assert policy.choose_action(player, enemy) == PlayerActions.ATTACK
+        player.current_hp = 10
+        assert policy.choose_action(player, enemy) == SpellType.HEALMORE
+        player.current_mp = 0
+        assert policy.choose_action(player, enemy) == PlayerActions.HERB
+
+    def test_run_parallel_splits_into_chunks(self):
+        simulator = BattleSimulator(PlayerConfig(level=10, weapon="Copper Sword"), 'skeleton')
+        tally = simulator.run_parallel(1000, workers=1, chunk_size=300)
+
+        assert tally.fights == 1000
+
+    def test_run_parallel_on_process_pool(self):
+        simulator = BattleSimulator(PlayerConfig(level=10, weapon="Copper Sword"), 'skeleton')
+        tally = simulator.run_parallel(400, workers=2)
+
+        assert tally.fights == 400
+        assert tally.wins + tally.losses + tally.flees + tally.enemy_flees + tally.timeouts == 400
+
+    def test_seeded_runs_repeat(self):
+        config = PlayerConfig(level=10, weapon="Copper Sword")
+
+        first = BattleSimulator(config, 'skeleton', seed=3).run(500)
+        second = BattleSimulator(config, 'skeleton', seed=3).run(500)
+
+        assert first == second
+
+    def test_seeded_batches_ignore_chunking(self):
+        config = PlayerConfig(level=10, weapon="Copper Sword")
+        serial = BattleSimulator(config, 'skeleton', seed=5).run_parallel(5000, workers=1, chunk_size=1)
+        pooled = BattleSimulator(config, 'skeleton', seed=5).run_parallel(5000, workers=2, chunk_size=3000)
+
+        assert serial == pooled
+        assert serial.fights == 5000
+
+
+if __name__ == '__main__':
+    unittest.main()
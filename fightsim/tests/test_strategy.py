@@ -0,0 +1,74 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import patch
+from ..analysis.markov import solve_fight
+from ..analysis.strategy import (StrategyChain, StrategyPolicy, StrategyTable, optimal_strategy, parse_actions,
+                                 strategy_cache_path, ACTIONS)
+from ..common.messages import PlayerActions
+from ..models.game_constants import GameConstants
+from ..models.spells import SpellType
+from ..sim.policies import CautiousPolicy
+from ..sim.simulator import PlayerConfig
+
+
+class TestStrategyChain(unittest.TestCase):
+    def setUp(self):
+        self.config = PlayerConfig(level=2, weapon="Club", herbs=1)
+
+    def test_optimal_beats_scripted_policies(self):
+        table = StrategyChain(self.config, 'magician').solve()
+
+        assert table.win >= solve_fight(self.config, 'magician').win
+        assert table.win >= solve_fight(self.config, 'magician', CautiousPolicy()).win
+
+    def test_playing_the_table_scores_its_value(self):
+        table = StrategyChain(self.config, 'magician').solve()
+        solution = solve_fight(self.config, 'magician', StrategyPolicy(table))
+
+        assert abs(solution.win - table.win) < 1e-9
+
+    def test_limited_menu(self):
+        table = StrategyChain(self.config, 'magician', actions=(PlayerActions.ATTACK,)).solve()
+
+        assert {ACTIONS[code] for code in table.actions} == {PlayerActions.ATTACK}
+        assert abs(table.win - solve_fight(self.config, 'magician').win) < 1e-9
+
+    def test_state_limit(self):
+        with self.assertRaisesRegex(ValueError, "actions"):
+            StrategyChain(self.config, 'magician', max_states=100).solve()
+
+    def test_parse_actions(self):
+        assert parse_actions("herb, Heal") == (PlayerActions.ATTACK, PlayerActions.HERB, SpellType.HEAL)
+        assert parse_actions("attack,attack") == (PlayerActions.ATTACK,)
+        with self.assertRaises(ValueError):
+            parse_actions("attack,dance")
+
+
+class TestStrategyCache(unittest.TestCase):
+    def test_solves_once_then_loads(self):
+        config = PlayerConfig(level=3, weapon="Club")
+        with tempfile.TemporaryDirectory() as cache_dir:
+            table = optimal_strategy(config, 'drakee', cache_dir=cache_dir)
+            path = strategy_cache_path(config, 'drakee', cache_dir=cache_dir)
+            assert os.path.exists(path)
+
+            loaded = optimal_strategy(config, 'drakee', cache_dir=cache_dir)
+            assert isinstance(loaded, StrategyTable)
+            assert (loaded.keys == table.keys).all() and (loaded.actions == table.actions).all()
+            assert loaded.win == table.win
+
+    def test_cache_key_covers_inputs(self):
+        config = PlayerConfig(level=3, weapon="Club")
+        path = strategy_cache_path(config, 'drakee')
+
+        assert path == strategy_cache_path(config, 'drakee', GameConstants())
+        assert path != strategy_cache_path(config, 'drakee', GameConstants(crit_chance=16))
+        assert path != strategy_cache_path(PlayerConfig(level=4, weapon="Club"), 'drakee')
+        assert path != strategy_cache_path(config, 'drakee', actions=(PlayerActions.ATTACK,))
+        with patch("fightsim.analysis.strategy.code_version", return_value="rules changed"):
+            assert path != strategy_cache_path(config, 'drakee')
+
+
+if __name__ == '__main__':
+    unittest.main()
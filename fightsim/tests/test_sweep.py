@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from ..sim.adaptive import Precision
+from ..sim.policies import CautiousPolicy
+from ..sim.sweep import Sweep, SweepGrid, parse_levels
+
+SMALL_GRID = SweepGrid(levels=(2, 3), weapons=("Club",), armors=("Naked", "Clothes"), shields=("No Shield",),
+                       enemies=("slime", "drakee"))
+
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def sweep(self, grid=SMALL_GRID, **kwargs):
+        return Sweep(grid, self.directory.name, fights=50, seed=4, **kwargs)
+
+    def test_runs_every_cell_once(self):
+        sweep = self.sweep(unit_size=3)
+
+        assert sweep.run(workers=1) == 3
+        rows = sweep.rows()
+        assert len(rows) == len(SMALL_GRID) == 8
+        assert all(row.tally.fights == 50 for row in rows)
+        assert self.sweep().run(workers=1) == 0
+
+    def test_duplicate_cells_share_a_key(self):
+        grid = SweepGrid(levels=(2, 2), weapons=("Club",), armors=("Naked",), shields=("No Shield",),
+                         enemies=("slime",))
+        sweep = self.sweep(grid)
+
+        assert sum(len(unit) for unit in sweep.pending_units()) == 1
+        sweep.run(workers=1)
+        first, second = sweep.rows()
+        assert first.key == second.key
+
+    def test_resumes_after_interruption(self):
+        sweep = self.sweep(unit_size=2)
+        first_unit = sweep.pending_units()[0]
+        sweep.run(workers=1)
+        expected = {row.key: row.tally for row in sweep.rows()}
+
+        # Keep the first unit and a torn line, as if the process died while writing the second
+        with open(sweep.journal_path, encoding="utf-8") as journal:
+            kept = journal.readlines()[:len(first_unit)]
+        with open(sweep.journal_path, "w", encoding="utf-8") as journal:
+            journal.writelines(kept)
+            journal.write('{"key": "')
+
+        resumed = self.sweep(unit_size=3)
+        assert sum(len(unit) for unit in resumed.pending_units()) == len(expected) - len(first_unit)
+        resumed.run(workers=1)
+        assert {row.key: row.tally for row in resumed.rows()} == expected
+
+    def test_report(self):
+        sweep = self.sweep()
+        sweep.run(workers=1)
+        path = os.path.join(self.directory.name, "sweep.csv")
+
+        assert sweep.write_csv(path) == 8
+        with open(path, encoding="utf-8") as report:
+            assert report.readline().startswith("level,weapon,armor,shield,enemy,fights,win_rate")
+
+    def test_adaptive_cells_stop_early(self):
+        sweep = Sweep(SMALL_GRID, self.directory.name, fights=5000, seed=4, precision=Precision(0.02))
+        sweep.run(workers=1)
+
+        assert all(row.tally.fights < 5000 for row in sweep.rows() if row.cell.enemy_key == "slime")
+        assert len(sweep.rows()) == 8
+
+    def test_screening_skips_one_sided_cells(self):
+        grid = SweepGrid(levels=(1,), weapons=("Club",), armors=("Naked",), shields=("No Shield",),
+                         enemies=("drakee", "golem", "warlock"))
+        sweep = self.sweep(grid, screen=1e-6)
+        screened = sweep.screened()
+        assert len(screened) == 1 and list(screened.values())[0] < 1e-6  # Level 1 against the golem
+        assert sum(len(unit) for unit in sweep.pending_units()) == 2
+        sweep.run(workers=1)
+        rows = sweep.rows()
+        assert [row.cell.enemy_key for row in rows] == ["drakee", "golem", "warlock"]
+        assert rows[1].screened is not None and rows[1].tally.fights == 0
+        path = os.path.join(self.directory.name, "sweep.csv")
+        assert sweep.write_csv(path) == 3
+        with self.assertRaises(ValueError):
+            self.sweep(grid, screen=1e-6, policy=CautiousPolicy())
+
+    def test_parse_levels(self):
+        assert parse_levels("1-3,7") == (1, 2, 3, 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import tkinter as tk
 from functools import partial
 
+from fightsim.models.spells import SpellType
+
 
 class BattleFrame(tk.Frame):
     """Optimized frame for conducting the fight."""
@@ -15,6 +17,7 @@ class BattleFrame(tk.Frame):
         self.magic_option_var = tk.StringVar(self)
         self.magic_menu = None
         self.player_magic = []
+        self.menu_spells = None  # The spells the magic menu was last built from
 
     def set_controller(self, controller):
         """ Sets controller as the controller for BattleFrame and continues setup of BattleFrame """
@@ -24,7 +27,7 @@ class BattleFrame(tk.Frame):
 
     def set_magic_menu(self):
         """ Initializes self.player_magic and links it correctly with the controller. """
-        self.player_magic = self.controller.model.player.player_magic
+        self.player_magic = self.controller.game_state.player.player_magic
         if not self.player_magic:
             self.player_magic = ["No Magic Available"]
         self.magic_option_var.set(self.player_magic[0])
@@ -45,16 +48,28 @@ class BattleFrame(tk.Frame):
 
     def update_player_magic_menu(self):
         """ Update the options available in the magic menu based on current player magic abilities. """
+        # Ensure there's a default list of magic spells
+        player_magic = tuple(self.controller.game_state.player.player_magic) or ("No Magic Available",)
+        if player_magic == self.menu_spells:
+            return  # Nothing learned or lost, so keep the menu and the current selection
+        self.menu_spells = player_magic
+
         menu = self.magic_menu['menu']
         menu.delete(0, 'end')
-
-        # Ensure there's a default list of magic spells
-        player_magic = self.controller.model.player.player_magic or ["No Magic Available"]
         self.magic_option_var.set(player_magic[0])
 
         for magic in player_magic:
-            menu.add_command(label=magic.value.name, command=partial(self.set_magic_option, magic))
+            label = magic.value.name if isinstance(magic, SpellType) else magic
+            menu.add_command(label=label, command=partial(self.set_magic_option, magic))
 
     def set_magic_option(self, magic):
         """ Set the current magic option in the OptionMenu. """
         self.magic_option_var.set(magic)
+
+    def selected_spell(self):
+        """ The SpellType chosen in the magic menu, or the menu's text if it holds no spell """
+        choice = self.magic_option_var.get()
+        for magic in self.menu_spells or self.player_magic:
+            if str(magic) == choice:
+                return magic
+        return choice
@@ -2,17 +2,23 @@ import tkinter as tk
 import tkinter.scrolledtext as scrolledtext
 import inspect
 
+from fightsim.views.output_buffer import MAX_LOG_LINES, OutputBuffer
+
 
 class MainFrame(tk.Frame):
     """
     Main frame of the program. Holds output
+
+    Output is buffered and written to the log once per pass of the event loop. The log keeps the last max_lines
+    lines; older lines are appended to spill_path if one is given, and dropped otherwise.
     """
 
-    def __init__(self, parent):
+    def __init__(self, parent, max_lines=MAX_LOG_LINES, spill_path=None):
         tk.Frame.__init__(self, parent)
         self.configure(bg='purple')
         self.parent = parent
         self.controller = None
+        self.output = OutputBuffer(max_lines, spill_path)
 
         top_spacer = tk.Frame(self, height=12, bg='purple')
         top_spacer.pack(fill='both', expand=True)
@@ -105,13 +111,27 @@ class MainFrame(tk.Frame):
             """)
 
     def update_output(self, _, message):
-        """Appends output to the main output window"""
+        """Queues output for the main output window, to be written when the event loop goes idle"""
+        if self.output.add(message):
+            self.after_idle(self.flush_output)
+
+    def flush_output(self):
+        """Appends all queued output to the main output window in one insert and trims the oldest lines"""
+        text = self.output.take()
+        if not text:
+            return
         self.txt.configure(state='normal')  # Enable text widget for editing
-        self.txt.insert(tk.END, message + "\n")  # Append new message
+        self.txt.insert(tk.END, text)
+        excess = self.output.overflow()
+        if excess:
+            end = f"{excess + 1}.0"
+            self.output.trimmed(excess, self.txt.get("1.0", end))
+            self.txt.delete("1.0", end)
         self.txt.configure(state='disabled')  # Disable text widget to prevent editing
         self.txt.see(tk.END)  # Auto-scroll to the end
 
     def clear_output(self):
-        """Erases all output in the main output"""
+        """Erases all output in the main output, including output not written yet"""
+        self.output.clear()
         self.txt["state"] = 'normal'
         self.txt.delete(1.0, tk.END)
@@ -0,0 +1,45 @@
+"""
+Bookkeeping for the MainFrame battle log, kept free of Tk so it can be tested headless.
+
+Messages are queued until the next idle flush and then inserted as one block of text. The log is capped at
+max_lines: after a flush, overflow() says how many of the oldest lines to cut, and trimmed() hands those lines to
+the spill file, if one is set, before they are dropped.
+"""
+
+MAX_LOG_LINES = 2000
+
+
+class OutputBuffer:
+    def __init__(self, max_lines=MAX_LOG_LINES, spill_path=None):
+        self.max_lines = max_lines
+        self.spill_path = spill_path
+        self.pending = []
+        self.lines = 0  # Lines currently in the widget
+
+    def add(self, message):
+        """ Queues message. Returns True if it is the first one since the last flush, so a flush must be scheduled """
+        self.pending.append(message)
+        return len(self.pending) == 1
+
+    def take(self):
+        """ All pending messages as one block of text, one message per line. Empties the queue """
+        if not self.pending:
+            return ""
+        text = "".join(message + "\n" for message in self.pending)
+        self.pending.clear()
+        self.lines += text.count("\n")
+        return text
+
+    def overflow(self):
+        return max(self.lines - self.max_lines, 0)
+
+    def trimmed(self, count, text):
+        """ Records that the oldest count lines, holding text, were removed from the widget """
+        self.lines -= count
+        if self.spill_path:
+            with open(self.spill_path, "a", encoding="utf-8") as spill:
+                spill.write(text)
+
+    def clear(self):
+        self.pending.clear()
+        self.lines = 0
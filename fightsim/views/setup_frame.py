@@ -13,6 +13,8 @@ class SetupFrame(tk.Frame):
         super().__init__(parent, width=width, height=height, **kwargs)
         self.start_fight_button = None
         self.buy_herb_button = None
+        self.simulate_button = None
+        self.cancel_simulation_button = None
         self.controller = None
         self.battle_controller = None
         self.level_spinbox = None
@@ -24,6 +26,8 @@ class SetupFrame(tk.Frame):
         self.level_var = tk.IntVar(value=1)
         self.name_var = tk.StringVar(value="Rollo")
         self.enemy_var = tk.StringVar(value="Select Enemy")
+        self.simulation_status_var = tk.StringVar(value="")
+        self.kill_estimate_var = tk.StringVar(value="")
         self.weapon_menu = None
         self.armor_menu = None
         self.shield_menu = None
@@ -87,6 +91,25 @@ class SetupFrame(tk.Frame):
         self.start_fight_button = tk.Button(self, text="FIGHT!", command=self.battle_controller.start_battle)
         self.start_fight_button.grid(row=7, column=0, columnspan=2, sticky="ew", padx=5, pady=10)
 
+        self.simulate_button = tk.Button(self, text="Simulate 10,000",
+                                         command=lambda: self.controller.simulate_fights())
+        self.simulate_button.grid(row=8, column=0, sticky="ew", padx=5, pady=5)
+        self.cancel_simulation_button = tk.Button(self, text="Cancel", state="disabled",
+                                                  command=lambda: self.controller.cancel_simulation())
+        self.cancel_simulation_button.grid(row=8, column=1, sticky="ew", padx=5, pady=5)
+        tk.Label(self, textvariable=self.simulation_status_var).grid(row=9, column=0, columnspan=2, sticky="ew")
+        tk.Label(self, textvariable=self.kill_estimate_var, justify="left").grid(row=10, column=0, columnspan=2,
+                                                                                sticky="w", padx=5)
+
+    def set_simulation_status(self, text, running):
+        """ Shows simulation progress and enables Cancel, instead of Simulate, while a batch runs """
+        self.simulation_status_var.set(text)
+        self.simulate_button["state"] = "disabled" if running else "normal"
+        self.cancel_simulation_button["state"] = "normal" if running else "disabled"
+
+    def set_kill_estimate(self, text):
+        self.kill_estimate_var.set(text)
+
     def set_traces(self):
         self.level_var.trace("w",
                              lambda name, index, mode,